@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import json
+import struct
+import sys
+
+from array import array
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.game import Game
+from tsumemi.src.shogi.gametree import GameNode
+from tsumemi.src.shogi.move import unpack_move
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Generator, Iterator, List
+    from tsumemi.src.shogi.gametree import MoveNode
+    from tsumemi.src.shogi.move import Move
+    from tsumemi.src.shogi.notation import AbstractMoveWriter
+    from tsumemi.src.shogi.position import Position
+
+
+NO_NODE = -1  # index sentinel: no parent/child/sibling/comment
+
+# Binary layout: magic, format version, number of nodes; then the six
+# node arrays as little-endian 32-bit ints; then the strings as JSON.
+ARENA_MAGIC = b"TSAG"
+ARENA_FORMAT_VERSION = 1
+_ARENA_HEADER = struct.Struct("<4sHI")
+
+
+class ArenaGameTree:
+    """A movetree stored compactly as parallel arrays indexed by node
+    index, instead of one Python object per node. For each node this
+    holds the packed move leading to it, the indices of its parent,
+    first child and next sibling, its move number, and the index of
+    its comment in a string table. The root node has index 0.
+
+    Meant for keeping many games in memory at a few tens of bytes per
+    ply. Nodes are read through ArenaMoveNode views, which follow the
+    MoveNode interface; `to_game` rebuilds a regular Game.
+    """
+
+    def __init__(self) -> None:
+        self.sente: str = ""
+        self.gote: str = ""
+        self.handicap: str = ""
+        self.start_pos: str = ""  # sfen
+        self.headers: Dict[str, str] = {}
+        self._moves = array("I", [0])
+        self._parents = array("i", [NO_NODE])
+        self._first_children = array("i", [NO_NODE])
+        self._next_siblings = array("i", [NO_NODE])
+        self._movenums = array("I", [0])
+        self._comment_idxs = array("i", [NO_NODE])
+        self._comments: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._moves)
+
+    @property
+    def root(self) -> ArenaMoveNode:
+        return ArenaMoveNode(self, 0)
+
+    def get_node(self, idx: int) -> ArenaMoveNode:
+        """Return a view of the node with the given index, or a null
+        view if there is none.
+        """
+        if 0 <= idx < len(self._moves):
+            return ArenaMoveNode(self, idx)
+        return ArenaMoveNode(self, NO_NODE)
+
+    def add_move(self, parent_idx: int, move: Move) -> int:
+        """Add a node for the move as the last child of the parent
+        node and return its index. If the move already exists as a
+        child, return the index of the existing node instead.
+        """
+        packed = move.pack()
+        child_idx = self._first_children[parent_idx]
+        last_child_idx = NO_NODE
+        while child_idx != NO_NODE:
+            if self._moves[child_idx] == packed:
+                return child_idx
+            last_child_idx = child_idx
+            child_idx = self._next_siblings[child_idx]
+        new_idx = len(self._moves)
+        self._moves.append(packed)
+        self._parents.append(parent_idx)
+        self._first_children.append(NO_NODE)
+        self._next_siblings.append(NO_NODE)
+        self._movenums.append(self._movenums[parent_idx] + 1)
+        self._comment_idxs.append(NO_NODE)
+        if last_child_idx == NO_NODE:
+            self._first_children[parent_idx] = new_idx
+        else:
+            self._next_siblings[last_child_idx] = new_idx
+        return new_idx
+
+    def get_children(self, idx: int) -> List[int]:
+        res: List[int] = []
+        child_idx = self._first_children[idx]
+        while child_idx != NO_NODE:
+            res.append(child_idx)
+            child_idx = self._next_siblings[child_idx]
+        return res
+
+    def get_move(self, idx: int) -> Move:
+        return unpack_move(self._moves[idx])
+
+    def get_comment(self, idx: int) -> str:
+        comment_idx = self._comment_idxs[idx]
+        return "" if comment_idx == NO_NODE else self._comments[comment_idx]
+
+    def set_comment(self, idx: int, comment: str) -> None:
+        comment_idx = self._comment_idxs[idx]
+        if comment_idx != NO_NODE:
+            self._comments[comment_idx] = comment
+        elif comment:
+            self._comment_idxs[idx] = len(self._comments)
+            self._comments.append(comment)
+
+    def _arrays(self) -> List[array[int]]:
+        return [
+            self._moves,
+            self._parents,
+            self._first_children,
+            self._next_siblings,
+            self._movenums,
+            self._comment_idxs,
+        ]
+
+    def to_bytes(self) -> bytes:
+        """Serialise the tree into a compact, platform-independent
+        binary form that `from_bytes` reads back.
+        """
+        parts = [_ARENA_HEADER.pack(ARENA_MAGIC, ARENA_FORMAT_VERSION, len(self))]
+        for arr in self._arrays():
+            if sys.byteorder == "big":
+                arr = array(arr.typecode, arr)
+                arr.byteswap()
+            parts.append(arr.tobytes())
+        strings = {
+            "sente": self.sente,
+            "gote": self.gote,
+            "handicap": self.handicap,
+            "start_pos": self.start_pos,
+            "headers": self.headers,
+            "comments": self._comments,
+        }
+        parts.append(json.dumps(strings, ensure_ascii=False).encode("utf-8"))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> ArenaGameTree:
+        """Read a tree serialised by `to_bytes`. Raises ValueError if
+        the data is not a serialised tree of this format version.
+        """
+        try:
+            magic, version, num_nodes = _ARENA_HEADER.unpack_from(data)
+        except struct.error as exc:
+            raise ValueError("Data too short for an arena game tree") from exc
+        if magic != ARENA_MAGIC or version != ARENA_FORMAT_VERSION:
+            raise ValueError("Data is not an arena game tree of a known version")
+        tree = cls()
+        offset = _ARENA_HEADER.size
+        arrays = tree._arrays()
+        for arr in arrays:
+            end = offset + num_nodes * arr.itemsize
+            if end > len(data):
+                raise ValueError("Arena game tree data is truncated")
+            del arr[:]
+            arr.frombytes(data[offset:end])
+            if sys.byteorder == "big":
+                arr.byteswap()
+            offset = end
+        try:
+            strings = json.loads(data[offset:].decode("utf-8"))
+        except ValueError as exc:
+            raise ValueError("Arena game tree strings are corrupt") from exc
+        tree.sente = strings["sente"]
+        tree.gote = strings["gote"]
+        tree.handicap = strings["handicap"]
+        tree.start_pos = strings["start_pos"]
+        tree.headers = strings["headers"]
+        tree._comments = strings["comments"]
+        return tree
+
+    @classmethod
+    def from_movetree(cls, movetree: GameNode) -> ArenaGameTree:
+        """Pack an object movetree into a new ArenaGameTree."""
+        tree = cls()
+        tree.sente = movetree.sente
+        tree.gote = movetree.gote
+        tree.handicap = movetree.handicap
+        tree.start_pos = movetree.start_pos
+        tree.headers = dict(movetree.headers)
+        tree.set_comment(0, movetree.comment)
+        idxs_by_node_id = {movetree.id: 0}
+        nodes = movetree.traverse_preorder()
+        next(nodes)  # exclude the root node
+        for node in nodes:
+            idx = tree.add_move(idxs_by_node_id[node.parent.id], node.move)
+            tree.set_comment(idx, node.comment)
+            idxs_by_node_id[node.id] = idx
+        return tree
+
+    def to_movetree(self) -> GameNode:
+        """Unpack into a new object movetree. Node ids of the new
+        movetree are the same as the node indices here.
+        """
+        movetree = GameNode()
+        movetree.sente = self.sente
+        movetree.gote = self.gote
+        movetree.handicap = self.handicap
+        movetree.start_pos = self.start_pos
+        movetree.headers = dict(self.headers)
+        movetree.comment = self.get_comment(0)
+        nodes: List[MoveNode] = [movetree]
+        # Parents always precede their children, and siblings are in
+        # order, so adding nodes in index order rebuilds the tree.
+        for idx in range(1, len(self._moves)):
+            node = nodes[self._parents[idx]].add_move(self.get_move(idx))
+            node.comment = self.get_comment(idx)
+            nodes.append(node)
+        return movetree
+
+    @classmethod
+    def from_game(cls, game: Game) -> ArenaGameTree:
+        return cls.from_movetree(game.movetree)
+
+    def to_game(self) -> Game:
+        """Return a new Game with this movetree, at the start."""
+        game = Game()
+        game.movetree = self.to_movetree()
+        game.curr_node = game.movetree
+        game.go_to_start()
+        return game
+
+
+class ArenaMoveNode:
+    """Lightweight view of one node of an ArenaGameTree, with the same
+    interface as MoveNode. Views are created on demand and compare
+    equal if they refer to the same node of the same tree.
+    """
+
+    __slots__ = ("tree", "idx")
+
+    def __init__(self, tree: ArenaGameTree, idx: int) -> None:
+        self.tree = tree
+        self.idx = idx
+
+    def __eq__(self, obj: Any) -> bool:
+        return (
+            isinstance(obj, ArenaMoveNode)
+            and self.tree is obj.tree
+            and self.idx == obj.idx
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.idx))
+
+    @property
+    def id(self) -> int:
+        return self.idx
+
+    @property
+    def move(self) -> Move:
+        return unpack_move(0 if self.is_null() else self.tree._moves[self.idx])
+
+    @property
+    def parent(self) -> ArenaMoveNode:
+        if self.is_null():
+            return self
+        return ArenaMoveNode(self.tree, self.tree._parents[self.idx])
+
+    @property
+    def movenum(self) -> int:
+        return 0 if self.is_null() else self.tree._movenums[self.idx]
+
+    @property
+    def comment(self) -> str:
+        return "" if self.is_null() else self.tree.get_comment(self.idx)
+
+    @comment.setter
+    def comment(self, comment: str) -> None:
+        self.tree.set_comment(self.idx, comment)
+
+    @property
+    def variations(self) -> List[ArenaMoveNode]:
+        if self.is_null():
+            return []
+        return [
+            ArenaMoveNode(self.tree, idx) for idx in self.tree.get_children(self.idx)
+        ]
+
+    def is_null(self) -> bool:
+        return self.idx == NO_NODE
+
+    def is_leaf(self) -> bool:
+        return self.is_null() or self.tree._first_children[self.idx] == NO_NODE
+
+    def has_variations(self) -> bool:
+        if self.is_leaf():
+            return False
+        return self.tree._next_siblings[self.tree._first_children[self.idx]] != NO_NODE
+
+    def add_move(self, move: Move) -> ArenaMoveNode:
+        """Add a new node to the movetree. If move already exists as a
+        variation, don't create a new node but return the existing
+        variation node.
+        """
+        return ArenaMoveNode(self.tree, self.tree.add_move(self.idx, move))
+
+    def has_as_next_move(self, move: Move) -> bool:
+        packed = move.pack()
+        moves = self.tree._moves
+        return any(moves[idx] == packed for idx in self.tree.get_children(self.idx))
+
+    def get_variation_node(self, move: Move) -> ArenaMoveNode:
+        """Return the child node corresponding to the given move."""
+        packed = move.pack()
+        for idx in self.tree.get_children(self.idx):
+            if self.tree._moves[idx] == packed:
+                return ArenaMoveNode(self.tree, idx)
+        raise ValueError(
+            f"Move ({str(move)}) is not a variation after move ({str(self.movenum)})"
+        )
+
+    def get_path_from_root(self) -> Iterator[ArenaMoveNode]:
+        """Returns an iterator of nodes leading from the root of the
+        gametree to the caller node, inclusive.
+        """
+        parents = self.tree._parents
+        res: List[ArenaMoveNode] = []
+        idx = self.idx
+        while idx != NO_NODE:
+            res.append(ArenaMoveNode(self.tree, idx))
+            idx = parents[idx]
+        return reversed(res)
+
+    def get_last_node(self) -> ArenaMoveNode:
+        """Returns the node at the end of the mainline from this node."""
+        if self.is_null():
+            return self
+        first_children = self.tree._first_children
+        idx = self.idx
+        while first_children[idx] != NO_NODE:
+            idx = first_children[idx]
+        return ArenaMoveNode(self.tree, idx)
+
+    def next(self) -> ArenaMoveNode:
+        if self.is_null():
+            return self
+        return ArenaMoveNode(self.tree, self.tree._first_children[self.idx])
+
+    def prev(self) -> ArenaMoveNode:
+        return self.parent
+
+    def traverse_preorder(self) -> Generator[ArenaMoveNode, None, None]:
+        """Traverse the game tree from this node by preorder.
+        This will yield the mainline first. Includes the called node.
+        """
+        if self.is_null():
+            return
+        first_children = self.tree._first_children
+        next_siblings = self.tree._next_siblings
+        yield self
+        stack = [first_children[self.idx]]
+        while stack:
+            idx = stack.pop()
+            if idx == NO_NODE:
+                continue
+            yield ArenaMoveNode(self.tree, idx)
+            stack.append(next_siblings[idx])
+            stack.append(first_children[idx])
+
+    def traverse_mainline(self) -> Generator[ArenaMoveNode, None, None]:
+        """Traverse only the mainline of this node. Includes the
+        called node.
+        """
+        first_children = self.tree._first_children
+        idx = self.idx
+        while idx != NO_NODE:
+            yield ArenaMoveNode(self.tree, idx)
+            idx = first_children[idx]
+
+    def write_move(
+        self,
+        move_writer: AbstractMoveWriter,
+        position: Position,
+    ) -> str:
+        """Returns the node's move as a string in the format of
+        `move_writer`. The `position` is required for disambiguation.
+        """
+        move = self.move
+        if move.is_null():
+            return ""
+        parent_move = self.parent.move
+        is_same_sq = not parent_move.is_null() and parent_move.end_sq == move.end_sq
+        return move_writer.write_move(move, position, is_same_sq)
@@ -306,6 +306,10 @@ class GameTermination(str, Enum, metaclass=MetaEnum):
     ILLEGAL_WIN = "反則勝ち"
     ILLEGAL_LOSS = "反則負け"
     NYUUGYOKU = "入玉勝ち"
+    # Added later; kept last so that packed move codes stay the same
+    HIKIWAKE = "引き分け"
+    MATTA = "待った"
+    FUZUMI = "不詰"
 
 
 CODE_FROM_TERMINATION: dict[GameTermination, int] = {
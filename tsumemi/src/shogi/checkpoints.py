@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tsumemi.src.shogi.gametree import MoveNode, MoveNodeId
+    from tsumemi.src.shogi.position import Position, PositionSnapshot
+
+
+class PositionCheckpoints:
+    """Bounded store of position snapshots along one movetree, keyed
+    by node id. A snapshot is wanted every `interval` plies and at
+    every branch point, so a position anywhere in the movetree can be
+    reached by restoring the nearest checkpointed ancestor and
+    replaying a few moves, instead of replaying from the start.
+
+    At most `max_entries` snapshots are held; the least recently used
+    ones are evicted first.
+    """
+
+    def __init__(self, interval: int = 8, max_entries: int = 512) -> None:
+        if interval < 1:
+            raise ValueError("Checkpoint interval must be at least 1")
+        self.interval: int = interval
+        self.max_entries: int = max_entries
+        self._snapshots: OrderedDict[MoveNodeId, PositionSnapshot] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def clear(self) -> None:
+        """Forget all snapshots. Must be called when the movetree the
+        store belongs to is replaced, as node ids are per movetree.
+        """
+        self._snapshots.clear()
+
+    def wants_checkpoint(self, node: MoveNode) -> bool:
+        return node.movenum % self.interval == 0 or node.has_variations()
+
+    def save(self, node: MoveNode, position: Position) -> None:
+        """Save `position` as the position at `node`."""
+        if self.max_entries <= 0:
+            return
+        self._snapshots[node.id] = position.to_snapshot()
+        self._snapshots.move_to_end(node.id)
+        while len(self._snapshots) > self.max_entries:
+            self._snapshots.popitem(last=False)
+
+    def get(self, node: MoveNode) -> PositionSnapshot | None:
+        """Return the snapshot saved for `node`, if any."""
+        snapshot = self._snapshots.get(node.id)
+        if snapshot is not None:
+            self._snapshots.move_to_end(node.id)
+        return snapshot
@@ -7,6 +7,7 @@ from tsumemi.src.shogi.position import Position
 
 if TYPE_CHECKING:
     from typing import Generator, Iterable, List, Optional
+    from tsumemi.src.shogi.checkpoints import PositionCheckpoints
     from tsumemi.src.shogi.gametree import MoveNode
     from tsumemi.src.shogi.move import Move
     from tsumemi.src.shogi.notation import AbstractMoveWriter
@@ -16,12 +17,17 @@ class Game:
     """Representation of a shogi game. Contains a reference to the
     root of the movetree, the current active node, and the current
     position in the game.
+
+    If given a PositionCheckpoints store, jumping to an arbitrary node
+    restores the nearest checkpointed ancestor position instead of
+    replaying every move from the start.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, checkpoints: Optional[PositionCheckpoints] = None) -> None:
         self.movetree: GameNode = GameNode()
         self.curr_node: MoveNode = self.movetree
         self.position: Position = Position()
+        self.checkpoints: Optional[PositionCheckpoints] = checkpoints
         return
 
     def copy_from(self, game: Game) -> None:
@@ -29,6 +35,8 @@ class Game:
         self.movetree = game.movetree
         self.curr_node = game.curr_node
         self.position = game.position
+        if self.checkpoints is not None:
+            self.checkpoints.clear()
         return
 
     def reset(self) -> None:
@@ -36,6 +44,8 @@ class Game:
         self.movetree = GameNode()
         self.curr_node = self.movetree
         self.position.reset()
+        if self.checkpoints is not None:
+            self.checkpoints.clear()
         return
 
     def get_last_move(self) -> Move:
@@ -110,11 +120,8 @@ class Game:
 
     def go_to_id(self, _id: int) -> None:
         """Go to the node with the given id."""
-        for node in self.movetree.traverse_preorder():
-            if node.id == _id:
-                target_node = node
-                break
-        else:
+        target_node = self.movetree.get_node_by_id(_id)
+        if target_node.is_null():
             # Node not found, do nothing
             return
         self._go_to_node(target_node)
@@ -122,12 +129,43 @@ class Game:
 
     def _go_to_node(self, target_node: MoveNode) -> None:
         """Go to the target node, assuming it is in the movetree."""
+        if self.checkpoints is not None:
+            self.position = self._restore_position(target_node, self.checkpoints)
+            self.curr_node = target_node
+            return
         path_nodes = target_node.get_path_from_root()
         path_nodes.__next__()  # exclude the root node
         self.position = self.get_end_position((node.move for node in path_nodes))
         self.curr_node = target_node
         return
 
+    def _restore_position(
+        self, target_node: MoveNode, checkpoints: PositionCheckpoints
+    ) -> Position:
+        """Build the position at the target node from the nearest
+        checkpointed ancestor (or the start position), saving new
+        checkpoints on the way.
+        """
+        nodes_to_replay: list[MoveNode] = []
+        node = target_node
+        snapshot = None
+        while not node.is_null():
+            snapshot = checkpoints.get(node)
+            if snapshot is not None:
+                break
+            nodes_to_replay.append(node)
+            node = node.parent
+        position = Position()
+        if snapshot is None:
+            position.from_sfen(self.movetree.start_pos)
+        else:
+            position.from_snapshot(snapshot)
+        for node in reversed(nodes_to_replay):
+            position.make_move(node.move)
+            if checkpoints.wants_checkpoint(node):
+                checkpoints.save(node, position)
+        return position
+
     def get_current_sfen(self) -> str:
         return self.position.to_sfen()
 
@@ -145,12 +183,26 @@ class Game:
         return position
 
     def get_mainline_notation(self, move_writer: AbstractMoveWriter) -> List[str]:
-        pos = Position()
-        pos.from_sfen(self.movetree.start_pos)
-        res: list[str] = []
         nodes = self.movetree.traverse_mainline()
         nodes.__next__()  # exclude the root node
-        for node in nodes:
-            pos.make_move(node.move)
-            res.append(node.write_move(move_writer, pos))
-        return res
+        return self.get_path_notation(nodes, move_writer)
+
+    def get_path_notation(
+        self, path: Iterable[MoveNode], move_writer: AbstractMoveWriter
+    ) -> List[str]:
+        """Returns the notation of each node in `path`, which must be
+        consecutive nodes starting at the root or its first move.
+        Notation is cached in the nodes, so positions are only replayed
+        as far as the last node not yet written with this move writer.
+        """
+        nodes = list(path)
+        res = [node.get_cached_notation(move_writer) for node in nodes]
+        uncached_idxs = [i for i, notation in enumerate(res) if notation is None]
+        if uncached_idxs:
+            pos = Position()
+            pos.from_sfen(self.movetree.start_pos)
+            for i, node in enumerate(nodes[: uncached_idxs[-1] + 1]):
+                if res[i] is None:
+                    res[i] = node.write_move(move_writer, pos)
+                pos.make_move(node.move)
+        return [notation or "" for notation in res]
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from typing import NewType, TYPE_CHECKING
+from typing import cast, NewType, TYPE_CHECKING
 
 from tsumemi.src.shogi.move import NullMove
 
 if TYPE_CHECKING:
-    from typing import Any, Callable, Generator, Iterator, List
+    from typing import Any, Callable, Dict, Generator, Iterator, List, Optional
     from tsumemi.src.shogi.move import Move
     from tsumemi.src.shogi.notation import AbstractMoveWriter
     from tsumemi.src.shogi.position import Position
@@ -21,17 +21,22 @@ class MoveNode:
     list of child nodes (the mainline is first in the list).
     """
 
-    _id = 0  # running unique ID for MoveNodes
-
     def __init__(self, move: Move, parent: MoveNode) -> None:
         self.move: Move = move  # move leading to this node
         self.parent: MoveNode = parent
         self.movenum: int = 0 if parent.is_null() else parent.movenum + 1
         self.comment: str = ""
         self.variations: List[MoveNode] = []
-        # implementation detail
-        self.id: MoveNodeId = MoveNodeId(MoveNode._id)
-        MoveNode._id += 1
+        # child nodes keyed by packed move, for fast lookup
+        self._variations_by_move: Dict[int, MoveNode] = {}
+        # notation of the move, by type of the move writer that wrote it
+        self._notation_cache: Dict[type, str] = {}
+        # implementation detail; ids are unique within one movetree
+        # and are handed out by the root node when a node is added.
+        self.root: GameNode = (
+            cast("GameNode", self) if parent.is_null() else parent.root
+        )
+        self.id: MoveNodeId = MoveNodeId(0)
         return
 
     def is_null(self) -> bool:
@@ -48,24 +53,27 @@ class MoveNode:
         variation, don't create a new node but return the existing
         variation node.
         """
-        for node in self.variations:
-            if move == node.move:
-                return node
+        packed_move = move.pack()
+        node = self._variations_by_move.get(packed_move)
+        if node is not None:
+            return node
         new_node = MoveNode(move, self)
+        self.root.register_node(new_node)
         self.variations.append(new_node)
+        self._variations_by_move[packed_move] = new_node
         return new_node
 
     def has_as_next_move(self, move: Move) -> bool:
-        return any(node.move == move for node in self.variations)
+        return move.pack() in self._variations_by_move
 
     def get_variation_node(self, move: Move) -> MoveNode:
         """Return the child node corresponding to the given move."""
-        for node in self.variations:
-            if move == node.move:
-                return node
-        raise ValueError(
-            f"Move ({str(move)}) is not a variation after move (str(self.movenum))"
-        )
+        try:
+            return self._variations_by_move[move.pack()]
+        except KeyError as exc:
+            raise ValueError(
+                f"Move ({str(move)}) is not a variation after move ({str(self.movenum)})"
+            ) from exc
 
     def get_path_from_root(self) -> Iterator[MoveNode]:
         """Returns an iterator of MoveNodes leading from the root of
@@ -113,15 +121,32 @@ class MoveNode:
         position: Position,
     ) -> str:
         """Returns the node's move as a string in the format of
-        `move_writer`. The `position` is required for disambiguation.
+        `move_writer`. The `position` (before the move is made) is
+        required for disambiguation.
+
+        The result is cached per type of move writer; a node's notation
+        cannot change once it is in the movetree.
         """
+        cached = self._notation_cache.get(type(move_writer))
+        if cached is not None:
+            return cached
         if self.move.is_null():
             return ""
         is_same_sq = (
             not self.parent.move.is_null()
             and self.parent.move.end_sq == self.move.end_sq
         )
-        return move_writer.write_move(self.move, position, is_same_sq)
+        notation = move_writer.write_move(self.move, position, is_same_sq)
+        self._notation_cache[type(move_writer)] = notation
+        return notation
+
+    def get_cached_notation(self, move_writer: AbstractMoveWriter) -> Optional[str]:
+        """Returns the node's move as already written by `write_move`
+        with the same type of move writer, if any.
+        """
+        if self.move.is_null():
+            return ""
+        return self._notation_cache.get(type(move_writer))
 
     def _rec_str(
         self, acc: List[Any], func: Callable[[MoveNode, List[Any]], None]
@@ -167,6 +192,10 @@ class GameNode(MoveNode):
         self.gote: str = ""
         self.handicap: str = ""
         self.start_pos: str = ""  # sfen
+        self.headers: Dict[str, str] = {}  # all header fields of the record
+        self._next_id: int = 0
+        self._nodes_by_id: Dict[MoveNodeId, MoveNode] = {}
+        self.register_node(self)
         return
 
     def __str__(self) -> str:
@@ -178,3 +207,20 @@ class GameNode(MoveNode):
         acc: List[str] = []
         self._rec_str(acc, MoveNode._latin_move)
         return " ".join(acc)
+
+    def register_node(self, node: MoveNode) -> MoveNodeId:
+        """Give a node in this movetree its id and index it by that id.
+        """
+        node.id = MoveNodeId(self._next_id)
+        self._next_id += 1
+        self._nodes_by_id[node.id] = node
+        return node.id
+
+    def get_node_by_id(self, id_: int) -> MoveNode:
+        """Return the node in this movetree with the given id, or a
+        NullMoveNode if there is none.
+        """
+        try:
+            return self._nodes_by_id[MoveNodeId(id_)]
+        except KeyError:
+            return NullMoveNode()
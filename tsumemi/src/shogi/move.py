@@ -3,11 +3,23 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from tsumemi.src.shogi.basetypes import Koma, KomaType, SFEN_FROM_KOMA, KANJI_NOTATION_FROM_KTYPE
+from tsumemi.src.shogi.basetypes import CODE_FROM_TERMINATION, GameTermination
 from tsumemi.src.shogi.square import KanjiNumber, Square
 
 if TYPE_CHECKING:
     from typing import Any, List
-    from tsumemi.src.shogi.basetypes import GameTermination
+
+
+# Bit layout of a packed move (see Move.pack)
+_PACK_END_SQ_SHIFT = 7
+_PACK_PROMOTION_SHIFT = 14
+_PACK_KOMA_SHIFT = 15
+_PACK_CAPTURED_SHIFT = 20
+_PACK_TERMINATION_SHIFT = 25
+_PACK_SQ_MASK = 0b1111111
+_PACK_KOMA_MASK = 0b11111
+
+TERMINATION_FROM_CODE: List[GameTermination] = list(CODE_FROM_TERMINATION)
 
 
 class Move:
@@ -32,16 +44,12 @@ class Move:
         return
 
     def __eq__(self, obj: Any) -> bool:
-        return (
-            isinstance(obj, Move)
-            and self.start_sq == obj.start_sq
-            and self.end_sq == obj.end_sq
-            and self.is_promotion == obj.is_promotion
-            and self.side == obj.side
-            and self.koma == obj.koma
-            and self.captured == obj.captured
-            and self.is_drop == obj.is_drop
-        )
+        # The packed move covers every component (side and is_drop are
+        # derived from koma and start_sq), so it doubles as the hash.
+        return isinstance(obj, Move) and self.pack() == obj.pack()
+
+    def __hash__(self) -> int:
+        return self.pack()
 
     def __str__(self) -> str:
         return self.to_text()
@@ -52,6 +60,25 @@ class Move:
     def is_pass(self) -> bool:
         return self.start_sq == self.end_sq
 
+    def pack(self) -> int:
+        """Return the move packed into one non-negative integer (fits
+        in 32 bits). Components, from the lowest bits, are:
+        - 7 bits for origin square (Square.HAND if a drop)
+        - 7 bits for destination square
+        - 1 bit for promotion
+        - 5 bits for the moving Koma
+        - 5 bits for the captured Koma
+        - termination code + 1, for game-terminating moves only
+        The null move packs to 0. See `unpack_move`.
+        """
+        return (
+            self.start_sq
+            | self.end_sq << _PACK_END_SQ_SHIFT
+            | self.is_promotion << _PACK_PROMOTION_SHIFT
+            | self.koma << _PACK_KOMA_SHIFT
+            | self.captured << _PACK_CAPTURED_SHIFT
+        )
+
     def to_text(self) -> str:
         """Return easily-parseable string representation of a Move.
         Components are:
@@ -114,6 +141,10 @@ class TerminationMove(Move):
         self.end = termination
         return
 
+    def pack(self) -> int:
+        code = CODE_FROM_TERMINATION[self.end] + 1
+        return super().pack() | code << _PACK_TERMINATION_SHIFT
+
     def to_text(self) -> str:
         return self.end.name
 
@@ -122,3 +153,19 @@ class TerminationMove(Move):
 
     def to_ja_kif(self, is_same: bool = False) -> str:
         return str(self.end.value)
+
+
+def unpack_move(packed: int) -> Move:
+    """Return the Move packed into an integer by `Move.pack`."""
+    if packed == 0:
+        return NullMove()
+    termination_code = packed >> _PACK_TERMINATION_SHIFT
+    if termination_code:
+        return TerminationMove(TERMINATION_FROM_CODE[termination_code - 1])
+    return Move(
+        start_sq=Square(packed & _PACK_SQ_MASK),
+        end_sq=Square(packed >> _PACK_END_SQ_SHIFT & _PACK_SQ_MASK),
+        is_promotion=bool(packed >> _PACK_PROMOTION_SHIFT & 1),
+        koma=Koma(packed >> _PACK_KOMA_SHIFT & _PACK_KOMA_MASK),
+        captured=Koma(packed >> _PACK_CAPTURED_SHIFT & _PACK_KOMA_MASK),
+    )
@@ -10,6 +10,11 @@ if TYPE_CHECKING:
     from tsumemi.src.shogi.move import Move
 
 
+# Header keys naming the players (handicap games use 下手/上手)
+SENTE_HEADER_KEYS = ("先手", "下手")
+GOTE_HEADER_KEYS = ("後手", "上手")
+
+
 class ParserVisitor:
     # the idea is that a kif_reader/sfen_reader/csa_reader can accept
     # the same visitor, which holds diff methods for diff readers.
@@ -28,6 +33,9 @@ class ParserVisitor:
     def visit_handicap(self, reader: Reader, handicap_sfen: str) -> None:
         pass
 
+    def visit_header(self, reader: Reader, key: str, value: str) -> None:
+        pass
+
     def visit_move(self, reader: Reader, move: Move) -> None:
         pass
 
@@ -48,6 +56,15 @@ class GameBuilderPVis(ParserVisitor):
         movetree.start_pos = handicap_sfen
         return
 
+    def visit_header(self, reader: Reader, key: str, value: str) -> None:
+        movetree = reader.game.movetree
+        movetree.headers[key] = value
+        if key in SENTE_HEADER_KEYS:
+            movetree.sente = value
+        elif key in GOTE_HEADER_KEYS:
+            movetree.gote = value
+        return
+
     def visit_move(self, reader: Reader, move: Move) -> None:
         game = reader.game
         game.add_move(move)
@@ -55,6 +72,11 @@ class GameBuilderPVis(ParserVisitor):
 
 
 class Reader:
+    """Base class for readers of game records. A reader holds the
+    game being read, so one reader must not be shared by concurrent
+    reads; readers are cheap to create.
+    """
+
     def __init__(self) -> None:
         self.game = Game()
         return
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import io
+
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.parsing.base_readers_visitors import GameBuilderPVis
+from tsumemi.src.shogi.parsing.csa_reader import CsaReader
+from tsumemi.src.shogi.parsing.kif import decode_kif
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import Generator
+    from typing import List
+    from tsumemi.src.shogi.game import Game
+
+    PathLike = str | os.PathLike[str]
+
+
+def read_csa(filepath: PathLike) -> Game | None:
+    """Read a CSA file and return the first game in it."""
+    with open(filepath, "rb") as _file:
+        data = _file.read()
+    return read_csa_bytes(data)
+
+
+def read_csa_bytes(data: bytes) -> Game | None:
+    """Read the raw contents of a CSA file and return the first game
+    in it, or None if the contents cannot be decoded. Safe to call
+    from several threads at once.
+    """
+    # CSA files are mostly ASCII; names may be UTF-8 or Shift-JIS
+    text = decode_kif(data)
+    if text is None:
+        return None
+    return CsaReader().read(io.StringIO(text), GameBuilderPVis())
+
+
+def read_csa_games(filepath: PathLike) -> Generator[Game, None, None]:
+    """Read a CSA file of several games separated by "/" lines, and
+    yield the games one at a time.
+    """
+    with open(filepath, "rb") as _file:
+        data = _file.read()
+    text = decode_kif(data)
+    if text is None:
+        return
+    lines: List[str] = []
+    for line in io.StringIO(text):
+        if line.startswith("/"):
+            if _has_statements(lines):
+                yield _read_csa_lines(lines)
+            lines = []
+        else:
+            lines.append(line)
+    if _has_statements(lines):
+        yield _read_csa_lines(lines)
+
+
+def _read_csa_lines(lines: List[str]) -> Game:
+    return CsaReader().read(io.StringIO("".join(lines)), GameBuilderPVis())
+
+
+def _has_statements(lines: List[str]) -> bool:
+    # Whether there is anything but blank lines and comments
+    return any(line.strip() and not line.startswith("'") for line in lines)
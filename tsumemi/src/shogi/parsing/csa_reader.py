@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.parsing.base_readers_visitors import Reader
+from tsumemi.src.shogi.basetypes import GameTermination, Koma, KomaType, Side
+from tsumemi.src.shogi.basetypes import HAND_TYPES
+from tsumemi.src.shogi.game import Game
+from tsumemi.src.shogi.move import Move, TerminationMove
+from tsumemi.src.shogi.parsing.kif_reader import SFEN_FROM_HANDICAP
+from tsumemi.src.shogi.square import Square
+
+if TYPE_CHECKING:
+    import typing
+    from typing import Dict
+    from tsumemi.src.shogi.parsing.base_readers_visitors import ParserVisitor
+
+
+# Iterating a flag enum skips composite members, so use __members__
+# (PROMOTED is an alias of OU there, so it maps to "OU" too)
+KTYPE_FROM_CSA: Dict[str, KomaType] = {
+    ktype.to_csa(): ktype
+    for ktype in KomaType.__members__.values()
+    if ktype != KomaType.NONE
+}
+# Board fields of P1-P9 lines, e.g. "+FU" or "-OU"; others are empty
+_KOMA_FROM_CSA_FIELD: Dict[str, Koma] = {
+    sign + csa: Koma.make(side, ktype)
+    for csa, ktype in KTYPE_FROM_CSA.items()
+    for sign, side in (("+", Side.SENTE), ("-", Side.GOTE))
+}
+
+# CSA header keys ($KEY:value) stored under their KIF names, so that
+# the same Game headers can be written in either format. Other keys
+# are stored as is, with the leading "$".
+KIF_HEADER_FROM_CSA: Dict[str, str] = {
+    "$EVENT": "棋戦",
+    "$SITE": "場所",
+    "$START_TIME": "開始日時",
+    "$END_TIME": "終了日時",
+    "$TIME_LIMIT": "持ち時間",
+    "$OPENING": "戦型",
+}
+
+# Terminations that do not depend on who is to move. %+ILLEGAL_ACTION
+# and %-ILLEGAL_ACTION are handled separately. Unknown terminations
+# (including %ERROR) are read as ABORT.
+TERMINATION_FROM_CSA: Dict[str, GameTermination] = {
+    "%TORYO": GameTermination.RESIGN,
+    "%CHUDAN": GameTermination.ABORT,
+    "%SENNICHITE": GameTermination.SENNICHITE,
+    "%TSUMI": GameTermination.MATE,
+    "%JISHOGI": GameTermination.JISHOGI,
+    "%TIME_UP": GameTermination.FLAG,
+    "%ILLEGAL_MOVE": GameTermination.ILLEGAL_LOSS,
+    "%KACHI": GameTermination.NYUUGYOKU,
+    "%HIKIWAKE": GameTermination.HIKIWAKE,
+    "%MATTA": GameTermination.MATTA,
+    "%FUZUMI": GameTermination.FUZUMI,
+}
+
+# Number of each piece type in a full set, for P+00AL/P-00AL
+_FULL_SET_COUNTS: Dict[KomaType, int] = {
+    KomaType.FU: 18,
+    KomaType.KY: 4,
+    KomaType.KE: 4,
+    KomaType.GI: 4,
+    KomaType.KI: 4,
+    KomaType.KA: 2,
+    KomaType.HI: 2,
+}
+
+
+class CsaReader(Reader):
+    """Reader for the CSA format. Reads one game per handle, stopping
+    at the "/" separating games of a multi-game file. CSA records have
+    no variations; the mainline is read.
+
+    All fields are fixed-width, so lines are read by slicing rather
+    than with regular expressions.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._is_position_set = False
+        return
+
+    def read(self, handle: typing.TextIO, visitor: ParserVisitor) -> Game:
+        """Read one game from the handle into a new Game and return
+        it. Games returned by earlier calls are left untouched.
+        """
+        self.game = Game()
+        self._is_position_set = False
+        for line in handle:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            if line[0] == "'":
+                visitor.visit_comment(self, line)
+                continue
+            if line[0] == "/":
+                break
+            if line[0] in ("+", "-", "%", "T"):
+                # Moves, terminations and times may share one line,
+                # separated by ","; other lines (e.g. headers) may
+                # contain "," in their values
+                for statement in line.split(","):
+                    self.read_statement(statement, visitor)
+            else:
+                self.read_statement(line, visitor)
+        self._set_start_position()
+        self.game.go_to_start()
+        return self.game
+
+    def read_statement(self, statement: str, visitor: ParserVisitor) -> None:
+        head = statement[:1]
+        if head in ("+", "-"):
+            if len(statement) == 1:
+                # Side to move; ends the starting position
+                self.game.position.turn = Side.SENTE if head == "+" else Side.GOTE
+                self._set_start_position()
+            else:
+                self._set_start_position()
+                visitor.visit_move(self, self.read_move(statement))
+        elif head == "%":
+            self._set_start_position()
+            visitor.visit_move(self, TerminationMove(self.read_termination(statement)))
+        elif head == "P":
+            self.read_position_line(statement)
+        elif head == "N" and statement[1:2] in ("+", "-"):
+            key = "先手" if statement[1] == "+" else "後手"
+            visitor.visit_header(self, key, statement[2:])
+        elif head == "$":
+            key, _, value = statement.partition(":")
+            visitor.visit_header(self, KIF_HEADER_FROM_CSA.get(key, key), value)
+        # Version ("V2.2"), time ("T12") and unknown lines are skipped
+
+    def read_move(self, statement: str) -> Move:
+        """Read a move such as "+7776FU" (origin 00 for drops)."""
+        if len(statement) < 7:
+            raise ValueError("CSA move too short: " + statement)
+        side = Side.SENTE if statement[0] == "+" else Side.GOTE
+        end_sq = _read_csa_square(statement[3:5])
+        try:
+            ktype = KTYPE_FROM_CSA[statement[5:7]]
+        except KeyError as exc:
+            raise ValueError("Unknown CSA piece in move: " + statement) from exc
+        if statement[1:3] == "00":
+            if ktype not in HAND_TYPES:
+                raise ValueError("Koma " + str(ktype) + " cannot be dropped")
+            return Move(Square.HAND, end_sq, koma=Koma.make(side, ktype))
+        start_sq = _read_csa_square(statement[1:3])
+        pos = self.game.position
+        koma = pos.get_koma(start_sq)
+        # CSA gives the piece after the move; a change means promotion
+        is_promotion = KomaType.get(koma) != ktype
+        if koma == Koma.NONE or (
+            is_promotion and KomaType.get(koma).promote() != ktype
+        ):
+            raise ValueError("CSA move does not match the position: " + statement)
+        return Move(start_sq, end_sq, is_promotion, koma, pos.get_koma(end_sq))
+
+    def read_termination(self, statement: str) -> GameTermination:
+        if statement in TERMINATION_FROM_CSA:
+            return TERMINATION_FROM_CSA[statement]
+        if statement in ("%+ILLEGAL_ACTION", "%-ILLEGAL_ACTION"):
+            offender = Side.SENTE if statement[1] == "+" else Side.GOTE
+            return (
+                GameTermination.ILLEGAL_LOSS
+                if offender == self.game.position.turn
+                else GameTermination.ILLEGAL_WIN
+            )
+        return GameTermination.ABORT
+
+    def read_position_line(self, statement: str) -> None:
+        """Read one line of the starting position: PI (even game,
+        optionally less some pieces), P1 to P9 (board rows) or P+/P-
+        (pieces for one side, on the board or in hand).
+        """
+        pos = self.game.position
+        kind = statement[1:2]
+        if kind == "I":
+            pos.from_sfen(SFEN_FROM_HANDICAP["平手"])
+            for i in range(2, len(statement) - 3, 4):
+                pos.set_koma(Koma.NONE, _read_csa_square(statement[i : i + 2]))
+        elif "1" <= kind <= "9":
+            row_num = int(kind)
+            for col_idx in range(9):
+                field = statement[2 + 3 * col_idx : 5 + 3 * col_idx]
+                sq = Square.from_cr(col_num=9 - col_idx, row_num=row_num)
+                pos.set_koma(_read_csa_koma(field), sq)
+        elif kind in ("+", "-"):
+            side = Side.SENTE if kind == "+" else Side.GOTE
+            for i in range(2, len(statement) - 3, 4):
+                sq_str = statement[i : i + 2]
+                koma_str = statement[i + 2 : i + 4]
+                if sq_str == "00" and koma_str == "AL":
+                    self._put_remaining_in_hand(side)
+                elif sq_str == "00":
+                    ktype = _read_csa_ktype(koma_str)
+                    pos.inc_hand_koma(side, ktype)
+                else:
+                    koma = Koma.make(side, _read_csa_ktype(koma_str))
+                    pos.set_koma(koma, _read_csa_square(sq_str))
+        else:
+            raise ValueError("Unknown CSA position line: " + statement)
+
+    def _put_remaining_in_hand(self, side: Side) -> None:
+        pos = self.game.position
+        counts = dict(_FULL_SET_COUNTS)
+        for koma, squares in pos.get_koma_sets().items():
+            ktype = KomaType.get(koma).unpromote()
+            if ktype in counts:
+                counts[ktype] -= len(squares)
+        for hand_side in (Side.SENTE, Side.GOTE):
+            for ktype in HAND_TYPES:
+                counts[ktype] -= pos.get_hand_koma_count(hand_side, ktype)
+        for ktype, count in counts.items():
+            if count > 0:
+                pos.set_hand_koma_count(
+                    side, ktype, pos.get_hand_koma_count(side, ktype) + count
+                )
+
+    def _set_start_position(self) -> None:
+        if self._is_position_set:
+            return
+        self.game.movetree.start_pos = self.game.position.to_sfen()
+        self._is_position_set = True
+
+
+def _read_csa_square(sq_str: str) -> Square:
+    if len(sq_str) != 2 or not ("1" <= sq_str[0] <= "9" and "1" <= sq_str[1] <= "9"):
+        raise ValueError("Invalid CSA square: " + sq_str)
+    return Square.from_cr(col_num=int(sq_str[0]), row_num=int(sq_str[1]))
+
+
+def _read_csa_ktype(ktype_str: str) -> KomaType:
+    try:
+        return KTYPE_FROM_CSA[ktype_str]
+    except KeyError as exc:
+        raise ValueError("Unknown CSA piece: " + ktype_str) from exc
+
+
+def _read_csa_koma(field: str) -> Koma:
+    # One 3-character board field, e.g. "+FU", "-OU" or " * "
+    koma = _KOMA_FROM_CSA_FIELD.get(field)
+    if koma is not None:
+        return koma
+    if field[:1] in ("+", "-"):
+        raise ValueError("Unknown CSA piece: " + field)
+    return Koma.NONE
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.basetypes import GameTermination, Koma, KomaType, Side
+from tsumemi.src.shogi.basetypes import HAND_TYPES
+from tsumemi.src.shogi.move import TerminationMove
+from tsumemi.src.shogi.parsing.csa_reader import (
+    KIF_HEADER_FROM_CSA,
+    TERMINATION_FROM_CSA,
+)
+from tsumemi.src.shogi.parsing.kif_reader import SFEN_FROM_HANDICAP
+from tsumemi.src.shogi.position import Position
+from tsumemi.src.shogi.square import Square
+
+if TYPE_CHECKING:
+    import typing
+    from collections.abc import Iterable, Iterator
+    from typing import Dict
+    from tsumemi.src.shogi.game import Game
+    from tsumemi.src.shogi.move import Move
+
+
+CSA_VERSION = "V2.2"
+CSA_HEADER_FROM_KIF: Dict[str, str] = {
+    kif_key: csa_key for csa_key, kif_key in KIF_HEADER_FROM_CSA.items()
+}
+CSA_FROM_TERMINATION: Dict[GameTermination, str] = {
+    term: csa for csa, term in TERMINATION_FROM_CSA.items()
+}
+
+
+def write_csa(game: Game, handle: typing.TextIO) -> None:
+    """Write the mainline of the game to the handle in CSA format, one
+    line at a time.
+    """
+    handle.writelines(line + "\n" for line in iter_csa_lines(game))
+
+
+def write_csa_games(games: Iterable[Game], handle: typing.TextIO) -> int:
+    """Write the games to the handle in CSA format, separated by "/"
+    lines, one game at a time. Returns the number of games written.
+    """
+    num_games = 0
+    for game in games:
+        if num_games:
+            handle.write("/\n")
+        write_csa(game, handle)
+        num_games += 1
+    return num_games
+
+
+def iter_csa_lines(game: Game) -> Iterator[str]:
+    """Yield the lines of the CSA record of the game's mainline,
+    without line endings.
+    """
+    movetree = game.movetree
+    yield CSA_VERSION
+    if movetree.sente:
+        yield "N+" + movetree.sente
+    if movetree.gote:
+        yield "N-" + movetree.gote
+    for key, value in movetree.headers.items():
+        if key in CSA_HEADER_FROM_KIF:
+            yield f"{CSA_HEADER_FROM_KIF[key]}:{value}"
+        elif key.startswith("$"):
+            yield f"{key}:{value}"
+    pos = Position()
+    pos.from_sfen(movetree.start_pos)
+    yield from _iter_csa_position_lines(pos)
+    yield "+" if pos.turn == Side.SENTE else "-"
+    turn = pos.turn
+    nodes = movetree.traverse_mainline()
+    next(nodes)  # exclude the root node
+    for node in nodes:
+        move = node.move
+        if isinstance(move, TerminationMove):
+            yield _write_csa_termination(move.end, turn)
+            break
+        yield write_csa_move(move)
+        turn = turn.switch()
+
+
+def write_csa_move(move: Move) -> str:
+    """Return the CSA form of a move, e.g. "+7776FU"."""
+    ktype = KomaType.get(move.koma)
+    if move.is_promotion:
+        ktype = ktype.promote()
+    sign = "+" if move.side == Side.SENTE else "-"
+    origin = "00" if move.is_drop else str(move.start_sq)
+    return f"{sign}{origin}{move.end_sq}{ktype.to_csa()}"
+
+
+def _write_csa_termination(termination: GameTermination, turn: Side) -> str:
+    if termination in CSA_FROM_TERMINATION:
+        return CSA_FROM_TERMINATION[termination]
+    if termination == GameTermination.ILLEGAL_WIN:
+        # The side that just moved acted illegally
+        return "%+ILLEGAL_ACTION" if turn == Side.GOTE else "%-ILLEGAL_ACTION"
+    return CSA_FROM_TERMINATION[GameTermination.ABORT]
+
+
+def _iter_csa_position_lines(pos: Position) -> Iterator[str]:
+    if pos.to_sfen() == _even_position_sfen(pos.turn):
+        yield "PI"
+        return
+    for row_num in range(1, 10):
+        fields = []
+        for col_num in range(9, 0, -1):
+            koma = pos.get_koma(Square.from_cr(col_num=col_num, row_num=row_num))
+            fields.append(_write_csa_koma(koma))
+        yield f"P{row_num}" + "".join(fields)
+    for side, sign in ((Side.SENTE, "+"), (Side.GOTE, "-")):
+        hand = "".join(
+            "00" + ktype.to_csa()
+            for ktype in HAND_TYPES
+            for _ in range(pos.get_hand_koma_count(side, ktype))
+        )
+        if hand:
+            yield f"P{sign}{hand}"
+
+
+def _even_position_sfen(turn: Side) -> str:
+    sfen = SFEN_FROM_HANDICAP["平手"]
+    return sfen if turn == Side.SENTE else sfen.replace(" b ", " w ")
+
+
+def _write_csa_koma(koma: Koma) -> str:
+    if koma == Koma.NONE:
+        return " * "
+    sign = "+" if koma.side() == Side.SENTE else "-"
+    return sign + KomaType.get(koma).to_csa()
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import io
+
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.parsing.base_readers_visitors import GameBuilderPVis
+from tsumemi.src.shogi.parsing.ki2_reader import Ki2Reader
+from tsumemi.src.shogi.parsing.kif import decode_kif
+
+if TYPE_CHECKING:
+    import os
+    from tsumemi.src.shogi.game import Game
+
+    PathLike = str | os.PathLike[str]
+
+
+def read_ki2(filepath: PathLike) -> Game | None:
+    """Read a KI2 file and return the complete game."""
+    with open(filepath, "rb") as _file:
+        data = _file.read()
+    return read_ki2_bytes(data)
+
+
+def read_ki2_bytes(data: bytes) -> Game | None:
+    """Read the raw contents of a KI2 file and return the complete
+    game, or None if the contents cannot be decoded. Safe to call from
+    several threads at once.
+    """
+    # KI2 files are encoded like KIF files
+    text = decode_kif(data)
+    if text is None:
+        return None
+    return Ki2Reader().read(io.StringIO(text), GameBuilderPVis())
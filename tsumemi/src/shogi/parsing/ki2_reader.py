@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi import rules
+from tsumemi.src.shogi.basetypes import GameTermination, KomaType, Side
+from tsumemi.src.shogi.basetypes import HAND_TYPES, KTYPE_FROM_KANJI
+from tsumemi.src.shogi.move import Move, TerminationMove
+from tsumemi.src.shogi.parsing.kif_reader import KifReader
+from tsumemi.src.shogi.square import KanjiNumber, Square
+
+if TYPE_CHECKING:
+    import typing
+    from typing import Dict, List, Tuple
+    from tsumemi.src.shogi.game import Game
+    from tsumemi.src.shogi.parsing.base_readers_visitors import ParserVisitor
+    from tsumemi.src.shogi.position import Position
+
+
+SIDE_FROM_KI2_MARK: Dict[str, Side] = {
+    "▲": Side.SENTE,
+    "☗": Side.SENTE,
+    "△": Side.GOTE,
+    "▽": Side.GOTE,
+    "☖": Side.GOTE,
+}
+
+
+# e.g. "▲７六歩", "△同　銀右", "▲２二角成", "▲７七桂左上", "▲５五角打"
+KI2_MOVE_REGEX: re.Pattern[str] = re.compile(
+    r"(?P<side>[▲☗△▽☖])"
+    r"(?P<sq_dest>同[　 ]?|[1-9１-９][一二三四五六七八九])"
+    r"(?P<koma>成[香桂銀]|[歩香桂銀金角飛玉王と龍竜馬全圭杏])"
+    r"(?P<modifiers>[右左中]?[直上引寄]?)"
+    r"(?P<drop_prom>打|成|不成)?"
+)
+
+
+# The result line ending a KI2 game, e.g. "まで64手で先手の勝ち", read
+# into the termination move a KIF file would have. Checked in order.
+KI2_TERMINATION_KEYWORDS: Tuple[Tuple[str, GameTermination], ...] = (
+    ("時間切れ", GameTermination.FLAG),
+    ("反則勝ち", GameTermination.ILLEGAL_WIN),
+    ("反則負け", GameTermination.ILLEGAL_LOSS),
+    ("入玉勝ち", GameTermination.NYUUGYOKU),
+    ("中断", GameTermination.ABORT),
+    ("千日手", GameTermination.SENNICHITE),
+    ("持将棋", GameTermination.JISHOGI),
+    ("詰み", GameTermination.MATE),
+    ("勝ち", GameTermination.RESIGN),
+)
+
+
+_GENERAL_TYPES = frozenset(
+    (
+        KomaType.GI,
+        KomaType.KI,
+        KomaType.TO,
+        KomaType.NY,
+        KomaType.NK,
+        KomaType.NG,
+    )
+)
+_FULL_WIDTH_DIGITS = str.maketrans("１２３４５６７８９", "123456789")
+
+
+class Ki2Reader(KifReader):
+    """Reader for the KI2 format. KI2 moves give only the destination
+    and the moving piece, plus relative-position modifiers when that is
+    ambiguous, so each move is resolved against the current position.
+    Headers, BOD diagrams and variations are read as in KIF.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        return
+
+    def read(self, handle: typing.TextIO, visitor: ParserVisitor) -> Game:
+        """Read one game from the handle into a new Game and return
+        it. Games returned by earlier calls are left untouched.
+        """
+        self._new_game()
+        line = handle.readline()
+        while line != "":
+            line = line.strip()
+            if line == "":
+                pass
+            elif line[0] in SIDE_FROM_KI2_MARK:
+                # Several moves to a line, e.g. "▲７六歩    △３四歩"
+                self.read_move_line(line, visitor)
+            elif line.startswith("まで"):
+                termination = read_ki2_termination(line)
+                if termination is not None:
+                    self._visit_move(visitor, TerminationMove(termination))
+            elif line.startswith("手合割："):
+                visitor.visit_handicap(self, self.read_handicap_line(line))
+            elif line.startswith(("後手の持駒：", "上手の持駒：")):
+                # Signals start of BOD, read all of it
+                bod_lines = [line]
+                while not line.startswith(("先手の持駒：", "下手の持駒：")) and line:
+                    line = handle.readline()
+                    bod_lines.append(line.strip())
+                self.read_bod(bod_lines)
+            elif line.startswith("*"):
+                visitor.visit_comment(self, line)
+            elif line.startswith("#"):
+                visitor.visit_escape(self, line)
+            elif line.startswith("変化："):
+                self.read_variation(line)
+            elif "：" in line:
+                key, _, value = line.partition("：")
+                visitor.visit_header(self, key, value)
+            line = handle.readline()
+        self.game.go_to_start()
+        return self.game
+
+    def read_move_line(self, line: str, visitor: ParserVisitor) -> None:
+        """Read and visit every move on a line of moves in turn. The
+        visitor must make each move on the reader's game, as later
+        moves are resolved against the position it leaves.
+        """
+        end = 0
+        for move_match in KI2_MOVE_REGEX.finditer(line):
+            if line[end : move_match.start()].strip():
+                raise ValueError("Unreadable KI2 move in line: " + line)
+            end = move_match.end()
+            self._visit_move(visitor, self.read_move_match(move_match))
+        if line[end:].strip():
+            raise ValueError("Unreadable KI2 move in line: " + line)
+
+    def read_move_match(self, move_match: re.Match[str]) -> Move:
+        game = self.game
+        prev_end_sq = (
+            Square.NONE if game.curr_node.move.is_null()
+            else game.curr_node.move.end_sq
+        )
+        return read_ki2_move(game.position, move_match, prev_end_sq)
+
+
+def read_ki2_termination(line: str) -> GameTermination | None:
+    """Read a result line such as "まで64手で先手の勝ち". Returns None
+    if the result is not one that a termination move records.
+    """
+    result = line.partition("手で")[2]
+    for keyword, termination in KI2_TERMINATION_KEYWORDS:
+        if keyword in result:
+            return termination
+    return None
+
+
+def parse_ki2_move(
+    pos: Position, movestr: str, prev_end_sq: Square = Square.NONE
+) -> Move:
+    """Resolve one KI2 move, e.g. "▲３五銀右", in the position."""
+    move_match = KI2_MOVE_REGEX.fullmatch(movestr)
+    if move_match is None:
+        raise ValueError("KI2 move regex failed to match movestr: " + movestr)
+    return read_ki2_move(pos, move_match, prev_end_sq)
+
+
+def read_ki2_move(
+    pos: Position, move_match: re.Match[str], prev_end_sq: Square
+) -> Move:
+    side = SIDE_FROM_KI2_MARK[move_match.group("side")]
+    end_sq = _read_ki2_dest_sq(move_match.group("sq_dest"), prev_end_sq)
+    ktype = _read_ki2_komatype(move_match.group("koma"))
+    modifiers = move_match.group("modifiers")
+    drop_prom = move_match.group("drop_prom")
+    if drop_prom == "打":
+        return _create_ki2_drop(pos, side, ktype, end_sq)
+    start_sqs = rules.get_attacking_squares(pos, side, ktype, end_sq)
+    if not start_sqs:
+        # 打 is only written when a piece on the board could also
+        # move there
+        if drop_prom is None and ktype in HAND_TYPES and (
+            pos.get_hand_koma_count(side, ktype) > 0
+        ):
+            return _create_ki2_drop(pos, side, ktype, end_sq)
+        raise ValueError("No koma can make KI2 move: " + move_match.group())
+    is_promotion = drop_prom == "成"
+    moves = [pos.create_move(start_sq, end_sq, is_promotion) for start_sq in start_sqs]
+    if len(moves) > 1:
+        moves = _disambiguate_ki2_moves(
+            pos, moves, modifiers, has_promotion=drop_prom is not None
+        )
+    if len(moves) != 1:
+        raise ValueError("Ambiguous KI2 move: " + move_match.group())
+    return moves[0]
+
+
+def _create_ki2_drop(
+    pos: Position, side: Side, ktype: KomaType, end_sq: Square
+) -> Move:
+    if ktype not in HAND_TYPES:
+        raise ValueError("Koma " + str(ktype) + " cannot be dropped")
+    return pos.create_drop_move(side, ktype, end_sq)
+
+
+def _disambiguate_ki2_moves(
+    pos: Position, moves: List[Move], modifiers: str, has_promotion: bool
+) -> List[Move]:
+    # The reverse of _disambiguate_japanese_move in the move writers:
+    # only legal moves that agree on whether they may promote are told
+    # apart, first by direction of motion and then left to right.
+    same_promotion = [
+        move for move in moves if rules.can_be_promotion(move) == has_promotion
+    ]
+    # Older files may leave out 不成; keep every move rather than none
+    if same_promotion:
+        moves = same_promotion
+    moves = [move for move in moves if rules.is_legal(move, pos)]
+    if len(moves) <= 1 or not modifiers:
+        return moves
+    side = moves[0].side
+    end_sq = moves[0].end_sq
+    is_general = KomaType.get(moves[0].koma) in _GENERAL_TYPES
+    motion = modifiers[-1]
+    if motion == "直":
+        return [
+            move for move in moves
+            if end_sq.is_immediately_forward_of(move.start_sq, side)
+        ]
+    if motion == "上":
+        moves = [
+            move for move in moves
+            if end_sq.is_forward_of(move.start_sq, side) and not (
+                is_general and end_sq.is_immediately_forward_of(move.start_sq, side)
+            )
+        ]
+    elif motion == "引":
+        moves = [move for move in moves if end_sq.is_backward_of(move.start_sq, side)]
+    elif motion == "寄":
+        moves = [move for move in moves if end_sq.is_same_row(move.start_sq)]
+    position = modifiers[0]
+    if len(moves) <= 1 or position not in "左右中":
+        return moves
+    leftmost = [
+        move for move in moves
+        if all(
+            move.start_sq.is_left_of(other.start_sq, side)
+            for other in moves if other is not move
+        )
+    ]
+    rightmost = [
+        move for move in moves
+        if all(
+            move.start_sq.is_right_of(other.start_sq, side)
+            for other in moves if other is not move
+        )
+    ]
+    if position == "左":
+        return leftmost
+    if position == "右":
+        return rightmost
+    return [move for move in moves if move not in leftmost and move not in rightmost]
+
+
+def _read_ki2_dest_sq(dest_str: str, sq_prev: Square) -> Square:
+    if dest_str[0] == "同":
+        if sq_prev == Square.NONE:
+            raise ValueError("No last move specified for same destination square.")
+        return sq_prev
+    col = int(dest_str[0].translate(_FULL_WIDTH_DIGITS))
+    row = int(KanjiNumber[dest_str[1]])
+    return Square.from_cr(col, row)
+
+
+def _read_ki2_komatype(koma_str: str) -> KomaType:
+    if koma_str[0] == "成":
+        return KTYPE_FROM_KANJI[koma_str[1]].promote()
+    return KTYPE_FROM_KANJI[koma_str]
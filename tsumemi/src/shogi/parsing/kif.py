@@ -1,36 +1,261 @@
 from __future__ import annotations
 
+import codecs
+import io
+import re
+
 from typing import TYPE_CHECKING
 
 from tsumemi.src.shogi.parsing.base_readers_visitors import GameBuilderPVis
+from tsumemi.src.shogi.basetypes import GameTermination
 from tsumemi.src.shogi.game import Game
 from tsumemi.src.shogi.parsing.kif_reader import KifReader
 
 if TYPE_CHECKING:
     import os
+    from typing import BinaryIO, Dict, Generator, List, Tuple
 
     PathLike = str | os.PathLike[str]
 
 
+# e.g. "#KIF version=2.0 encoding=UTF-8"
+KIF_ENCODING_HEADER_REGEX: re.Pattern[bytes] = re.compile(
+    rb"^#KIF[^\r\n]*encoding=(?P<encoding>[\w-]+)", re.MULTILINE
+)
+KIF_HEADER_SEARCH_LENGTH = 1024
+# Bytes read from the start of a collection file to guess its encoding
+KIF_ENCODING_SAMPLE_LENGTH = 8192
+
+_TERMINATION_STRS = frozenset(term.value for term in GameTermination)
+
+
 def read_kif(filepath: PathLike) -> Game | None:
     """Read a KIF file and return the complete game."""
-    encodings = ["cp932", "utf-8"]
-    visitor = GAME_BUILDER_PVIS
-    reader = KIF_READER
-    game = None
+    with open(filepath, "rb") as _file:
+        data = _file.read()
+    return read_kif_bytes(data)
+
+
+def read_kif_bytes(data: bytes) -> Game | None:
+    """Read the raw contents of a KIF file and return the complete
+    game, or None if the contents cannot be decoded.
+
+    Every call uses its own reader and returns a new Game, so this is
+    safe to call from several threads at once.
+    """
+    text = decode_kif(data)
+    if text is None:
+        return None
+    return KifReader().read(io.StringIO(text), GameBuilderPVis())
+
+
+def read_kif_collection(filepath: PathLike) -> Generator[Game, None, None]:
+    """Read a file holding several KIF games one after another, and
+    yield the games one at a time. Only one game is held in memory at
+    a time. Games that fail to parse are skipped.
+    """
+    with open(filepath, "rb") as handle:
+        encoding = _detect_stream_encoding(handle)
+        for _, lines in _split_kif_collection(handle, encoding):
+            game = _read_kif_lines(lines)
+            if game is not None:
+                yield game
+
+
+def index_kif_collection(filepath: PathLike) -> List[int]:
+    """Return the byte offsets at which each game of a KIF collection
+    file starts, for use with `read_kif_at`. No moves are parsed.
+    """
+    with open(filepath, "rb") as handle:
+        encoding = _detect_stream_encoding(handle)
+        return [offset for offset, _ in _split_kif_collection(handle, encoding)]
+
+
+def read_kif_at(filepath: PathLike, offset: int) -> Game | None:
+    """Read the one game starting at the byte offset of a KIF
+    collection file, as found by `index_kif_collection`. Returns None
+    if it cannot be decoded or parsed.
+    """
+    with open(filepath, "rb") as handle:
+        encoding = _detect_stream_encoding(handle)
+        handle.seek(offset)
+        for _, lines in _split_kif_collection(handle, encoding):
+            return _read_kif_lines(lines)
+    return None
+
+
+def _read_kif_lines(lines: List[str]) -> Game | None:
+    try:
+        return KifReader().read(io.StringIO("".join(lines)), GameBuilderPVis())
+    except (KeyError, ValueError):
+        return None
+
+
+def _detect_stream_encoding(handle: BinaryIO) -> str:
+    # Encoding of a file too large to decode whole, from a sample at
+    # the start; see `decode_kif`. Leaves the handle at the start.
+    start = handle.tell()
+    handle.seek(0)
+    sample = handle.read(KIF_ENCODING_SAMPLE_LENGTH)
+    handle.seek(start)
+    declared_encoding = detect_kif_encoding(sample)
+    if declared_encoding is not None:
+        return declared_encoding
+    try:
+        # The sample may end partway through a character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return "cp932"
+    return "utf-8"
+
+
+def _split_kif_collection(
+    handle: BinaryIO, encoding: str
+) -> Generator[Tuple[int, List[str]], None, None]:
+    # Yield (byte offset, decoded lines) of each game from the current
+    # position of the handle. A game ends where a header line follows
+    # its moves. Splitting raw lines at b"\n" is safe for both UTF-8
+    # and Shift-JIS, neither of which uses that byte inside a character.
+    offset = handle.tell()
+    game_offset = offset
+    lines: List[str] = []
+    has_moves = False
+    for raw_line in handle:
+        line = raw_line.decode(encoding, errors="replace")
+        stripped = line.strip()
+        if stripped:
+            first = stripped[0]
+            if "0" <= first <= "9":
+                has_moves = True
+            elif has_moves and _is_kif_header_line(stripped):
+                yield game_offset, lines
+                game_offset = offset
+                lines = []
+                has_moves = False
+        lines.append(line)
+        offset += len(raw_line)
+    if lines and any(line.strip() for line in lines):
+        yield game_offset, lines
+
+
+def _is_kif_header_line(line: str) -> bool:
+    if line.startswith("#"):
+        return True
+    return "：" in line and not line.startswith(("*", "変化："))
+
+
+def decode_kif(data: bytes) -> str | None:
+    """Decode the raw contents of a KIF file in one pass. The encoding
+    is taken from a byte order mark or an encoding header if there is
+    one. Otherwise the data is decoded as UTF-8 if it is valid UTF-8,
+    and as cp932 (Shift-JIS) if not. Returns None if decoding fails.
+    """
+    declared_encoding = detect_kif_encoding(data)
+    # Shift-JIS text is almost never valid UTF-8, while UTF-8 text can
+    # happen to be valid cp932, so UTF-8 must be tried first.
+    encodings = ["utf-8", "cp932"]
+    if declared_encoding is not None:
+        encodings.insert(0, declared_encoding)
     for enc in encodings:
         try:
-            with open(filepath, "r", encoding=enc) as _file:
-                game = reader.read(_file, visitor)
+            return data.decode(enc)
         except UnicodeDecodeError:
             pass
-        else:
-            break
-    return game
+    return None
+
+
+def detect_kif_encoding(data: bytes) -> str | None:
+    """Identify the encoding of the raw contents of a KIF file from a
+    byte order mark or an encoding header, if there is either.
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    header_match = KIF_ENCODING_HEADER_REGEX.search(data, 0, KIF_HEADER_SEARCH_LENGTH)
+    if header_match is None:
+        return None
+    encoding = header_match.group("encoding").decode("ascii")
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return None
+
 
+class KifSummary:
+    """Header fields and mainline length of a KIF file, as found by
+    `scan_kif` without building a game. `num_moves` excludes the
+    termination move, and is None if moves were not counted.
+    """
 
-# Since these are essentially just collections of methods a single
-# instance suffices for speed. (Actually, are classes even needed for
-# polymorphism?)
-KIF_READER = KifReader()
-GAME_BUILDER_PVIS = GameBuilderPVis()
+    def __init__(
+        self,
+        filepath: PathLike,
+        headers: Dict[str, str],
+        num_moves: int | None,
+        error: str | None = None,
+    ) -> None:
+        self.filepath: PathLike = filepath
+        self.headers: Dict[str, str] = headers
+        self.num_moves: int | None = num_moves
+        self.error: str | None = error
+
+    @property
+    def handicap(self) -> str:
+        return self.headers.get("手合割", "")
+
+    @property
+    def title(self) -> str:
+        return self.headers.get("表題", "") or self.headers.get("作品名", "")
+
+    @property
+    def author(self) -> str:
+        return self.headers.get("作者", "")
+
+
+def scan_kif(filepath: PathLike, count_moves: bool = True) -> KifSummary:
+    """Read only the header fields of a KIF file, and count the moves
+    of its mainline without parsing them if `count_moves` is set. Much
+    faster than `read_kif`. Never raises; if the file cannot be read,
+    `error` of the returned summary says why.
+    """
+    try:
+        with open(filepath, "rb") as _file:
+            data = _file.read()
+    except OSError as exc:
+        return KifSummary(filepath, {}, None, error=str(exc))
+    text = decode_kif(data)
+    if text is None:
+        return KifSummary(filepath, {}, None, error="Could not decode file")
+    headers, num_moves = scan_kif_text(text, count_moves)
+    return KifSummary(filepath, headers, num_moves)
+
+
+def scan_kif_text(
+    text: str, count_moves: bool = True
+) -> tuple[Dict[str, str], int | None]:
+    """Return the header fields and mainline move count of the text
+    of a KIF file. See `scan_kif`.
+    """
+    headers: Dict[str, str] = {}
+    num_moves = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        first = line[0]
+        if "0" <= first <= "9":
+            # Move line, e.g. "1 ５三銀打 (00:00 / 00:00:00)"
+            if not count_moves:
+                return headers, None
+            parts = line.split(None, 2)
+            if len(parts) > 1 and parts[1] not in _TERMINATION_STRS:
+                num_moves += 1
+        elif line.startswith("変化："):
+            # Variations come after the mainline
+            break
+        elif first in "#*|+" or "：" not in line:
+            continue
+        else:
+            key, _, value = line.partition("：")
+            if not key.endswith("の持駒"):
+                headers[key] = value
+    return headers, num_moves if count_moves else None
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import re
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, TypeVar
 
 from tsumemi.src.shogi.parsing.base_readers_visitors import ParserVisitor, Reader
 from tsumemi.src.shogi.basetypes import GameTermination, Koma
@@ -9,14 +9,17 @@ from tsumemi.src.shogi.basetypes import Side
 from tsumemi.src.shogi.basetypes import HAND_TYPES, KTYPE_FROM_KANJI
 from tsumemi.src.shogi.game import Game
 from tsumemi.src.shogi.move import Move, TerminationMove
-from tsumemi.src.shogi.square import KanjiNumber, Square
+from tsumemi.src.shogi.square import FULL_WIDTH_NUMBER, KanjiNumber, Square
 
 if TYPE_CHECKING:
     import typing
-    from typing import Dict, Generator, List, Sequence, Tuple
+    from typing import Dict, List, Sequence, Tuple
     from tsumemi.src.shogi.basetypes import KomaType
+    from tsumemi.src.shogi.gametree import MoveNode
+    from tsumemi.src.shogi.position import PositionSnapshot
 
 
+_T = TypeVar("_T")
 # May be common to other formats than just KIF
 SFEN_FROM_HANDICAP: Dict[str, str] = {
     "平手": "lnsgkgsnl/1r5b1/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/LNSGKGSNL b - 1",
@@ -36,75 +39,123 @@ SFEN_FROM_HANDICAP: Dict[str, str] = {
 }
 
 
-KIF_MOVELINE_REGEX: re.Pattern[str] = re.compile(
-    r"(?P<movenum>\d*)"
-    r"\s*"
-    r"(?P<move>[　\S]+)"
-    r"\s*"
-    r"(?:\(\s*"
-    r"(?P<movetime>\d+:\d{2})"
-    r"\s*/\s*"
-    r"(?P<totaltime>\d+:\d{2}:\d{2})"
-    r"\s*\))?"
+# Moves and squares are decoded by direct lookups in these tables. A
+# destination is a column digit (usually full-width) and a kanji row,
+# e.g. "７六"; an origin is two ASCII digits, e.g. "77".
+SQUARE_FROM_KIF_DEST: Dict[str, Square] = {
+    col_str + row_kanji.name: Square.from_cr(col_num, row_kanji)
+    for col_num in range(1, 10)
+    for col_str in (str(col_num), FULL_WIDTH_NUMBER[col_num])
+    for row_kanji in KanjiNumber
+    if row_kanji <= 9
+}
+SQUARE_FROM_KIF_ORIGIN: Dict[str, Square] = {
+    str(sq): sq for sq in Square if sq.is_board()
+}
+# Koma names as written in moves, e.g. "歩", "と" or "成銀"
+KTYPE_FROM_KIF_KOMA: Dict[str, KomaType] = {
+    **{kanji: ktype for kanji, ktype in KTYPE_FROM_KANJI.items() if ktype},
+    **{"成" + kanji: KTYPE_FROM_KANJI[kanji].promote() for kanji in "香桂銀"},
+}
+KOMA_FROM_SIDE_KTYPE: Dict[Tuple[Side, KomaType], Koma] = {
+    (side, ktype): Koma.make(side, ktype)
+    for side in (Side.SENTE, Side.GOTE)
+    for ktype in KTYPE_FROM_KIF_KOMA.values()
+}
+# Squares of a BOD board row, e.g. "v香" or " ・"
+KOMA_FROM_BOD_CELL: Dict[str, Koma] = {
+    ("v" if side == Side.GOTE else " ") + kanji: Koma.make(side, ktype)
+    for kanji, ktype in KTYPE_FROM_KANJI.items()
+    for side in (Side.SENTE, Side.GOTE)
+}
+# Squares of each BOD board row, left (column 9) to right
+_BOD_ROW_SQUARES: Tuple[Tuple[Square, ...], ...] = tuple(
+    tuple(Square.from_cr(col_num, row_num) for col_num in range(9, 0, -1))
+    for row_num in range(1, 10)
 )
+_TERMINATION_FROM_STR: Dict[str, GameTermination] = {
+    term.value: term for term in GameTermination
+}
 
+# Kinds of line, told apart by their first character. Lines starting
+# with any other character are header fields if they contain "：", and
+# are skipped otherwise.
+_LINE_MOVE = 1
+_LINE_COMMENT = 2
+_LINE_ESCAPE = 3
+_LINE_VARIATION = 4
+_LINE_HANDICAP_OR_MOVESECTION = 5
+_LINE_BOD = 6
+_LINE_KIND_FROM_FIRST_CHAR: Dict[str, int] = {
+    **dict.fromkeys("0123456789", _LINE_MOVE),
+    "*": _LINE_COMMENT,
+    "#": _LINE_ESCAPE,
+    "変": _LINE_VARIATION,
+    "手": _LINE_HANDICAP_OR_MOVESECTION,
+    "後": _LINE_BOD,
+}
 
-KIF_MOVE_REGEX: re.Pattern[str] = re.compile(
-    r"(?P<sq_dest>(?:(?:同　)|(?:\d[一二三四五六七八九])))"
-    r"(?P<koma>成?[歩香桂銀金角飛玉と龍竜馬全圭杏])"
-    r"(?P<drop_prom>[打成])?"
-    r"(?:\((?P<sq_origin>\d{2})\))?"
-)
 
+class KifReader(Reader):
+    """Reader for the KIF format. Lines are classified by their first
+    character through a lookup table, and moves are decoded field by
+    field with direct character lookups rather than regexes.
 
-KIF_VARIATION_REGEX: re.Pattern[str] = re.compile(
-    r"変化：(?P<movenum>\d+)手"
-)
+    While reading, the reader keeps the nodes of the line being read,
+    one per ply, and a snapshot of its position every
+    `snapshot_interval` plies. A variation jumps straight to its branch
+    node and rebuilds the position from the nearest snapshot, so the
+    cost of starting a variation does not grow with the game length.
+    """
 
+    snapshot_interval: int = 8
 
-class KifReader(Reader):
     def __init__(self) -> None:
         super().__init__()
+        self._line_nodes: List[MoveNode] = [self.game.movetree]
+        self._line_snapshots: List[PositionSnapshot] = []
         return
 
     def read(self, handle: typing.TextIO, visitor: ParserVisitor) -> Game:
-        self.game.reset()
-        line = handle.readline()
-        while line != "":
-            line = line.lstrip().rstrip()
-            if line == "":
-                pass
-            elif line.startswith("手合割："):
-                handicap_sfen = self.read_handicap_line(line)
-                visitor.visit_handicap(self, handicap_sfen)
-            elif line.startswith("後手の持駒："):
-                # Signals start of BOD, read all of it
-                bod_lines = [line]
-                while (not line.startswith("先手の持駒：")) and line:
-                    line = handle.readline()
-                    bod_lines.append(line.lstrip().rstrip())
-                self.read_bod(bod_lines)
-                #visitor.visit_board(self, bod_lines)
-            elif line.startswith("手数--"):
-                # movesection delineation
-                pass
-            elif line[0].isdigit():
-                # Signals a move; thus, requires moves to be numbered.
-                move = self.read_move(line)
-                visitor.visit_move(self, move)
-            elif line.startswith("*"):
+        """Read one game from the handle into a new Game and return
+        it. Games returned by earlier calls are left untouched.
+        """
+        self._new_game()
+        lines = iter(handle)
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            kind = _LINE_KIND_FROM_FIRST_CHAR.get(line[0])
+            if kind == _LINE_MOVE:
+                # Moves must be numbered
+                self._visit_move(visitor, self.read_move(line))
+            elif kind == _LINE_COMMENT:
                 visitor.visit_comment(self, line)
-            elif line.startswith("#"):
+            elif kind == _LINE_ESCAPE:
                 visitor.visit_escape(self, line)
-            elif line.startswith("変化："):
-                # Variation
+            elif kind == _LINE_VARIATION and line.startswith("変化："):
                 self.read_variation(line)
-                # visitor.visit_variation(self, line)
-            else:
-                # Unknown line; skip it
+            elif kind == _LINE_HANDICAP_OR_MOVESECTION and line.startswith("手数--"):
+                # movesection delineation
                 pass
-            # MUST fallthrough to here to complete one while iteration
-            line = handle.readline()
+            elif kind == _LINE_HANDICAP_OR_MOVESECTION and line[:4] == "手合割：":
+                visitor.visit_handicap(self, self.read_handicap_line(line))
+            elif kind == _LINE_BOD and line.startswith("後手の持駒："):
+                # Signals start of BOD, read all of it
+                bod_lines = [line]
+                while not line.startswith("先手の持駒："):
+                    line = next(lines, "")
+                    if not line:
+                        break
+                    line = line.strip()
+                    bod_lines.append(line)
+                self.read_bod(bod_lines)
+            elif "：" in line:
+                # Other header field, e.g. 先手：name
+                key, _, value = line.partition("：")
+                visitor.visit_header(self, key, value)
+            # Anything else is an unknown line; skip it
         self.game.go_to_start()
         return self.game
 
@@ -135,53 +186,110 @@ class KifReader(Reader):
             pos.set_hand_koma_count(Side.GOTE, ktype, count)
         for ktype, count in _read_bod_hand(line_sente_hand):
             pos.set_hand_koma_count(Side.SENTE, ktype, count)
-        # Board
-        for row_idx, line_rank in enumerate(lines_board):
-            for col_idx, koma in enumerate(_read_bod_row(line_rank)):
-                pos.set_koma(
-                    koma, Square.from_cr(col_num=9-col_idx, row_num=row_idx+1)
-                )
+        # Board; the diagram replaces the whole board, so only the
+        # occupied squares need setting
+        pos.board.reset()
+        for row_squares, line_rank in zip(_BOD_ROW_SQUARES, lines_board):
+            for sq, koma in zip(row_squares, _read_bod_row(line_rank)):
+                if koma != Koma.NONE:
+                    pos.set_koma(koma, sq)
         movetree.start_pos = pos.to_sfen()
         return
 
     def read_move(self, line: str) -> Move:
+        """Read a numbered move line, e.g.
+        "  35 同　歩(87)        ( 0:19/00:07:09)".
+        """
+        movenum, movestr = _read_kif_move_line(line)
+        termination = _TERMINATION_FROM_STR.get(movestr)
+        if termination is not None:
+            return TerminationMove(termination)
         game = self.game
-        movenum, movestr, _, _ = _read_kif_move_line(line)
-        # Identify move components
-        if movestr in GameTermination:
-            return TerminationMove(GameTermination(movestr))
-        dest_str, koma_str, drop_prom, sq_origin = _read_kif_move(movestr)
-        prev_end_sq = (
-            Square.NONE if game.curr_node.move.is_null()
-            else game.curr_node.move.end_sq
-        )
-        end_sq = _read_kif_dest_sq(dest_str, prev_end_sq)
-        captured = game.position.get_koma(end_sq)
-        ktype = _read_kif_komatype(koma_str)
-        is_drop = (drop_prom == "打")
-        if is_drop and ktype not in HAND_TYPES:
-            raise ValueError("Koma " + str(ktype) + " cannot be dropped")
-        start_sq = _read_kif_origin_sq(sq_origin, is_drop)
-        is_promotion = (drop_prom == "成")
+        # Destination
+        if movestr[0] == "同":
+            end_sq = game.curr_node.move.end_sq
+            if game.curr_node.move.is_null() or end_sq == Square.NONE:
+                raise ValueError("No last move specified for same destination square.")
+            idx = 2 if movestr[1:2] == "　" else 1
+        else:
+            end_sq = _lookup(SQUARE_FROM_KIF_DEST, movestr[0:2], movestr)
+            idx = 2
+        # Koma
+        if movestr[idx : idx + 1] == "成":
+            ktype = _lookup(KTYPE_FROM_KIF_KOMA, movestr[idx : idx + 2], movestr)
+            idx += 2
+        else:
+            ktype = _lookup(KTYPE_FROM_KIF_KOMA, movestr[idx : idx + 1], movestr)
+            idx += 1
+        # Drop or promotion, then origin
+        suffix = movestr[idx:]
+        is_promotion = False
+        if suffix.startswith("打"):
+            if ktype not in HAND_TYPES:
+                raise ValueError("Koma " + str(ktype) + " cannot be dropped")
+            start_sq = Square.HAND
+        else:
+            if suffix.startswith("成"):
+                is_promotion = True
+                suffix = suffix[1:]
+            elif suffix.startswith("不成"):
+                suffix = suffix[2:]
+            if suffix[0:1] != "(" or suffix[3:4] != ")":
+                raise ValueError("KIF move has no origin square: " + movestr)
+            start_sq = _lookup(SQUARE_FROM_KIF_ORIGIN, suffix[1:3], movestr)
         # Construct Move
         side = Side.SENTE if (movenum % 2 == 1) else Side.GOTE
-        koma = Koma.make(side, ktype)
+        koma = KOMA_FROM_SIDE_KTYPE[side, ktype]
+        captured = game.position.get_koma(end_sq)
         return Move(start_sq, end_sq, is_promotion, koma, captured)
 
     def read_variation(self, line: str) -> None:
+        """Go to the node before the move the variation replaces, e.g.
+        to move 34 for "変化：35手", so the variation's moves are added
+        as alternatives to it.
+        """
         game = self.game
-        line_match = re.match(KIF_VARIATION_REGEX, line)
-        if line_match is None:
-            raise ValueError("KIF variation regex failed to match: " + line)
-        var_movenum = int(line_match.group("movenum"))
-        while (
-            (not game.curr_node.is_null())
-            and game.curr_node.movenum != var_movenum
-        ):
-            game.go_prev_move()
-        game.go_prev_move() # Once more to reach the prior move
-        if game.curr_node.is_null():
-            raise Exception("HALP desired movenum not found")
+        var_movenum = _read_kif_variation_movenum(line)
+        branch_ply = var_movenum - 1
+        line_nodes = self._line_nodes
+        if not 0 <= branch_ply < len(line_nodes) - 1:
+            raise ValueError(
+                f"Variation at move {var_movenum} not found in KIF: {line}"
+            )
+        interval = self.snapshot_interval
+        if game.curr_node.movenum - branch_ply > interval:
+            # Rebuild from the nearest snapshot, at most interval - 1
+            # moves back, rather than unmaking every move in between
+            snapshot_ply = branch_ply - branch_ply % interval
+            game.position.from_snapshot(self._line_snapshots[snapshot_ply // interval])
+            for node in line_nodes[snapshot_ply + 1 : branch_ply + 1]:
+                game.position.make_move(node.move)
+            game.curr_node = line_nodes[branch_ply]
+        else:
+            while game.curr_node.movenum != branch_ply:
+                game.go_prev_move()
+        del line_nodes[branch_ply + 1 :]
+        del self._line_snapshots[branch_ply // interval + 1 :]
+        return
+
+    def _new_game(self) -> None:
+        self.game = Game()
+        self._line_nodes = [self.game.movetree]
+        self._line_snapshots = []
+        return
+
+    def _visit_move(self, visitor: ParserVisitor, move: Move) -> None:
+        """Visit a move read from the record, keeping the stack of the
+        line being read up to date.
+        """
+        game = self.game
+        ply = game.curr_node.movenum
+        interval = self.snapshot_interval
+        if ply % interval == 0 and ply // interval == len(self._line_snapshots):
+            self._line_snapshots.append(game.position.to_snapshot())
+        visitor.visit_move(self, move)
+        if game.curr_node.movenum == len(self._line_nodes):
+            self._line_nodes.append(game.curr_node)
         return
 
 
@@ -206,66 +314,41 @@ def _read_bod_hand(bod_hand_line: str) -> List[Tuple[KomaType, int]]:
     return res
 
 
-def _read_bod_row(bod_board_line: str
-    ) -> Generator[Koma, None, None]:
-    # Reads a line representing a row of the boarda in BOD format.
-    # Returns a generator of Koma.
+def _read_bod_row(bod_board_line: str) -> List[Koma]:
+    # Reads a line representing a row of the board in BOD format,
+    # e.g. "| ・ ・ ・ ・ ・ ・v玉 ・ ・|一". Returns the Koma, left to right.
     rank_str = bod_board_line.split("|")[1]
-    piece_strs = (rank_str[i:i+2] for i in range(0, len(rank_str), 2))
-    return (
-        Koma.make(
-            Side.GOTE if piece_str[0] == "v" else Side.SENTE,
-            KTYPE_FROM_KANJI[piece_str[1]]
-        )
-        for piece_str in piece_strs
-    )
-
-
-def _read_kif_move_line(line: str) -> Tuple[int, str, str, str]:
-    line_match = re.search(KIF_MOVELINE_REGEX, line)
-    if line_match is None:
-        raise TypeError("Match object is None, cannot identify move from line:\n" + line)
-    move_num = line_match.group("movenum")
-    move_str = line_match.group("move")
-    move_time = line_match.group("movetime")
-    total_time = line_match.group("totaltime")
-    return int(move_num), move_str, move_time, total_time
+    try:
+        return [KOMA_FROM_BOD_CELL[rank_str[i : i + 2]] for i in range(0, 18, 2)]
+    except KeyError as exc:
+        raise ValueError("Cannot read BOD board row: " + bod_board_line) from exc
 
 
-def _read_kif_move(move_str: str) -> Tuple[str, str, str, str]:
-    move_match = re.search(KIF_MOVE_REGEX, move_str)
-    if move_match is None:
-        raise ValueError("KIF move regex failed to match movestr: " + move_str)
-    dest_str = move_match.group("sq_dest")
-    koma_str = move_match.group("koma")
-    drop_prom_str = move_match.group("drop_prom")
-    sq_origin_str = move_match.group("sq_origin")
-    return dest_str, koma_str, drop_prom_str, sq_origin_str
+def _read_kif_move_line(line: str) -> Tuple[int, str]:
+    # Split a move line into its move number and move; the times that
+    # may follow are not needed. The move itself may contain a
+    # full-width space ("同　歩"), but never an ASCII one.
+    idx = 0
+    length = len(line)
+    while idx < length and "0" <= line[idx] <= "9":
+        idx += 1
+    rest = line[idx:].lstrip(" \t")
+    movestr = rest.partition(" ")[0].partition("\t")[0]
+    if not movestr:
+        raise ValueError("Cannot identify move from line:\n" + line)
+    return int(line[:idx]), movestr
 
 
-def _read_kif_dest_sq(dest_str: str, sq_prev: Square) -> Square:
-    if dest_str == "同　":
-        if sq_prev == Square.NONE:
-            raise ValueError("No last move specified for same destination quare.")
-        return sq_prev
-    col = int(dest_str[0])
-    row = int(KanjiNumber[dest_str[1]])
-    return Square.from_cr(col, row)
+def _read_kif_variation_movenum(line: str) -> int:
+    # e.g. "変化：35手"
+    movenum_str = line[len("変化："):].partition("手")[0].strip()
+    if not movenum_str.isdecimal():
+        raise ValueError("Cannot identify move number of variation: " + line)
+    return int(movenum_str)
 
 
-def _read_kif_komatype(koma_str: str) -> KomaType:
+def _lookup(table: Dict[str, _T], key: str, context: str) -> _T:
     try:
-        return (
-            KTYPE_FROM_KANJI[koma_str[1]].promote()
-            if koma_str[0] == "成"
-            else KTYPE_FROM_KANJI[koma_str]
-        )
+        return table[key]
     except KeyError as exc:
-        raise KeyError("Unknown koma: " + koma_str) from exc
-
-
-def _read_kif_origin_sq(sq_origin_str: str, is_drop: bool) -> Square:
-    return (
-        Square.HAND if is_drop
-        else Square.from_coord(int(sq_origin_str))
-    )
+        raise ValueError(f"Cannot read '{key}' in KIF: {context}") from exc
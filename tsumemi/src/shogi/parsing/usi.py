@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import mmap
+import os
+
+from array import array
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.basetypes import HAND_TYPES, SFEN_FROM_KOMA, Koma, KomaType
+from tsumemi.src.shogi.game import Game
+from tsumemi.src.shogi.move import Move, TerminationMove
+from tsumemi.src.shogi.parsing.kif_reader import SFEN_FROM_HANDICAP
+from tsumemi.src.shogi.square import Square
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+    from types import TracebackType
+    from typing import Dict, Optional, Type
+    from tsumemi.src.shogi.position import Position
+
+    PathLike = str | os.PathLike[str]
+
+
+# One problem per line: "sfen <position> moves <usi move>..." or
+# "startpos moves ...", optionally after "position ". Blank lines and
+# lines starting with "#" are skipped.
+USI_EXTENSIONS = (".sfen", ".usi")
+KTYPE_FROM_USI_DROP: Dict[str, KomaType] = {
+    SFEN_FROM_KOMA[Koma(ktype)]: ktype for ktype in HAND_TYPES
+}
+_RANKS = "abcdefghi"
+
+
+def read_usi_move(pos: Position, usi: str) -> Move:
+    """Return the move given in USI notation (e.g. "7g7f", "8h2b+",
+    "P*5e") in the position.
+    """
+    if len(usi) == 4 and usi[1] == "*":
+        try:
+            ktype = KTYPE_FROM_USI_DROP[usi[0]]
+        except KeyError as exc:
+            raise ValueError("Invalid USI drop: " + usi) from exc
+        return pos.create_drop_move(pos.turn, ktype, _read_usi_square(usi[2:4]))
+    if len(usi) == 4 or (len(usi) == 5 and usi[4] == "+"):
+        start_sq = _read_usi_square(usi[0:2])
+        if pos.get_koma(start_sq) == Koma.NONE:
+            raise ValueError("USI move from an empty square: " + usi)
+        return pos.create_move(start_sq, _read_usi_square(usi[2:4]), len(usi) == 5)
+    raise ValueError("Invalid USI move: " + usi)
+
+
+def write_usi_move(move: Move) -> str:
+    """Return the move in USI notation."""
+    end = _write_usi_square(move.end_sq)
+    if move.is_drop:
+        return f"{SFEN_FROM_KOMA[Koma(KomaType.get(move.koma))]}*{end}"
+    promotion = "+" if move.is_promotion else ""
+    return f"{_write_usi_square(move.start_sq)}{end}{promotion}"
+
+
+def read_usi_line(line: str) -> Game:
+    """Return a new Game, at the start, of one problem line."""
+    tokens = line.split()
+    if tokens[:1] == ["position"]:
+        tokens = tokens[1:]
+    if tokens[:1] == ["startpos"]:
+        sfen = SFEN_FROM_HANDICAP["平手"]
+        move_tokens = tokens[1:]
+    elif tokens[:1] == ["sfen"] and len(tokens) >= 5:
+        sfen = " ".join(tokens[1:5])
+        move_tokens = tokens[5:]
+    else:
+        raise ValueError("Invalid USI problem line: " + line)
+    if move_tokens and move_tokens[0] != "moves":
+        raise ValueError("Invalid USI problem line: " + line)
+    game = Game()
+    game.position.from_sfen(sfen)
+    game.movetree.start_pos = sfen
+    for usi in move_tokens[1:]:
+        game.add_move(read_usi_move(game.position, usi))
+    game.go_to_start()
+    return game
+
+
+def write_usi_line(game: Game) -> str:
+    """Return the problem line of the game's mainline. Termination
+    moves have no USI form and are left out.
+    """
+    return write_usi_line_from_moves(
+        game.movetree.start_pos,
+        (node.move for node in game.movetree.traverse_mainline()),
+    )
+
+
+def write_usi_line_from_moves(start_sfen: str, moves: Iterable[Move]) -> str:
+    """Return the problem line of the moves from the start position."""
+    usi_moves = [
+        write_usi_move(move)
+        for move in moves
+        if not (move.is_null() or isinstance(move, TerminationMove))
+    ]
+    if not usi_moves:
+        return "sfen " + start_sfen
+    return f"sfen {start_sfen} moves {' '.join(usi_moves)}"
+
+
+def read_usi_file(filepath: PathLike) -> Generator[Game, None, None]:
+    """Read a file of problem lines, yielding one Game per line."""
+    with open(filepath, "r", encoding="utf-8") as _file:
+        for line in _file:
+            if _is_problem_line(line):
+                yield read_usi_line(line)
+
+
+class UsiProblemFile:
+    """Lazy read-only access to a file of problem lines. The file is
+    memory mapped and indexed by the byte offsets of its problem lines
+    when opened; a problem line is only parsed when its game is read.
+    """
+
+    def __init__(self, filepath: PathLike) -> None:
+        self.filepath: PathLike = filepath
+        self._mmap: Optional[mmap.mmap] = None
+        # Line i spans _offsets[i] to the next newline
+        self._offsets = array("Q")
+        with open(filepath, "rb") as _file:
+            if os.fstat(_file.fileno()).st_size > 0:
+                self._mmap = mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap is not None:
+            self._build_index(self._mmap)
+
+    def _build_index(self, data: mmap.mmap) -> None:
+        start = 0
+        size = len(data)
+        while start < size:
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = size
+            line = data[start:end].strip()
+            if line and not line.startswith(b"#"):
+                self._offsets.append(start)
+            start = end + 1
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __enter__(self) -> UsiProblemFile:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def get_line(self, idx: int) -> str:
+        if not 0 <= idx < len(self._offsets) or self._mmap is None:
+            raise IndexError(f"Problem file has no line {idx}")
+        start = self._offsets[idx]
+        end = self._mmap.find(b"\n", start)
+        line = self._mmap[start:] if end == -1 else self._mmap[start:end]
+        return line.decode("utf-8")
+
+    def read_game(self, idx: int) -> Game:
+        return read_usi_line(self.get_line(idx))
+
+    def get_name(self, idx: int) -> str:
+        return f"{os.path.basename(os.path.normpath(self.filepath))} #{idx + 1}"
+
+
+def _is_problem_line(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith("#")
+
+
+def _read_usi_square(sq_str: str) -> Square:
+    col, rank = sq_str[0], sq_str[1]
+    if not "1" <= col <= "9" or rank not in _RANKS:
+        raise ValueError("Invalid USI square: " + sq_str)
+    return Square.from_cr(col_num=int(col), row_num=_RANKS.index(rank) + 1)
+
+
+def _write_usi_square(sq: Square) -> str:
+    col, row = sq.get_cr()
+    return f"{col}{_RANKS[row - 1]}"
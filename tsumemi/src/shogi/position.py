@@ -18,6 +18,11 @@ if TYPE_CHECKING:
     from tsumemi.src.shogi.position_internals import KomaLocations, KomasBySquare
 
 
+# Compact copy of a Position: packed board, packed sente and gote
+# hands, side to move and move number.
+PositionSnapshot = tuple[bytes, bytes, bytes, Side, int]
+
+
 class Position:
     """Represents a shogi position, including board position, side to
     move, and pieces in hand.
@@ -150,6 +155,27 @@ class Position:
             self.turn = self.turn.switch()
             self.movenum -= 1
 
+    def to_snapshot(self) -> PositionSnapshot:
+        """Return a compact copy of the position, to be restored with
+        `from_snapshot`. Much cheaper than going through SFEN.
+        """
+        return (
+            self.board.to_bytes(),
+            self.hand_sente.to_bytes(),
+            self.hand_gote.to_bytes(),
+            self.turn,
+            self.movenum,
+        )
+
+    def from_snapshot(self, snapshot: PositionSnapshot) -> None:
+        """Set up the position saved by `to_snapshot`."""
+        board, hand_sente, hand_gote, turn, movenum = snapshot
+        self.board.set_from_bytes(board)
+        self.hand_sente.set_from_bytes(hand_sente)
+        self.hand_gote.set_from_bytes(hand_gote)
+        self.turn = turn
+        self.movenum = movenum
+
     def to_sfen(self) -> str:
         """Return SFEN string representing the current position."""
         sfen_board = self.board.to_sfen()
@@ -26,6 +26,26 @@ class Dir(IntEnum):
 
 KomasBySquare = dict[Square, Koma]
 KomaLocations = dict[Koma, set[Square]]
+# Mailbox indices of the board squares, in Square order (11, 12, ... 99)
+BOARD_IDXS: tuple[int, ...] = tuple(
+    13 * col_num + row_num + 1
+    for col_num in range(1, 10)
+    for row_num in range(1, 10)
+)
+
+# Mailbox index of each Square, indexed by the Square's value
+MAILBOX_IDX_FROM_SQUARE: tuple[int, ...] = tuple(
+    13 * col_num + row_num + 1
+    for col_num, row_num in (Square(value).get_cr() for value in range(83))
+)
+# Mailbox of an empty board: board squares empty, padding invalid
+EMPTY_MAILBOX: tuple[Koma, ...] = tuple(
+    Koma.NONE if idx in BOARD_IDXS else Koma.INVALID for idx in range(143)
+)
+# Every koma that can stand on the board, sente's then gote's
+BOARD_KOMAS: tuple[Koma, ...] = tuple(
+    Koma.make(side, ktype) for side in (Side.SENTE, Side.GOTE) for ktype in KOMA_TYPES
+)
 
 
 class MailboxBoard:
@@ -52,7 +72,7 @@ class MailboxBoard:
 
     @staticmethod
     def sq_to_idx(sq: Square) -> int:
-        return MailboxBoard.cr_to_idx(*(sq.get_cr()))
+        return MAILBOX_IDX_FROM_SQUARE[sq]
 
     @staticmethod
     def idx_to_sq(idx: int) -> Square:
@@ -98,22 +118,13 @@ class MailboxBoard:
         return "".join(row)
 
     def reset(self) -> None:
-        for i in range(143):
-            self.mailbox[i] = Koma.INVALID
-        for col_num in range(1, 10):
-            for row_num in range(1, 10):
-                idx = self.cr_to_idx(col_num, row_num)
-                self.mailbox[idx] = Koma.NONE
-                self.empty_idxs.add(idx)
+        # Slice assignment keeps the same list, which callers may hold
+        self.mailbox[:] = EMPTY_MAILBOX
+        self.empty_idxs.clear()
+        self.empty_idxs.update(BOARD_IDXS)
         # Koma set: indexed by side and komatype
         # contents are indices of where they are located on the board.
-        koma_sente: dict[Koma, set[int]] = {
-            Koma.make(Side.SENTE, ktype): set() for ktype in KOMA_TYPES
-        }
-        koma_gote: dict[Koma, set[int]] = {
-            Koma.make(Side.GOTE, ktype): set() for ktype in KOMA_TYPES
-        }
-        self.koma_sets = {**koma_sente, **koma_gote}
+        self.koma_sets = {koma: set() for koma in BOARD_KOMAS}
 
     def set_koma(self, koma: Koma, sq: Square) -> None:
         prev_koma = self.get_koma(sq)
@@ -147,6 +158,24 @@ class MailboxBoard:
                 komas_by_square[MailboxBoard.idx_to_sq(idx)] = koma
         return komas_by_square
 
+    def to_bytes(self) -> bytes:
+        """Pack the 81 board squares into one byte each, in the order
+        of `BOARD_IDXS`.
+        """
+        mailbox = self.mailbox
+        return bytes([mailbox[idx] for idx in BOARD_IDXS])
+
+    def set_from_bytes(self, packed: bytes) -> None:
+        """Set the board from the output of `to_bytes`."""
+        self.reset()
+        mailbox = self.mailbox
+        for idx, value in zip(BOARD_IDXS, packed):
+            if value:
+                koma = Koma(value)
+                mailbox[idx] = koma
+                self.koma_sets[koma].add(idx)
+                self.empty_idxs.discard(idx)
+
 
 class HandRepresentation:
     def __init__(self) -> None:
@@ -194,3 +223,13 @@ class HandRepresentation:
 
     def is_empty(self) -> bool:
         return not any(self.mochigoma_dict.values())
+
+    def to_bytes(self) -> bytes:
+        """Pack the hand into one byte per piece type, in the order
+        of `HAND_TYPES`.
+        """
+        return bytes([self.mochigoma_dict[ktype] for ktype in HAND_TYPES])
+
+    def set_from_bytes(self, packed: bytes) -> None:
+        """Set the hand from the output of `to_bytes`."""
+        self.mochigoma_dict = dict(zip(HAND_TYPES, packed))
@@ -43,6 +43,29 @@ def get_ambiguous_moves(pos: Position, move: Move) -> List[Move]:
         and is_legal(mv, pos)
     ]
 
+def get_attacking_squares(
+        pos: Position, side: Side, ktype: KomaType, end_sq: Square
+    ) -> List[Square]:
+    """Return the squares of the pieces of the given side and type
+    that can move to end_sq, whether or not the moves are legal.
+
+    Rather than generating the moves of every such piece, this looks
+    outward from end_sq. Piece movement is symmetric between the two
+    sides, so a piece can reach end_sq from exactly the squares it
+    could move to from end_sq if it belonged to the other side.
+    """
+    koma = Koma.make(side, ktype)
+    board = pos.board
+    if not board.koma_sets[koma]:
+        return []
+    dest_generator, _ = MOVEGEN_FUNCTIONS[ktype]
+    end_idx = MailboxBoard.sq_to_idx(end_sq)
+    return [
+        MailboxBoard.idx_to_sq(idx)
+        for idx in dest_generator(board, end_idx, side.switch())
+        if board.mailbox[idx] == koma
+    ]
+
 def is_legal(mv: Move, pos: Position) -> bool:
     side = pos.turn
     pos.make_move(mv)
@@ -0,0 +1,110 @@
+import pytest
+
+from tsumemi.src.shogi.arena_gametree import ArenaGameTree
+from tsumemi.src.shogi.game import Game
+from tsumemi.src.shogi.notation import WesternMoveWriter
+from tsumemi.src.shogi.parsing import kif
+
+
+TEST_KIFS = [
+    "./tsumemi/test/test_kifus/testlinear.kifu",
+    "./tsumemi/test/test_kifus/branchedgame.kif",
+]
+
+
+def read_game(filename: str) -> Game:
+    game = Game()
+    game.copy_from(kif.read_kif(filename))
+    return game
+
+
+@pytest.mark.parametrize("filename", TEST_KIFS)
+def test_movetree_roundtrip(filename: str):
+    game = read_game(filename)
+    tree = ArenaGameTree.from_game(game)
+    assert len(tree) == len(list(game.movetree.traverse_preorder()))
+    movetree = tree.to_movetree()
+    assert movetree.to_latin() == game.movetree.to_latin()
+    assert movetree.start_pos == game.movetree.start_pos
+
+
+@pytest.mark.parametrize("filename", TEST_KIFS)
+def test_views_match_movetree(filename: str):
+    game = read_game(filename)
+    tree = ArenaGameTree.from_game(game)
+    nodes = list(game.movetree.traverse_preorder())
+    views = list(tree.root.traverse_preorder())
+    assert len(nodes) == len(views)
+    for node, view in zip(nodes, views):
+        assert view.move == node.move
+        assert view.movenum == node.movenum
+        assert view.parent.move == node.parent.move
+        assert [v.move for v in view.variations] == [n.move for n in node.variations]
+        assert view.has_variations() == node.has_variations()
+        assert view.is_leaf() == node.is_leaf()
+        assert [v.move for v in view.get_path_from_root()] == [
+            n.move for n in node.get_path_from_root()
+        ]
+    assert tree.root.get_last_node().move == game.movetree.get_last_node().move
+
+
+@pytest.mark.parametrize("filename", TEST_KIFS)
+def test_to_game_mainline_notation(filename: str):
+    game = read_game(filename)
+    move_writer = WesternMoveWriter()
+    expected = game.get_mainline_notation(move_writer)
+    actual = ArenaGameTree.from_game(game).to_game().get_mainline_notation(move_writer)
+    assert actual == expected
+
+
+def test_add_existing_move():
+    game = read_game(TEST_KIFS[0])
+    tree = ArenaGameTree.from_game(game)
+    first = tree.root.next()
+    size = len(tree)
+    assert tree.root.add_move(first.move) == first
+    assert tree.root.has_as_next_move(first.move)
+    assert tree.root.get_variation_node(first.move) == first
+    assert len(tree) == size
+
+
+def test_null_node_traversal():
+    tree = ArenaGameTree.from_game(read_game(TEST_KIFS[0]))
+    null = tree.root.parent
+    assert null.is_null()
+    assert list(null.traverse_preorder()) == []
+    assert list(null.traverse_mainline()) == []
+    assert len(list(tree.root.traverse_preorder())) == len(tree)
+
+
+def test_comments():
+    tree = ArenaGameTree.from_game(read_game(TEST_KIFS[0]))
+    node = tree.root.next().next()
+    assert node.comment == ""
+    node.comment = "good move"
+    assert node.comment == "good move"
+    assert tree.to_movetree().next().next().comment == "good move"
+
+
+@pytest.mark.parametrize("filename", TEST_KIFS)
+def test_bytes_roundtrip(filename: str):
+    game = read_game(filename)
+    game.movetree.comment = "根"
+    tree = ArenaGameTree.from_game(game)
+    restored = ArenaGameTree.from_bytes(tree.to_bytes())
+    assert len(restored) == len(tree)
+    movetree = restored.to_movetree()
+    assert movetree.to_latin() == game.movetree.to_latin()
+    assert movetree.start_pos == game.movetree.start_pos
+    assert movetree.headers == game.movetree.headers
+    assert movetree.comment == "根"
+    for node, restored_node in zip(
+        game.movetree.traverse_preorder(), movetree.traverse_preorder()
+    ):
+        assert restored_node.comment == node.comment
+
+
+@pytest.mark.parametrize("data", [b"", b"TSAG", b"XXXX\x01\x00\x01\x00\x00\x00"])
+def test_from_bytes_rejects_bad_data(data: bytes):
+    with pytest.raises(ValueError):
+        ArenaGameTree.from_bytes(data)
@@ -0,0 +1,54 @@
+import pytest
+
+from tsumemi.src.shogi.checkpoints import PositionCheckpoints
+from tsumemi.src.shogi.game import Game
+from tsumemi.src.shogi.parsing import kif
+from tsumemi.src.shogi.position import Position
+
+
+TEST_KIFS = [
+    "./tsumemi/test/test_kifus/testlinear.kifu",
+    "./tsumemi/test/test_kifus/branchedgame.kif",
+]
+
+
+@pytest.mark.parametrize(
+    "sfen",
+    [
+        "lnsgkgsnl/1r5b1/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/LNSGKGSNL b - 1",
+        "+R3g1knl/3s2g2/p1p1pp1pp/3p5/9/1S5P1/P+sN1PPP1P/2+b2S1R1/LK5NL b B2GN4Plp 72",
+    ],
+)
+def test_snapshot_roundtrip(sfen: str):
+    pos = Position()
+    pos.from_sfen(sfen)
+    restored = Position()
+    restored.from_snapshot(pos.to_snapshot())
+    assert restored.to_sfen() == sfen
+    assert restored.get_koma_sets() == pos.get_koma_sets()
+    assert restored.board.empty_idxs == pos.board.empty_idxs
+
+
+@pytest.mark.parametrize("filename", TEST_KIFS)
+@pytest.mark.parametrize("interval", [1, 3, 8])
+def test_go_to_id_with_checkpoints(filename: str, interval: int):
+    reference = Game()
+    reference.copy_from(kif.read_kif(filename))
+    game = Game(checkpoints=PositionCheckpoints(interval=interval, max_entries=5))
+    game.copy_from(reference)
+    node_ids = [node.id for node in game.movetree.traverse_preorder()]
+    # Visit in reverse too, so checkpoints are hit and evicted
+    for id_ in node_ids + node_ids[::-1]:
+        reference.go_to_id(id_)
+        game.go_to_id(id_)
+        assert game.get_current_sfen() == reference.get_current_sfen()
+        assert len(game.checkpoints) <= 5
+
+
+def test_checkpoints_cleared_on_reset():
+    game = Game(checkpoints=PositionCheckpoints(interval=1))
+    game.copy_from(kif.read_kif(TEST_KIFS[0]))
+    game.go_to_id(game.movetree.get_last_node().id)
+    assert len(game.checkpoints) > 0
+    game.reset()
+    assert len(game.checkpoints) == 0
@@ -0,0 +1,126 @@
+import pytest
+
+from tsumemi.src.shogi.basetypes import Koma
+from tsumemi.src.shogi.game import Game
+from tsumemi.src.shogi.gametree import GameNode
+from tsumemi.src.shogi.move import Move
+from tsumemi.src.shogi.notation import JapaneseMoveWriter, WesternMoveWriter
+from tsumemi.src.shogi.parsing import kif
+from tsumemi.src.shogi.square import Square
+
+
+START_SFEN = "lnsgkgsnl/1r5b1/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/LNSGKGSNL b - 1"
+
+MOVE_76FU = Move(Square.b77, Square.b76, koma=Koma.FU)
+MOVE_26FU = Move(Square.b27, Square.b26, koma=Koma.FU)
+MOVE_34FU = Move(Square.b33, Square.b34, koma=Koma.vFU)
+MOVE_84FU = Move(Square.b83, Square.b84, koma=Koma.vFU)
+
+
+def test_node_ids_are_per_tree():
+    tree_a = GameNode()
+    tree_b = GameNode()
+    node_a = tree_a.add_move(MOVE_76FU)
+    node_b = tree_b.add_move(MOVE_76FU)
+    assert tree_a.id == tree_b.id == 0
+    assert node_a.id == node_b.id == 1
+
+
+def test_get_node_by_id():
+    tree = GameNode()
+    node = tree.add_move(MOVE_76FU)
+    var_node = tree.add_move(MOVE_26FU)
+    child = node.add_move(MOVE_34FU)
+    assert tree.get_node_by_id(tree.id) is tree
+    assert tree.get_node_by_id(node.id) is node
+    assert tree.get_node_by_id(var_node.id) is var_node
+    assert tree.get_node_by_id(child.id) is child
+    assert child.root is tree
+
+
+def test_get_node_by_missing_id():
+    tree = GameNode()
+    tree.add_move(MOVE_76FU)
+    assert tree.get_node_by_id(100).is_null()
+
+
+def test_existing_move_keeps_id():
+    tree = GameNode()
+    node = tree.add_move(MOVE_76FU)
+    assert tree.add_move(MOVE_76FU).id == node.id
+
+
+def test_go_to_id():
+    game = Game()
+    game.position.from_sfen(START_SFEN)
+    game.movetree.start_pos = START_SFEN
+    game.add_move(MOVE_76FU)
+    game.add_move(MOVE_34FU)
+    target_id = game.curr_node.id
+    game.go_prev_move()
+    game.add_move(MOVE_84FU)
+    game.go_to_id(target_id)
+    assert game.curr_node.move == MOVE_34FU
+    assert game.get_current_sfen() == (
+        "lnsgkgsnl/1r5b1/pppppp1pp/6p2/9/2P6/PP1PPPPPP/1B5R1/LNSGKGSNL b - 3"
+    )
+
+
+def test_variation_lookup_with_many_branches():
+    tree = GameNode()
+    moves = [
+        Move(Square.from_cr(col, 7), Square.from_cr(col, 6), koma=Koma.FU)
+        for col in range(1, 10)
+    ]
+    nodes = [tree.add_move(move) for move in moves]
+    assert tree.variations == nodes
+    for move, node in zip(moves, nodes):
+        assert tree.has_as_next_move(move)
+        assert tree.get_variation_node(move) is node
+    assert not tree.has_as_next_move(MOVE_34FU)
+    with pytest.raises(ValueError):
+        tree.get_variation_node(MOVE_34FU)
+
+
+class CountingMoveWriter(WesternMoveWriter):
+    def __init__(self) -> None:
+        super().__init__()
+        self.count = 0
+
+    def write_move(self, move, pos, is_same=False):
+        self.count += 1
+        return super().write_move(move, pos, is_same)
+
+
+def test_notation_written_once_per_node():
+    game = Game()
+    game.copy_from(kif.read_kif("./tsumemi/test/test_kifus/testlinear.kifu"))
+    move_writer = CountingMoveWriter()
+    expected = game.get_mainline_notation(move_writer)
+    num_moves = len(expected)
+    assert move_writer.count == num_moves
+    assert game.get_mainline_notation(move_writer) == expected
+    assert move_writer.count == num_moves
+
+
+def test_new_move_writes_one_notation():
+    game = Game()
+    game.position.from_sfen(START_SFEN)
+    game.movetree.start_pos = START_SFEN
+    game.add_move(MOVE_76FU)
+    game.add_move(MOVE_34FU)
+    move_writer = CountingMoveWriter()
+    assert game.get_mainline_notation(move_writer) == ["P-76", "P-34"]
+    assert move_writer.count == 2
+    game.add_move(MOVE_26FU)
+    assert game.get_mainline_notation(move_writer) == ["P-76", "P-34", "P-26"]
+    assert move_writer.count == 3
+
+
+def test_notation_cache_per_move_writer():
+    game = Game()
+    game.copy_from(kif.read_kif("./tsumemi/test/test_kifus/testlinear.kifu"))
+    western = game.get_mainline_notation(WesternMoveWriter())
+    japanese = game.get_mainline_notation(JapaneseMoveWriter())
+    assert western != japanese
+    assert game.get_mainline_notation(WesternMoveWriter()) == western
@@ -0,0 +1,61 @@
+from hypothesis import given, strategies as st
+
+from tsumemi.src.shogi.basetypes import GameTermination, Koma
+from tsumemi.src.shogi.move import Move, NullMove, TerminationMove, unpack_move
+from tsumemi.src.shogi.square import Square
+from tsumemi.src.shogi.tests.koma_test import valid_koma
+from tsumemi.src.shogi.tests.square_test import board_squares
+
+
+@given(
+    board_squares(),
+    board_squares(),
+    valid_koma(),
+    st.one_of(valid_koma(), st.just(Koma.NONE)),
+    st.booleans(),
+)
+def test_pack_roundtrip(
+    start_sq: Square, end_sq: Square, koma: Koma, captured: Koma, is_promotion: bool
+):
+    move = Move(start_sq, end_sq, is_promotion, koma, captured)
+    packed = move.pack()
+    assert 0 < packed < 2**32
+    assert unpack_move(packed) == move
+
+
+@given(board_squares(), valid_koma())
+def test_pack_drop_roundtrip(end_sq: Square, koma: Koma):
+    move = Move(Square.HAND, end_sq, koma=koma)
+    actual = unpack_move(move.pack())
+    assert actual == move
+    assert actual.is_drop
+
+
+def test_pack_null_move():
+    assert NullMove().pack() == 0
+    assert unpack_move(0).is_null()
+
+
+def test_pack_termination_moves():
+    packed = {TerminationMove(term).pack() for term in GameTermination}
+    assert len(packed) == len(GameTermination)
+    for term in GameTermination:
+        actual = unpack_move(TerminationMove(term).pack())
+        assert isinstance(actual, TerminationMove)
+        assert actual.end == term
+
+
+@given(board_squares(), board_squares(), valid_koma())
+def test_equal_moves_hash_equal(start_sq: Square, end_sq: Square, koma: Koma):
+    move = Move(start_sq, end_sq, koma=koma)
+    same_move = Move(start_sq, end_sq, koma=koma)
+    assert move == same_move
+    assert hash(move) == hash(same_move)
+    assert len({move, same_move}) == 1
+
+
+def test_different_terminations_not_equal():
+    resign = TerminationMove(GameTermination.RESIGN)
+    assert resign == TerminationMove(GameTermination.RESIGN)
+    assert resign != TerminationMove(GameTermination.ABORT)
+    assert resign != NullMove()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import os
+import tarfile
+import threading
+import zipfile
+
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.parsing import kif
+from tsumemi.src.tsumemi import files
+
+if TYPE_CHECKING:
+    from types import TracebackType
+    from typing import List, Optional, Type
+    from tsumemi.src.shogi.game import Game
+
+    PathLike = str | os.PathLike[str]
+
+
+ZIP_EXTENSIONS = (".zip",)
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+ARCHIVE_EXTENSIONS = ZIP_EXTENSIONS + TAR_EXTENSIONS
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def is_archive(filepath: PathLike) -> bool:
+    return os.fspath(filepath).lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+class KifArchive:
+    """Read-only access to the KIF files packed in a zip or tar
+    archive, without extracting them to disk. Opening the archive only
+    reads its table of contents; a member is decompressed and parsed
+    when its game is read.
+
+    A zip archive can decompress any member directly. A compressed tar
+    archive has no index, so opening it decompresses the stream once to
+    list its members, and reading a member may decompress the stream
+    again up to it; zip files are preferable for large problem packs.
+
+    Reads are serialised, so an archive can be shared between threads.
+    """
+
+    def __init__(self, filepath: PathLike) -> None:
+        self.filepath: PathLike = filepath
+        self._lock = threading.Lock()
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._tar: Optional[tarfile.TarFile] = None
+        # Member names, in archive order
+        self._names: List[str] = []
+        self._tar_members: List[tarfile.TarInfo] = []
+        try:
+            if os.fspath(filepath).lower().endswith(ZIP_EXTENSIONS):
+                self._zip = zipfile.ZipFile(filepath)
+                self._names = [
+                    info.filename
+                    for info in self._zip.infolist()
+                    if not info.is_dir()
+                    and files.has_kif_file_extension(info.filename)
+                ]
+            else:
+                self._tar = tarfile.open(filepath, "r:*")
+                self._tar_members = [
+                    info
+                    for info in self._tar
+                    if info.isfile() and files.has_kif_file_extension(info.name)
+                ]
+                self._names = [info.name for info in self._tar_members]
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError) as exc:
+            self.close()
+            raise ArchiveError("Not a readable zip or tar archive") from exc
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __enter__(self) -> KifArchive:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+    def get_member_name(self, idx: int) -> str:
+        """Return the full path of a member inside the archive."""
+        if not 0 <= idx < len(self._names):
+            raise IndexError(f"Archive has no KIF member {idx}")
+        return self._names[idx]
+
+    def get_name(self, idx: int) -> str:
+        return self.get_member_name(idx).rsplit("/", 1)[-1]
+
+    def read_bytes(self, idx: int) -> bytes:
+        """Decompress and return the raw contents of a member."""
+        name = self.get_member_name(idx)
+        try:
+            with self._lock:
+                if self._zip is not None:
+                    return self._zip.read(name)
+                member = (
+                    None
+                    if self._tar is None
+                    else self._tar.extractfile(self._tar_members[idx])
+                )
+                if member is None:
+                    raise ArchiveError(f"Cannot read archive member {name}")
+                with member:
+                    return member.read()
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as exc:
+            raise ArchiveError(f"Cannot read archive member {name}") from exc
+
+    def read_game(self, idx: int) -> Game:
+        game = kif.read_kif_bytes(self.read_bytes(idx))
+        if game is None:
+            raise ArchiveError(f"Cannot decode archive member {self._names[idx]}")
+        return game
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import tkinter as tk
+
+from tkinter import ttk
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+
+class ExportProgressDialog(tk.Toplevel):
+    def __init__(
+        self, on_cancel: Callable[[], None], *args: Any, **kwargs: Any
+    ) -> None:
+        """Dialog box showing the progress of an export, with a button
+        to cancel it. Closing the window also cancels the export.
+        """
+        super().__init__(*args, **kwargs)
+        self.title("Exporting")
+        self.resizable(False, False)
+        self.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        self.lbl_progress = ttk.Label(self)
+        self.bar_progress = ttk.Progressbar(self, length=240, mode="determinate")
+        btn_cancel = ttk.Button(self, text="Cancel", command=on_cancel)
+
+        self.grid_columnconfigure(0, weight=1)
+        self.lbl_progress.grid(row=0, column=0, padx=5, pady=5)
+        self.bar_progress.grid(row=1, column=0, sticky="EW", padx=5, pady=5)
+        btn_cancel.grid(row=2, column=0, padx=5, pady=5)
+        self.set_progress(0, 0)
+
+    def set_progress(self, done: int, total: int) -> None:
+        self.lbl_progress.configure(text=f"Exporting problems: {done}/{total}")
+        self.bar_progress.configure(maximum=max(total, 1), value=done)
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
 import os
+import threading
 
 from typing import TYPE_CHECKING
 
+from tsumemi.src.shogi.parsing import kif
+
 if TYPE_CHECKING:
-    from typing import Generator
+    from typing import Dict, Generator, Iterable, List, Optional, Set, Tuple
 
     PathLike = str | os.PathLike[str]
 
 
+# Stands in for the mtime of a directory that could not be listed, so
+# that the next poll tries again
+UNLISTED_MTIME = -1
+
+
 def get_kif_files(
     directory: PathLike, recursive: bool
 ) -> Generator[PathLike, None, None]:
@@ -23,6 +31,286 @@ def get_kif_files(
     )
 
 
+def scan_kif_files(
+    directory: PathLike, recursive: bool, count_moves: bool = True
+) -> Generator[kif.KifSummary, None, None]:
+    """
+    Returns a generator of header summaries of the KIF files in a given
+    directory, read without parsing any moves. See `kif.scan_kif`.
+    """
+    for filepath in get_kif_files(directory, recursive):
+        yield kif.scan_kif(filepath, count_moves)
+
+
+class DirectoryScan:
+    """Lists the KIF files of a directory on a worker thread, so a large
+    directory tree can be opened without blocking the caller. Files
+    found so far are collected with `take_found` while the scan goes
+    on. If listing fails partway, `error` holds the exception.
+    """
+
+    def __init__(self, directory: PathLike, recursive: bool) -> None:
+        self.directory: PathLike = directory
+        self.recursive: bool = recursive
+        self.error: Optional[OSError] = None
+        self._found: List[PathLike] = []
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop the scan soon; files already found are kept."""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def is_done(self) -> bool:
+        """Return whether the scan has finished or stopped. Check this
+        before the last `take_found`, as files may be found in between.
+        """
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def take_found(self) -> List[PathLike]:
+        """Return the files found since the last call."""
+        with self._lock:
+            found, self._found = self._found, []
+        return found
+
+    def _run(self) -> None:
+        try:
+            for filepath in get_kif_files(self.directory, self.recursive):
+                if self._cancelled.is_set():
+                    break
+                with self._lock:
+                    self._found.append(filepath)
+        except OSError as exc:
+            self.error = exc
+        finally:
+            self._done.set()
+
+
+class FolderChanges:
+    """KIF files added, removed and modified in a watched folder,
+    as found by one poll of a `FolderWatcher`.
+    """
+
+    def __init__(self) -> None:
+        self.added: List[str] = []
+        self.removed: List[str] = []
+        self.modified: List[str] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+
+class FolderWatcher:
+    """Watches the KIF files of a directory by polling on a worker
+    thread every `interval` seconds, without platform-specific APIs.
+    Each poll lists again only the directories whose mtime changed,
+    which is where files were added or removed, and stats the known
+    files to find modified ones by their mtime and size.
+
+    The first poll compares the directory with `known_files`, e.g. the
+    files of an open problem list. Changes found are collected with
+    `take_changes`.
+
+    A directory that cannot be read for a while, e.g. on a network
+    share that drops out, is not taken as removed; it is looked at
+    again by the next poll. Files are only reported removed once the
+    directory that held them can be listed without them.
+    """
+
+    def __init__(
+        self,
+        directory: PathLike,
+        recursive: bool,
+        known_files: Iterable[PathLike] = (),
+        interval: float = 2.0,
+    ) -> None:
+        self.directory: str = os.fspath(directory)
+        self.recursive: bool = recursive
+        self.interval: float = interval
+        # Known files not found yet, because their directory could not
+        # be listed
+        self._pending_files: Set[str] = {os.fspath(path) for path in known_files}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._dir_files: Dict[str, Set[str]] = {}
+        self._dir_subdirs: Dict[str, Set[str]] = {}
+        # (mtime, size) of each file
+        self._file_stats: Dict[str, Tuple[int, int]] = {}
+        self._changes: List[FolderChanges] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def take_changes(self) -> List[FolderChanges]:
+        """Return the changes found since the last call, oldest first."""
+        with self._lock:
+            changes, self._changes = self._changes, []
+        return changes
+
+    def poll(self) -> FolderChanges:
+        """Look for changes since the last poll, and return them. Called
+        by the worker thread; call directly only if not started.
+        """
+        changes = FolderChanges()
+        if self.directory not in self._dir_mtimes:
+            # First poll, or the directory could not be listed before
+            if not self._add_dir(self.directory, changes):
+                return changes
+            unlisted = tuple(
+                dirpath + os.sep
+                for dirpath, mtime in self._dir_mtimes.items()
+                if mtime == UNLISTED_MTIME
+            )
+            removed = {
+                path for path in self._pending_files if not path.startswith(unlisted)
+            }
+            self._pending_files -= removed
+            changes.removed = sorted(removed)
+            return changes
+        new_files: Set[str] = set()
+        for dirpath in list(self._dir_mtimes):
+            if dirpath not in self._dir_mtimes:
+                continue  # forgotten along with a parent directory
+            try:
+                mtime = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                # Gone or unreadable for now; if it was removed, listing
+                # its parent finds that
+                continue
+            if mtime != self._dir_mtimes[dirpath]:
+                num_added = len(changes.added)
+                self._update_dir(dirpath, changes)
+                new_files.update(changes.added[num_added:])
+        for filepath, old_stat in self._file_stats.items():
+            if filepath in new_files:
+                continue
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue  # removed; found when its directory is listed
+            new_stat = (stat.st_mtime_ns, stat.st_size)
+            if new_stat != old_stat:
+                self._file_stats[filepath] = new_stat
+                changes.modified.append(filepath)
+        return changes
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                changes = self.poll()
+            except OSError:
+                changes = FolderChanges()  # e.g. directory gone; try again
+            if changes:
+                with self._lock:
+                    self._changes.append(changes)
+            self._stopped.wait(self.interval)
+
+    def _list_dir(self, dirpath: str) -> Tuple[int, Set[str], Set[str]]:
+        # mtime is read first, so changes made while listing are found
+        # by the next poll
+        mtime = os.stat(dirpath).st_mtime_ns
+        filepaths: Set[str] = set()
+        subdirs: Set[str] = set()
+        with os.scandir(dirpath) as itr:
+            for entry in itr:
+                path = os.path.join(dirpath, entry.name)
+                if entry.is_dir():
+                    # Symlinked directories are not followed, as in os.walk
+                    if self.recursive and not entry.is_symlink():
+                        subdirs.add(path)
+                elif has_kif_file_extension(entry.name):
+                    filepaths.add(path)
+        return mtime, filepaths, subdirs
+
+    def _add_dir(self, dirpath: str, changes: FolderChanges) -> bool:
+        """Start watching the directory, and return whether it could
+        be listed. A subdirectory that cannot be listed is still
+        watched, and listed again by the next poll.
+        """
+        try:
+            mtime, filepaths, subdirs = self._list_dir(dirpath)
+        except OSError:
+            if dirpath != self.directory:
+                self._dir_mtimes[dirpath] = UNLISTED_MTIME
+                self._dir_files[dirpath] = set()
+                self._dir_subdirs[dirpath] = set()
+            return False
+        self._dir_mtimes[dirpath] = mtime
+        self._dir_files[dirpath] = set()
+        self._dir_subdirs[dirpath] = subdirs
+        for filepath in sorted(filepaths):
+            self._add_file(dirpath, filepath, changes)
+        for subdir in sorted(subdirs):
+            self._add_dir(subdir, changes)
+        return True
+
+    def _update_dir(self, dirpath: str, changes: FolderChanges) -> None:
+        try:
+            mtime, filepaths, subdirs = self._list_dir(dirpath)
+        except OSError:
+            return  # keep what was known, and try again next poll
+        self._dir_mtimes[dirpath] = mtime
+        if self._pending_files:
+            gone = {
+                path
+                for path in self._pending_files
+                if os.path.dirname(path) == dirpath and path not in filepaths
+            }
+            self._pending_files -= gone
+            changes.removed.extend(sorted(gone))
+        old_filepaths = self._dir_files[dirpath]
+        for filepath in sorted(old_filepaths - filepaths):
+            old_filepaths.discard(filepath)
+            del self._file_stats[filepath]
+            changes.removed.append(filepath)
+        for filepath in sorted(filepaths - old_filepaths):
+            self._add_file(dirpath, filepath, changes)
+        old_subdirs = self._dir_subdirs[dirpath]
+        self._dir_subdirs[dirpath] = subdirs
+        for subdir in sorted(old_subdirs - subdirs):
+            self._forget_dir(subdir, changes)
+        for subdir in sorted(subdirs - old_subdirs):
+            self._add_dir(subdir, changes)
+
+    def _add_file(self, dirpath: str, filepath: str, changes: FolderChanges) -> None:
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return  # found when its directory is listed again
+        self._file_stats[filepath] = (stat.st_mtime_ns, stat.st_size)
+        self._dir_files[dirpath].add(filepath)
+        if filepath in self._pending_files:
+            self._pending_files.discard(filepath)  # known already
+        else:
+            changes.added.append(filepath)
+
+    def _forget_dir(self, dirpath: str, changes: FolderChanges) -> None:
+        if dirpath not in self._dir_mtimes:
+            return
+        del self._dir_mtimes[dirpath]
+        for filepath in sorted(self._dir_files.pop(dirpath)):
+            del self._file_stats[filepath]
+            changes.removed.append(filepath)
+        for subdir in sorted(self._dir_subdirs.pop(dirpath)):
+            self._forget_dir(subdir, changes)
+
+
 def _list_kif_files(directory: PathLike) -> Generator[PathLike, None, None]:
     """
     Returns a generator of full filepaths ending in `.kif` or
@@ -32,7 +320,7 @@ def _list_kif_files(directory: PathLike) -> Generator[PathLike, None, None]:
         yield from (
             os.path.join(directory, entry.name)
             for entry in itr
-            if _has_kif_file_extension(entry.name)
+            if has_kif_file_extension(entry.name)
         )
 
 
@@ -45,9 +333,9 @@ def _list_kif_files_recursive(directory: PathLike) -> Generator[PathLike, None,
         yield from (
             os.path.join(dirpath, filename)
             for filename in filenames
-            if _has_kif_file_extension(filename)
+            if has_kif_file_extension(filename)
         )
 
 
-def _has_kif_file_extension(filename: str) -> bool:
+def has_kif_file_extension(filename: str) -> bool:
     return filename.endswith(".kif") or filename.endswith(".kifu")
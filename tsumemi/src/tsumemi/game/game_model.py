@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING
 
 import tsumemi.src.tsumemi.event as evt
 
+from tsumemi.src.shogi.checkpoints import PositionCheckpoints
 from tsumemi.src.shogi.game import Game
 
 if TYPE_CHECKING:
@@ -32,7 +33,7 @@ class GameModel(evt.Emitter):
     """
     def __init__(self) -> None:
         evt.Emitter.__init__(self)
-        self.game = Game()
+        self.game = Game(checkpoints=PositionCheckpoints())
         return
 
     def copy_from(self, game: Game) -> None:
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import os
+import threading
+
+from array import array
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.game import Game
+from tsumemi.src.shogi.move import unpack_move
+from tsumemi.src.shogi.parsing import kif, usi
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable
+
+    PathLike = str | os.PathLike[str]
+    ProgressCallback = Callable[[int, int], None]
+
+
+DEFAULT_CHUNKSIZE = 64
+
+
+class IngestResult:
+    """Compact, picklable summary of one parsed KIF file: the start
+    position, the packed mainline moves and the header fields. If the
+    file could not be parsed, `error` describes why.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        start_sfen: str = "",
+        mainline: array[int] | None = None,
+        headers: dict[str, str] | None = None,
+        error: str | None = None,
+    ) -> None:
+        self.filepath: str = filepath
+        self.start_sfen: str = start_sfen
+        self.mainline: array[int] = array("I") if mainline is None else mainline
+        self.headers: dict[str, str] = {} if headers is None else headers
+        self.error: str | None = error
+
+    @property
+    def num_moves(self) -> int:
+        return len(self.mainline)
+
+    def is_ok(self) -> bool:
+        return self.error is None
+
+    def to_usi_line(self) -> str:
+        """Return the mainline as a "sfen ... moves ..." line."""
+        return usi.write_usi_line_from_moves(
+            self.start_sfen, (unpack_move(packed) for packed in self.mainline)
+        )
+
+    def to_game(self) -> Game:
+        """Rebuild the mainline of the parsed game, at the start."""
+        game = Game()
+        game.movetree.start_pos = self.start_sfen
+        game.movetree.headers = dict(self.headers)
+        game.position.from_sfen(self.start_sfen)
+        for packed in self.mainline:
+            game.add_move(unpack_move(packed))
+        game.go_to_start()
+        return game
+
+
+def ingest_file(filepath: PathLike) -> IngestResult:
+    """Parse one KIF file into an IngestResult. Never raises; parse
+    errors are recorded in the result instead.
+    """
+    path_str = os.fspath(filepath)
+    try:
+        game = kif.read_kif(path_str)
+    except Exception as exc:
+        return IngestResult(path_str, error=f"{type(exc).__name__}: {exc}")
+    if game is None:
+        return IngestResult(path_str, error="Could not decode file")
+    nodes = game.movetree.traverse_mainline()
+    next(nodes)  # exclude the root node
+    return IngestResult(
+        path_str,
+        start_sfen=game.movetree.start_pos,
+        mainline=array("I", (node.move.pack() for node in nodes)),
+        headers=game.movetree.headers,
+    )
+
+
+def _ingest_chunk(filepaths: list[str]) -> list[IngestResult]:
+    return [ingest_file(filepath) for filepath in filepaths]
+
+
+def ingest_files(
+    filepaths: Iterable[PathLike],
+    progress: ProgressCallback | None = None,
+    max_workers: int | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Generator[IngestResult, None, None]:
+    """Parse many KIF files over a pool of worker processes and yield
+    the results in order of completion, not in the given order.
+
+    Files are sent to workers in chunks of `chunksize`. If given,
+    `progress` is called with (number of files done, total number of
+    files) after each result. `max_workers` defaults to the number
+    of processors. Closing the generator early cancels the files that
+    have not been sent to a worker yet.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be >= 1")
+    path_strs = [os.fspath(filepath) for filepath in filepaths]
+    total = len(path_strs)
+    if total == 0:
+        return
+    chunks = [path_strs[i : i + chunksize] for i in range(0, total, chunksize)]
+    num_done = 0
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(_ingest_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            for result in future.result():
+                num_done += 1
+                if progress is not None:
+                    progress(num_done, total)
+                yield result
+    finally:
+        # If the caller stops early, drop the chunks not started yet
+        # rather than waiting for them to be parsed
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def export_usi(
+    filepaths: Iterable[PathLike],
+    out_path: PathLike,
+    progress: ProgressCallback | None = None,
+    max_workers: int | None = None,
+) -> int:
+    """Parse the KIF files in parallel and write their mainlines to
+    one file of "sfen ... moves ..." lines, in the given order. Files
+    that fail to parse are left out. Returns the number of lines.
+    """
+    path_strs = [os.fspath(filepath) for filepath in filepaths]
+    lines_by_path: dict[str, str] = {}
+    for result in ingest_files(path_strs, progress, max_workers):
+        if result.is_ok():
+            lines_by_path[result.filepath] = result.to_usi_line()
+    return _write_usi_lines(path_strs, lines_by_path, out_path)
+
+
+def _write_usi_lines(
+    path_strs: list[str], lines_by_path: dict[str, str], out_path: PathLike
+) -> int:
+    num_lines = 0
+    with open(out_path, "w", encoding="utf-8", newline="\n") as _file:
+        for path_str in path_strs:
+            line = lines_by_path.get(path_str)
+            if line is not None:
+                _file.write(line + "\n")
+                num_lines += 1
+    return num_lines
+
+
+class UsiExport:
+    """Runs `export_usi` on a worker thread, so a large problem list
+    can be exported without blocking the caller. Progress is read with
+    `get_progress` while the export goes on. If it fails, `error` holds
+    the exception; once it has finished, `num_lines` holds its result.
+
+    A cancelled export stops parsing soon and leaves the output file
+    unwritten.
+    """
+
+    def __init__(
+        self,
+        filepaths: Iterable[PathLike],
+        out_path: PathLike,
+        max_workers: int | None = None,
+    ) -> None:
+        self.path_strs: list[str] = [os.fspath(filepath) for filepath in filepaths]
+        self.out_path: PathLike = out_path
+        self.max_workers: int | None = max_workers
+        self.error: Exception | None = None
+        self.num_lines: int | None = None
+        self._progress: tuple[int, int] = (0, len(self.path_strs))
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop the export soon, without writing the output file."""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def is_done(self) -> bool:
+        """Return whether the export has finished or stopped."""
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def get_progress(self) -> tuple[int, int]:
+        """Return (number of files parsed, total number of files)."""
+        with self._lock:
+            return self._progress
+
+    def _set_progress(self, done: int, total: int) -> None:
+        with self._lock:
+            self._progress = (done, total)
+
+    def _run(self) -> None:
+        try:
+            lines_by_path: dict[str, str] = {}
+            results = ingest_files(
+                self.path_strs, self._set_progress, self.max_workers
+            )
+            try:
+                for result in results:
+                    if self._cancelled.is_set():
+                        return
+                    if result.is_ok():
+                        lines_by_path[result.filepath] = result.to_usi_line()
+            finally:
+                results.close()
+            if self._cancelled.is_set():
+                return
+            self.num_lines = _write_usi_lines(
+                self.path_strs, lines_by_path, self.out_path
+            )
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self._done.set()
@@ -5,12 +5,14 @@ import logging
 import os
 import tkinter as tk
 
-from tkinter import filedialog, ttk
+from tkinter import filedialog, messagebox, ttk
 from typing import TYPE_CHECKING
 
 import tsumemi.src.tsumemi.event as evt
 import tsumemi.src.tsumemi.game.game_controller as gamecon
+import tsumemi.src.tsumemi.kif_cache as kcache
 import tsumemi.src.tsumemi.notation_writer as nwriter
+import tsumemi.src.tsumemi.prefetch as prefetch
 import tsumemi.src.tsumemi.problem_list.problem_list_model as plist
 import tsumemi.src.tsumemi.problem_list.problem_list_controller as plistcon
 from tsumemi.src.tsumemi.run_statistics import RunStatistics
@@ -18,9 +20,10 @@ import tsumemi.src.tsumemi.settings.settings_controller as setcon
 import tsumemi.src.tsumemi.speedrun_controller as speedcon
 import tsumemi.src.tsumemi.timer_controller as timecon
 
-from tsumemi.src.shogi.parsing import kif
-from tsumemi.src.tsumemi import files, problem as pb, skins, timer
+from tsumemi.src.shogi.parsing import kif, usi
+from tsumemi.src.tsumemi import archive, ingest, problem as pb, skins, timer, tsudb
 from tsumemi.src.tsumemi.views import main_window_view_controller as mainviewcon
+from tsumemi.src.tsumemi.export_window import ExportProgressDialog
 from tsumemi.src.tsumemi.menubar import Menubar
 from tsumemi.src.tsumemi.statistics_window import StatisticsDialog
 
@@ -28,10 +31,17 @@ if TYPE_CHECKING:
     from typing import Any, Callable, List, Mapping, Optional
     from tsumemi.src.shogi.notation import AbstractMoveWriter
     from tsumemi.src.shogi.game import Game
+    from tsumemi.src.tsumemi.problem import ProblemSource
 
     PathLike = str | os.PathLike[str]
 
 
+# Milliseconds between checks on a problem being loaded to be shown
+LOAD_POLL_INTERVAL = 10
+# Milliseconds between progress updates of an export
+EXPORT_POLL_INTERVAL = 50
+
+
 class RootController(evt.IObserver):
     """Root controller for the application. Manages top-level logic
     and GUI elements.
@@ -47,9 +57,18 @@ class RootController(evt.IObserver):
             self.settings.notation_controller.get_move_writer()
         )
         self.main_game = gamecon.GameController(self.notation_writer)
+        self.kif_cache = kcache.open_kif_cache()
+        self.game_cache = kcache.GameCache(
+            kif.read_kif if self.kif_cache is None else self.kif_cache.read_kif
+        )
+        self.prefetcher = prefetch.ProblemPrefetcher(self.load_problem)
+        self.problem_loader = prefetch.ProblemLoader(self.load_problem)
         self.main_timer = timecon.TimerController()
         self.current_directory: PathLike | None = None
+        self.problem_database: ProblemSource | None = None
         self.main_problem_list_controller = plistcon.ProblemListController()
+        self.usi_export: ingest.UsiExport | None = None
+        self.export_dialog: ExportProgressDialog | None = None
 
         self.speedrun_controller = speedcon.SpeedrunController(self)
 
@@ -60,6 +79,7 @@ class RootController(evt.IObserver):
             {
                 timer.TimerSplitEvent: self._on_split,
                 plist.ProbSelectedEvent: self._on_prob_selected,
+                plist.ProbsModifiedEvent: self._on_probs_modified,
             }
         )
 
@@ -89,19 +109,155 @@ class RootController(evt.IObserver):
     def open_folder(
         self, _event: Optional[tk.Event] = None, recursive: bool = False
     ) -> None:
-        """Prompt user for a folder, open into main_problem_list."""
+        """Prompt user for a folder, open into main_problem_list. The
+        folder is scanned in the background, see `scan_problem_files`.
+        """
         directory = filedialog.askdirectory()
         if not directory:
             return
         directory = os.path.normpath(directory)
         self.current_directory = directory
-        self.main_problem_list_controller.set_problem_files(
-            files.get_kif_files(directory, recursive)
-        )
+        self.main_problem_list_controller.scan_problem_files(directory, recursive)
 
     def open_folder_recursive(self, _event: Optional[tk.Event] = None) -> None:
         return self.open_folder(recursive=True)
 
+    def open_kif_collection(self) -> None:
+        """Prompt user for a file of several KIF games, open into
+        main_problem_list.
+        """
+        filepath = filedialog.askopenfilename(
+            filetypes=(("KIF files", ".kif .kifu"),),
+        )
+        if not filepath:
+            return
+        self.current_directory = os.path.dirname(filepath)
+        self.main_problem_list_controller.set_problem_collection(
+            filepath, kif.index_kif_collection(filepath)
+        )
+
+    def open_problem_database(self) -> None:
+        """Prompt user for a problem database, a file of SFEN problem
+        lines or a zip or tar archive of KIF files, open into
+        main_problem_list.
+        """
+        filepath = filedialog.askopenfilename(
+            filetypes=(
+                ("tsumemi problem database", tsudb.TSUDB_EXTENSION),
+                ("SFEN problem lines", " ".join(usi.USI_EXTENSIONS)),
+                ("KIF archives", " ".join(archive.ARCHIVE_EXTENSIONS)),
+            ),
+        )
+        if not filepath:
+            return
+        database: ProblemSource
+        try:
+            if filepath.endswith(usi.USI_EXTENSIONS):
+                database = usi.UsiProblemFile(filepath)
+            elif archive.is_archive(filepath):
+                database = archive.KifArchive(filepath)
+            else:
+                database = tsudb.ProblemDatabase(filepath)
+        except (tsudb.TsudbError, archive.ArchiveError) as exc:
+            messagebox.showerror(title="Cannot open problem database", message=str(exc))
+            return
+        if self.problem_database is not None:
+            self.problem_database.close()
+        self.problem_database = database
+        self.current_directory = os.path.dirname(filepath)
+        self.main_problem_list_controller.set_problem_database(database)
+
+    def save_problems_as_database(self) -> None:
+        """Write the problems in main_problem_list that are read from
+        files into a new problem database.
+        """
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=tsudb.TSUDB_EXTENSION,
+            filetypes=(("tsumemi problem database", tsudb.TSUDB_EXTENSION),),
+        )
+        if not filepath:
+            return
+        self.main_problem_list_controller.save_as_database(filepath)
+
+    def export_problems_as_sfen(self) -> None:
+        """Write the mainlines of the problem files in
+        main_problem_list into a new file of SFEN problem lines. The
+        files are parsed in the background, with a progress dialog
+        from which the export can be cancelled.
+        """
+        if self.usi_export is not None:
+            return
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=usi.USI_EXTENSIONS[0],
+            filetypes=(("SFEN problem lines", " ".join(usi.USI_EXTENSIONS)),),
+        )
+        if not filepath:
+            return
+        export = ingest.UsiExport(
+            (
+                prob.filepath
+                for prob in self.main_problem_list_controller.problem_list
+                if not prob.is_in_database() and prob.offset is None
+            ),
+            filepath,
+        )
+        self.usi_export = export
+        self.export_dialog = ExportProgressDialog(self.cancel_export, self.root)
+        export.start()
+        self._poll_export_later(export)
+
+    def poll_export(self) -> bool:
+        """Show the progress of the export. Returns True once it has
+        ended.
+        """
+        export = self.usi_export
+        if export is None:
+            return True
+        if not export.is_done():
+            if self.export_dialog is not None:
+                self.export_dialog.set_progress(*export.get_progress())
+            return False
+        self._finish_export()
+        if export.error is not None:
+            messagebox.showerror(
+                title="Cannot export problems", message=str(export.error)
+            )
+        return True
+
+    def cancel_export(self) -> None:
+        """Stop the export; the output file is not written."""
+        if self.usi_export is None:
+            return
+        self.usi_export.cancel()
+        self._finish_export()
+
+    def _poll_export_later(self, export: ingest.UsiExport) -> None:
+        def _poll() -> None:
+            # A cancelled export is no longer polled
+            if export is self.usi_export and not self.poll_export():
+                self.root.after(EXPORT_POLL_INTERVAL, _poll)
+
+        self.root.after(EXPORT_POLL_INTERVAL, _poll)
+
+    def _finish_export(self) -> None:
+        self.usi_export = None
+        if self.export_dialog is not None:
+            self.export_dialog.destroy()
+            self.export_dialog = None
+
+    def read_problem(self, prob: pb.Problem) -> Game | None:
+        """Return the game of the problem, wherever it is stored."""
+        if prob.db_index is not None:
+            if self.problem_database is None:
+                return None
+            try:
+                return self.problem_database.read_game(prob.db_index)
+            except (ValueError, tsudb.TsudbError, archive.ArchiveError):
+                return None
+        if prob.offset is not None:
+            return kif.read_kif_at(prob.filepath, prob.offset)
+        return self.game_cache.read_kif(prob.filepath)
+
     def copy_sfen_to_clipboard(self) -> None:
         sfen = self.main_game.get_current_sfen()
         self.root.clipboard_clear()
@@ -109,19 +265,88 @@ class RootController(evt.IObserver):
         self.root.update()
         return
 
-    def show_problem(self, prob: pb.Problem) -> None:
-        """Display the given problem in the GUI and enable move input."""
-        game = kif.read_kif(prob.filepath)
+    def load_problem(self, prob: pb.Problem) -> prefetch.LoadedProblem | None:
+        """Read the problem and write out its solution, ready to show.
+        Safe to call from a worker thread.
+        """
+        game = self.read_problem(prob)
         if game is None:
+            return None
+        return prefetch.LoadedProblem(game, self.solution_str_from_game(game))
+
+    def prefetch_next_problems(self) -> None:
+        """Start loading the problems after the current one in the
+        problem list, so they are shown without delay.
+        """
+        problem_list = self.main_problem_list_controller.problem_list
+        if problem_list.curr_prob_idx is None:
+            self.prefetcher.clear()
             return
-        self.main_viewcon.set_solution(self.solution_str_from_game(game))
+        start = problem_list.curr_prob_idx + 1
+        self.prefetcher.prefetch(
+            problem_list.problems[start : start + self.prefetcher.num_ahead]
+        )
+
+    def show_problem(self, prob: pb.Problem) -> None:
+        """Display the given problem in the GUI and enable move input.
+
+        A prefetched problem is shown at once. Otherwise it is loaded on
+        a worker thread and shown when ready, so that browsing quickly
+        does not block the event loop; if another problem is shown in
+        the meantime, this one is never drawn. Call
+        `finish_showing_problem` where the problem must be on screen
+        before carrying on.
+        """
+        loaded = self.prefetcher.take(prob)
+        if loaded is not None:
+            self.problem_loader.cancel()
+            self._draw_problem(prob, loaded)
+            return
+        generation = self.problem_loader.request(prob)
+        self._poll_problem_load_later(generation)
+
+    def finish_showing_problem(self) -> None:
+        """Wait for the problem being loaded, if any, and show it."""
+        result = self.problem_loader.take(timeout=None)
+        if result is not None:
+            self._draw_problem(*result)
+
+    def poll_problem_load(self) -> bool:
+        """Show the requested problem if its load has finished. Returns
+        True once there is nothing left to wait for.
+        """
+        result = self.problem_loader.take()
+        if result is not None:
+            self._draw_problem(*result)
+        return not self.problem_loader.is_pending()
+
+    def _poll_problem_load_later(self, generation: int) -> None:
+        def _poll() -> None:
+            # A newer request supersedes this one
+            if generation != self.problem_loader.generation:
+                return
+            if not self.poll_problem_load():
+                self.root.after(LOAD_POLL_INTERVAL, _poll)
+
+        self.root.after(LOAD_POLL_INTERVAL, _poll)
+
+    def _draw_problem(
+        self, prob: pb.Problem, loaded: prefetch.LoadedProblem | None
+    ) -> None:
+        if loaded is None:
+            return
+        game = loaded.game
+        self.main_viewcon.set_solution(loaded.solution)
         self.main_game.set_game(game)
 
         self.main_viewcon.set_main_board(game.position)
         self.main_viewcon.refresh_move_list()
         self.main_viewcon.enable_move_input()
         self.main_viewcon.hide_solution()
-        self.root.title("tsumemi - " + str(prob.filepath))
+        title = str(prob.filepath)
+        if prob.is_in_database() or prob.offset is not None:
+            title += ": " + prob.name
+        self.root.title("tsumemi - " + title)
         return
 
     def solution_str_from_game(self, game: Game) -> str:
@@ -161,6 +386,11 @@ class RootController(evt.IObserver):
 
     def apply_notation_settings(self, move_writer: AbstractMoveWriter) -> None:
         self.notation_writer.change_move_writer(move_writer)
+        self.prefetcher.clear()
+        # A problem still loading has its solution in the old notation
+        pending = self.problem_loader.pending_problem
+        if pending is not None:
+            self.show_problem(pending)
         self.refresh_solution_text()
         self.main_viewcon.refresh_move_list()
         return
@@ -176,6 +406,18 @@ class RootController(evt.IObserver):
             self.show_problem(event.problem)
         return
 
+    def _on_probs_modified(self, event: plist.ProbsModifiedEvent) -> None:
+        # Show the new contents if the file of the current problem changed
+        problem_list = self.main_problem_list_controller.problem_list
+        if event.sender is not problem_list:
+            return
+        self.prefetcher.clear()
+        if problem_list.curr_prob is None:
+            return
+        if problem_list.curr_prob_idx in event.idxs:
+            self.show_problem(problem_list.curr_prob)
+        return
+
 
 class Bindings:
     # Just to group all shortcut bindings together for convenience.
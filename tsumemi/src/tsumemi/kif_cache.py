@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import threading
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.arena_gametree import ArenaGameTree
+from tsumemi.src.shogi.parsing import kif
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import Dict, List, Optional, Tuple
+    from tsumemi.src.shogi.game import Game
+
+    PathLike = str | os.PathLike[str]
+    GameKey = Tuple[str, int, int]
+
+
+logger = logging.getLogger(__name__)
+
+
+KIF_CACHE_FILENAME = "kif_cache.sqlite3"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MEMORY_MAX_BYTES = 16 * 1024 * 1024
+# Bump when the table layout changes; older caches are then discarded.
+SCHEMA_VERSION = 1
+
+
+def user_cache_dir() -> str:
+    """Return the per-user directory for tsumemi's caches, following
+    each platform's conventions. It may not exist yet.
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(
+            os.path.join("~", "AppData", "Local")
+        )
+        return os.path.join(base, "tsumemi", "Cache")
+    if sys.platform == "darwin":
+        return os.path.expanduser(os.path.join("~", "Library", "Caches", "tsumemi"))
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(
+        os.path.join("~", ".cache")
+    )
+    return os.path.join(base, "tsumemi")
+
+
+def default_cache_path() -> str:
+    return os.path.join(user_cache_dir(), KIF_CACHE_FILENAME)
+
+
+def open_kif_cache(db_path: Optional[PathLike] = None) -> Optional[KifCache]:
+    """Open the KIF cache, by default in the user's cache directory.
+    Returns None, after logging why, if it cannot be opened; problems
+    are then read without a persistent cache.
+    """
+    try:
+        return KifCache(db_path)
+    except (OSError, sqlite3.Error):
+        logger.exception("Cannot open the KIF cache, reading KIFs uncached")
+        return None
+
+
+def normalise_path(filepath: PathLike) -> str:
+    return os.path.normcase(os.path.abspath(os.fspath(filepath)))
+
+
+def content_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class KifCache:
+    """Persistent cache of parsed KIF files in a single SQLite file.
+
+    Each entry holds the game as serialised by ArenaGameTree, keyed by
+    the normalised file path. An entry is used as is while the file's
+    mtime and size are unchanged. If they have changed, the file is
+    read and hashed, and parsing is still skipped if any entry has the
+    same content (e.g. a file that was touched, copied or moved).
+
+    Entries are evicted least recently used first once their total
+    size exceeds `max_bytes`. Safe to use from several threads.
+
+    The cache file goes in the user's cache directory unless `db_path`
+    is given; its parent directory is created if needed.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[PathLike] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.db_path: str = (
+            default_cache_path() if db_path is None else os.fspath(db_path)
+        )
+        self.max_bytes: int = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        try:
+            self._conn = self._connect()
+        except sqlite3.OperationalError:
+            raise
+        except sqlite3.DatabaseError:
+            # Not a cache we can read (e.g. a corrupt file); start over
+            os.remove(self.db_path)
+            self._conn = self._connect()
+        self._clock: int = self._conn.execute(
+            "SELECT COALESCE(MAX(last_used), 0) FROM games"
+        ).fetchone()[0]
+        self._total_bytes: int = self._conn.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM games"
+        ).fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS games")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS games ("
+                " path TEXT PRIMARY KEY,"
+                " mtime_ns INTEGER NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " digest BLOB NOT NULL,"
+                " data BLOB NOT NULL,"
+                " nbytes INTEGER NOT NULL,"
+                " last_used INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS games_digest ON games(digest)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS games_last_used ON games(last_used)"
+            )
+            conn.commit()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def __len__(self) -> int:
+        with self._lock:
+            count: int = self._conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+        return count
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM games")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def read_kif(self, filepath: PathLike) -> Optional[Game]:
+        """Return the game in the KIF file, from the cache if possible
+        and by parsing the file if not. Returns None if the file cannot
+        be decoded, like `kif.read_kif`.
+        """
+        path = normalise_path(filepath)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, data FROM games WHERE path = ?", (path,)
+            ).fetchone()
+            is_fresh = row is not None and row[:2] == (stat.st_mtime_ns, stat.st_size)
+            if is_fresh:
+                self._touch(path)
+                self._conn.commit()
+        if is_fresh:
+            game = self._load(row[2])
+            if game is not None:
+                return game
+
+        with open(path, "rb") as _file:
+            data = _file.read()
+        digest = content_digest(data)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM games WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+        game = None if row is None else self._load(row[0])
+        if game is not None:
+            blob = row[0]
+        else:
+            game = kif.read_kif_bytes(data)
+            if game is None:
+                return None
+            blob = ArenaGameTree.from_game(game).to_bytes()
+        with self._lock:
+            self._store(path, stat.st_mtime_ns, stat.st_size, digest, blob)
+            self._evict()
+            self._conn.commit()
+        return game
+
+    def _load(self, blob: bytes) -> Optional[Game]:
+        """Rebuild a game from a cached blob, or return None if the
+        blob is unreadable (e.g. written by another format version).
+        """
+        try:
+            return ArenaGameTree.from_bytes(blob).to_game()
+        except ValueError:
+            return None
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def _touch(self, path: str) -> None:
+        self._conn.execute(
+            "UPDATE games SET last_used = ? WHERE path = ?", (self._tick(), path)
+        )
+
+    def _store(
+        self, path: str, mtime_ns: int, size: int, digest: bytes, blob: bytes
+    ) -> None:
+        old = self._conn.execute(
+            "SELECT nbytes FROM games WHERE path = ?", (path,)
+        ).fetchone()
+        if old is not None:
+            self._total_bytes -= old[0]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, mtime_ns, size, digest, blob, len(blob), self._tick()),
+        )
+        self._total_bytes += len(blob)
+
+    def _evict(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT path, nbytes FROM games ORDER BY last_used")
+        evicted: List[Tuple[str]] = []
+        for path, nbytes in rows:
+            if self._total_bytes <= self.max_bytes:
+                break
+            evicted.append((path,))
+            self._total_bytes -= nbytes
+        self._conn.executemany("DELETE FROM games WHERE path = ?", evicted)
+
+
+class CacheStats:
+    """A snapshot of how well a GameCache has been doing."""
+
+    def __init__(
+        self, hits: int, misses: int, entries: int, total_bytes: int, max_bytes: int
+    ) -> None:
+        self.hits: int = hits
+        self.misses: int = misses
+        self.entries: int = entries
+        self.total_bytes: int = total_bytes
+        self.max_bytes: int = max_bytes
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class GameCache:
+    """In-memory LRU cache of parsed games, keyed by normalised path,
+    mtime and size, so that going back and forth between problems does
+    not read them again.
+
+    Games are held as ArenaGameTree bytes rather than as Game objects.
+    This keeps the size of each entry exact and small, and every read
+    returns a new Game, so moves added to it (e.g. in free mode) never
+    reach the cache. Entries are evicted least recently used first once
+    their total size exceeds `max_bytes`. Misses are read with `load`,
+    e.g. `KifCache.read_kif`. Safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[PathLike], Optional[Game]] = kif.read_kif,
+        max_bytes: int = DEFAULT_MEMORY_MAX_BYTES,
+    ) -> None:
+        self.load = load
+        self.max_bytes: int = max_bytes
+        self._lock = threading.Lock()
+        self._blobs: OrderedDict[GameKey, bytes] = OrderedDict()
+        # Only the latest version of each file is worth keeping
+        self._keys_by_path: Dict[str, GameKey] = {}
+        self._total_bytes: int = 0
+        self._hits: int = 0
+        self._misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                self._hits,
+                self._misses,
+                len(self._blobs),
+                self._total_bytes,
+                self.max_bytes,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blobs.clear()
+            self._keys_by_path.clear()
+            self._total_bytes = 0
+
+    def read_kif(self, filepath: PathLike) -> Optional[Game]:
+        """Return a new copy of the game in the KIF file, from memory
+        if possible. Returns None if the file cannot be decoded.
+        """
+        path = normalise_path(filepath)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is not None:
+                self._blobs.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+        if blob is not None:
+            return ArenaGameTree.from_bytes(blob).to_game()
+
+        game = self.load(path)
+        if game is None:
+            return None
+        blob = ArenaGameTree.from_game(game).to_bytes()
+        with self._lock:
+            self._store(key, blob)
+            self._evict()
+        return game
+
+    def _discard(self, key: GameKey) -> None:
+        blob = self._blobs.pop(key, None)
+        if blob is not None:
+            self._total_bytes -= len(blob)
+        if self._keys_by_path.get(key[0]) == key:
+            del self._keys_by_path[key[0]]
+
+    def _store(self, key: GameKey, blob: bytes) -> None:
+        old_key = self._keys_by_path.get(key[0])
+        if old_key is not None:
+            self._discard(old_key)
+        if len(blob) > self.max_bytes:
+            return
+        self._blobs[key] = blob
+        self._keys_by_path[key[0]] = key
+        self._total_bytes += len(blob)
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            self._discard(next(iter(self._blobs)))
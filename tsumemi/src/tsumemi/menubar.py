@@ -40,6 +40,22 @@ class Menubar(tk.Menu):
             command=self.controller.open_folder_recursive,
             accelerator="Ctrl+Shift+O",
         )
+        menu_file.add_command(
+            label="Open KIF collection...",
+            command=self.controller.open_kif_collection,
+        )
+        menu_file.add_command(
+            label="Open problem database...",
+            command=self.controller.open_problem_database,
+        )
+        menu_file.add_command(
+            label="Save problems as database...",
+            command=self.controller.save_problems_as_database,
+        )
+        menu_file.add_command(
+            label="Export problems as SFEN lines...",
+            command=self.controller.export_problems_as_sfen,
+        )
         menu_file.add_separator()
         menu_file.add_command(
             label="Copy SFEN of current position",
@@ -2,8 +2,6 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from tsumemi.src.shogi.position import Position
-
 if TYPE_CHECKING:
     import tkinter as tk
     from tkinter import ttk
@@ -20,17 +18,14 @@ class MovelistViewModel:
         return
 
     def populate_treeview(self, tvw: ttk.Treeview) -> None:
-        displayed_nodes = self.game.get_current_mainline()
+        displayed_nodes = list(self.game.get_current_mainline())
         sfen = self.game.get_initial_sfen()
         if not sfen:
             return
-        pos = Position()
-        pos.from_sfen(sfen)
+        move_strs = self.notation_writer.write_path(self.game.game, displayed_nodes)
 
-        for node in displayed_nodes:
+        for node, move_str in zip(displayed_nodes, move_strs):
             move_num = node.movenum
-            move_str = self.notation_writer.write_node(node, pos)
-            pos.make_move(node.move)
             variation_indicator = "+" if len(node.parent.variations) > 1 else ""
             tvw.insert(
                 "", "end", iid=str(node.id),
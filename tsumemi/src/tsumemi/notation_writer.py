@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import List
+    from typing import Iterable, List
     from tsumemi.src.shogi.game import Game
     from tsumemi.src.shogi.gametree import MoveNode
     from tsumemi.src.shogi.notation import AbstractMoveWriter
@@ -24,5 +24,8 @@ class NotationWriter:
     def write_mainline(self, game: Game) -> List[str]:
         return game.get_mainline_notation(self._move_writer)
 
+    def write_path(self, game: Game, path: Iterable[MoveNode]) -> List[str]:
+        return game.get_path_notation(path, self._move_writer)
+
     def change_move_writer(self, move_writer: AbstractMoveWriter) -> None:
         self._move_writer = move_writer
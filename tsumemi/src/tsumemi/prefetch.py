@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import logging
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from concurrent.futures import Future
+    from typing import Dict, Optional, Tuple
+    from tsumemi.src.shogi.game import Game
+    from tsumemi.src.tsumemi.problem import Problem
+
+    PendingLoad = Tuple[Problem, Future[Optional["LoadedProblem"]]]
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_NUM_AHEAD = 3
+
+
+class LoadedProblem:
+    """The game of a problem, read and ready to show, with its solution
+    already written out in notation.
+    """
+
+    def __init__(self, game: Game, solution: str) -> None:
+        self.game: Game = game
+        self.solution: str = solution
+
+
+class ProblemPrefetcher:
+    """Loads upcoming problems on a worker thread, so that they can be
+    shown from memory when their turn comes. Only the problems of the
+    latest `prefetch` call are kept; loads for any others are cancelled
+    or dropped.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[Problem], Optional[LoadedProblem]],
+        num_ahead: int = DEFAULT_NUM_AHEAD,
+    ) -> None:
+        self.load = load
+        self.num_ahead: int = num_ahead
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prefetch"
+        )
+        self._futures: Dict[Problem, Future[Optional[LoadedProblem]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def prefetch(self, problems: Iterable[Problem]) -> None:
+        """Start loading the problems, in order, and forget any others."""
+        futures: Dict[Problem, Future[Optional[LoadedProblem]]] = {}
+        for prob in problems:
+            future = self._futures.pop(prob, None)
+            if future is None:
+                future = self._executor.submit(self.load, prob)
+            futures[prob] = future
+        self.clear()
+        self._futures = futures
+
+    def take(self, prob: Problem) -> Optional[LoadedProblem]:
+        """Return the problem if it was prefetched, waiting for it if
+        its load is under way. Returns None if the problem was not
+        prefetched, its load has not started yet, or it failed; the
+        caller should then load it itself.
+        """
+        future = self._futures.pop(prob, None)
+        if future is None or future.cancel():
+            return None
+        try:
+            return future.result()
+        except Exception:
+            logger.exception("Failed to prefetch problem %s", prob.name)
+            return None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every pending load has finished. Returns False if
+        the timeout ran out first.
+        """
+        not_done = wait(self._futures.values(), timeout).not_done
+        return not not_done
+
+    def clear(self) -> None:
+        """Forget all prefetched problems, e.g. because how they are
+        written out has changed.
+        """
+        for future in self._futures.values():
+            future.cancel()
+        self._futures = {}
+
+    def close(self) -> None:
+        self.clear()
+        self._executor.shutdown(wait=False)
+
+
+class ProblemLoader:
+    """Loads the problem to be shown on a worker thread, one request
+    at a time. Each request bumps a generation counter and supersedes
+    the ones before it: their loads are cancelled if not yet started,
+    skipped if queued, and their results dropped, so that only the
+    latest requested problem is ever handed back to be shown.
+    """
+
+    def __init__(self, load: Callable[[Problem], Optional[LoadedProblem]]) -> None:
+        self.load = load
+        self.generation: int = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="load")
+        self._pending: Optional[PendingLoad] = None
+
+    def _load(self, generation: int, prob: Problem) -> Optional[LoadedProblem]:
+        if generation != self.generation:
+            return None  # superseded while queued
+        return self.load(prob)
+
+    def request(self, prob: Problem) -> int:
+        """Start loading the problem, superseding any earlier request.
+        Returns the generation of this request.
+        """
+        self.cancel()
+        future = self._executor.submit(self._load, self.generation, prob)
+        self._pending = (prob, future)
+        return self.generation
+
+    def cancel(self) -> None:
+        """Drop the pending request, if any."""
+        self.generation += 1
+        if self._pending is not None:
+            self._pending[1].cancel()
+            self._pending = None
+
+    def is_pending(self) -> bool:
+        return self._pending is not None
+
+    @property
+    def pending_problem(self) -> Optional[Problem]:
+        return None if self._pending is None else self._pending[0]
+
+    def take(
+        self, timeout: Optional[float] = 0
+    ) -> Optional[Tuple[Problem, Optional[LoadedProblem]]]:
+        """Return the requested problem with its loaded game, waiting
+        up to `timeout` seconds for the load to finish. Returns None if
+        nothing is pending or it is still loading. The loaded game is
+        None if the load failed.
+        """
+        if self._pending is None:
+            return None
+        prob, future = self._pending
+        if wait([future], timeout).not_done:
+            return None
+        self._pending = None
+        try:
+            return prob, future.result()
+        except Exception:
+            logger.exception("Failed to load problem %s", prob.name)
+            return prob, None
+
+    def close(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False)
@@ -2,14 +2,16 @@ from __future__ import annotations
 
 from enum import Enum
 import os
-from typing import TYPE_CHECKING
+from typing import Protocol, TYPE_CHECKING
 
 from tsumemi.src.tsumemi import timer
 
 if TYPE_CHECKING:
-    from typing import Any
+    from typing import Any, Tuple
+    from tsumemi.src.shogi.game import Game
 
     PathLike = str | os.PathLike[str]
+    ProblemId = Tuple[str, int | None, int | None]
 
 
 class ProblemStatus(Enum):
@@ -22,21 +24,65 @@ class ProblemStatus(Enum):
         return self.name
 
 
+class ProblemSource(Protocol):
+    """Anything problems can be read from by index, such as a problem
+    database, a file of SFEN problem lines or an archive of KIF files.
+    """
+
+    filepath: PathLike
+
+    def __len__(self) -> int: ...
+
+    def get_name(self, idx: int) -> str: ...
+
+    def read_game(self, idx: int) -> Game: ...
+
+    def close(self) -> None: ...
+
+
 class Problem:
     """
     Represents one tsume problem. Identity is based on filepath because
     the problem contents are loaded lazily. Solving statistics (time and status)
-    are included but do not affect identity.
+    are included but do not affect identity. Problems are hashable by
+    their `id`, which is fixed when the problem is created.
+
+    A problem stored in a problem database (see `tsudb`) has the path
+    of the database as its filepath and its record index as `db_index`.
+    A problem in a file of several KIF games has the byte offset of its
+    game in that file as `offset`.
     """
 
-    def __init__(self, filepath: PathLike) -> None:
+    def __init__(
+        self,
+        filepath: PathLike,
+        db_index: int | None = None,
+        name: str | None = None,
+        offset: int | None = None,
+    ) -> None:
         self.filepath: PathLike = filepath
+        self.db_index: int | None = db_index
+        self.offset: int | None = offset
+        self._name: str | None = name
         self.time: timer.Time | None = None
         self.status: ProblemStatus = ProblemStatus.NONE
+        self._id: ProblemId = (os.fspath(filepath), db_index, offset)
 
     def __eq__(self, obj: Any) -> bool:
-        return isinstance(obj, Problem) and self.filepath == obj.filepath
+        return isinstance(obj, Problem) and self._id == obj._id
+
+    def __hash__(self) -> int:
+        return hash(self._id)
+
+    @property
+    def id(self) -> ProblemId:
+        return self._id
 
     @property
     def name(self) -> str:
+        if self._name is not None:
+            return self._name
         return os.path.basename(os.path.normpath(self.filepath))
+
+    def is_in_database(self) -> bool:
+        return self.db_index is not None
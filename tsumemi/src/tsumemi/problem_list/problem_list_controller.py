@@ -1,23 +1,32 @@
 from __future__ import annotations
 
 import csv
+import os
 
 from typing import TYPE_CHECKING
 
+from tsumemi.src.shogi.parsing import kif
+from tsumemi.src.tsumemi import files, tsudb
 from tsumemi.src.tsumemi.problem import Problem, ProblemStatus
 from tsumemi.src.tsumemi.problem_list.problem_list_model import ProblemList
 from tsumemi.src.tsumemi.problem_list.problem_list_view import ProblemListPane
 from tsumemi.src.tsumemi.problem_list.problem_list_viewmodel import ProblemListViewModel
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
-    import os
+    from collections.abc import Iterable, Iterator
     import tkinter as tk
     import tsumemi.src.tsumemi.timer as timer
+    from tsumemi.src.tsumemi.problem import ProblemSource
 
     PathLike = str | os.PathLike[str]
 
 
+# Milliseconds between collecting the files found by a folder scan
+SCAN_POLL_INTERVAL = 50
+# Milliseconds between collecting the changes found by a folder watcher
+WATCH_POLL_INTERVAL = 1000
+
+
 class ProblemListController:
     """Controller object for a problem list. Handles access to its
     underlying problem list (model).
@@ -26,6 +35,9 @@ class ProblemListController:
     def __init__(self) -> None:
         self.problem_list: ProblemList = ProblemList()
         self.viewmodel = ProblemListViewModel(self.problem_list)
+        self.problem_list_pane: ProblemListPane | None = None
+        self.scan: files.DirectoryScan | None = None
+        self.watcher: files.FolderWatcher | None = None
 
     def go_next_problem(self) -> Problem | None:
         return self.problem_list.go_to_next()
@@ -54,10 +66,13 @@ class ProblemListController:
 
     def make_problem_list_pane(self, parent: tk.Widget) -> ProblemListPane:
         problem_list_pane = ProblemListPane(parent, self.viewmodel)
+        problem_list_pane.btn_cancel_scan.configure(command=self.cancel_scan)
         self.problem_list.add_observer(problem_list_pane.tvwfrm_problems)
+        self.problem_list_pane = problem_list_pane
         return problem_list_pane
 
     def set_problem_files(self, file_list: Iterable[PathLike]) -> Problem | None:
+        self._close_folder()
         self.problem_list.clear(suppress=True)
         self.problem_list.add_problems(
             (Problem(filepath) for filepath in file_list), suppress=True
@@ -65,6 +80,192 @@ class ProblemListController:
         self.problem_list.sort_by_file()
         return self.go_to_problem(0)
 
+    def set_problem_database(self, db: ProblemSource) -> Problem | None:
+        """Set the problem list to all problems in the database (or
+        other indexed problem source), in the order they are stored.
+        """
+        self._close_folder()
+        self.problem_list.clear(suppress=True)
+        self.problem_list.add_problems(
+            (
+                Problem(db.filepath, db_index=idx, name=db.get_name(idx))
+                for idx in range(len(db))
+            ),
+            suppress=True,
+        )
+        self.problem_list.sort_by_file()
+        return self.go_to_problem(0)
+
+    def set_problem_collection(
+        self, filepath: PathLike, offsets: Iterable[int]
+    ) -> Problem | None:
+        """Set the problem list to the games of a KIF collection file,
+        starting at the given byte offsets.
+        """
+        basename = os.path.basename(os.path.normpath(filepath))
+        self._close_folder()
+        self.problem_list.clear(suppress=True)
+        self.problem_list.add_problems(
+            (
+                Problem(filepath, name=f"{basename} #{num}", offset=offset)
+                for num, offset in enumerate(offsets, start=1)
+            ),
+            suppress=True,
+        )
+        self.problem_list.sort_by_file()
+        return self.go_to_problem(0)
+
+    def save_as_database(self, db_path: PathLike) -> int:
+        """Write the problems read from files, including games of a
+        KIF collection, into a new problem database in list order.
+        Problems already in a database and games that cannot be decoded
+        are left out. Returns the number of records written.
+        """
+        with tsudb.ProblemDatabaseWriter(db_path) as writer:
+            for prob in self.problem_list:
+                if prob.is_in_database():
+                    continue
+                if prob.offset is None:
+                    writer.add_kif_file(prob.filepath)
+                    continue
+                game = kif.read_kif_at(prob.filepath, prob.offset)
+                if game is not None:
+                    writer.add_game(game, prob.name)
+            return len(writer)
+
+    def scan_problem_files(self, directory: PathLike, recursive: bool) -> None:
+        """Set the problem list to the KIF files in the directory,
+        listed on a worker thread. Problems are added in batches as
+        they are found, and the first one is shown at once; the list is
+        sorted when the scan ends. Needs the problem list pane, whose
+        event loop collects the batches.
+        """
+        self._close_folder()
+        self.problem_list.clear()
+        self.scan = files.DirectoryScan(directory, recursive)
+        self.scan.start()
+        self._poll_scan_later(self.scan)
+
+    def poll_scan(self) -> bool:
+        """Add the problems found by the folder scan since the last
+        poll. Returns True once the scan has ended.
+        """
+        scan = self.scan
+        if scan is None:
+            return True
+        is_done = scan.is_done()
+        found = scan.take_found()
+        if found:
+            self.problem_list.append_problems(Problem(filepath) for filepath in found)
+            if self.problem_list.curr_prob is None:
+                self.go_to_problem(0)
+        if is_done:
+            self._finish_scan()
+            # After a cancel, the files left out should stay out
+            if scan.error is None and not scan.is_cancelled():
+                self.watch_folder(scan.directory, scan.recursive)
+            return True
+        if self.problem_list_pane is not None:
+            self.problem_list_pane.show_scan_progress(len(self.problem_list))
+        return False
+
+    def cancel_scan(self) -> None:
+        """Stop the folder scan, keeping the problems found so far."""
+        if self.scan is None:
+            return
+        self.scan.cancel()
+        self.poll_scan()  # collect files found since the last poll
+        self._finish_scan()
+
+    def _poll_scan_later(self, scan: files.DirectoryScan) -> None:
+        pane = self.problem_list_pane
+        if pane is None:
+            return
+
+        def _poll() -> None:
+            # A newer scan or a cancel supersedes this one
+            if scan is self.scan and not self.poll_scan():
+                pane.after(SCAN_POLL_INTERVAL, _poll)
+
+        pane.after(SCAN_POLL_INTERVAL, _poll)
+
+    def _finish_scan(self) -> None:
+        if self.scan is None:
+            return
+        self.scan = None
+        if self.problem_list_pane is not None:
+            self.problem_list_pane.hide_scan_progress()
+        self.problem_list.sort_by_file()
+
+    def watch_folder(self, directory: PathLike, recursive: bool) -> None:
+        """Keep the problem list up to date with the KIF files in the
+        directory as they are added, removed or modified, keeping the
+        order and results of the other problems. Needs the problem list
+        pane, whose event loop collects the changes.
+        """
+        self._stop_watching()
+        self.watcher = files.FolderWatcher(
+            directory,
+            recursive,
+            known_files=(prob.filepath for prob in self.problem_list),
+        )
+        self.watcher.start()
+        self._poll_watcher_later(self.watcher)
+
+    def poll_watcher(self) -> None:
+        """Apply the changes found by the folder watcher since the last
+        poll.
+        """
+        if self.watcher is None:
+            return
+        for changes in self.watcher.take_changes():
+            self.apply_folder_changes(changes)
+
+    def apply_folder_changes(self, changes: files.FolderChanges) -> None:
+        """Remove, reset and add problems for the files removed,
+        modified and added in the open folder. Modified problems lose
+        their results; new problems are added at the end.
+        """
+        self.problem_list.remove_problems(self._find_problems(changes.removed))
+        self.problem_list.reset_problems(self._find_problems(changes.modified))
+        self.problem_list.append_problems(
+            Problem(filepath) for filepath in changes.added
+        )
+
+    def _find_problems(self, filepaths: Iterable[str]) -> Iterator[int]:
+        for filepath in filepaths:
+            idx = self.problem_list.index_of(Problem(filepath))
+            if idx is not None:
+                yield idx
+
+    def _poll_watcher_later(self, watcher: files.FolderWatcher) -> None:
+        pane = self.problem_list_pane
+        if pane is None:
+            return
+
+        def _poll() -> None:
+            if watcher is self.watcher:
+                self.poll_watcher()
+                pane.after(WATCH_POLL_INTERVAL, _poll)
+
+        pane.after(WATCH_POLL_INTERVAL, _poll)
+
+    def _stop_watching(self) -> None:
+        if self.watcher is None:
+            return
+        self.watcher.stop()
+        self.watcher = None
+
+    def _close_folder(self) -> None:
+        # Drop the scan and watcher without touching the problem list
+        self._stop_watching()
+        if self.scan is None:
+            return
+        self.scan.cancel()
+        self.scan = None
+        if self.problem_list_pane is not None:
+            self.problem_list_pane.hide_scan_progress()
+
     def export_as_csv(self, filepath: PathLike) -> None:
         with open(filepath, mode="w", newline="", encoding="utf-8") as csvfile:
             csvwriter = csv.writer(csvfile, delimiter=",")
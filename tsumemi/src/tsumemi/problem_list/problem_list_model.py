@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import bisect
+import itertools
 import random
 import re
 
@@ -11,13 +13,25 @@ from tsumemi.src.tsumemi import timer
 from tsumemi.src.tsumemi.problem import ProblemStatus
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Iterable, Iterator
+    from collections.abc import Callable, Iterable, Iterator, Sequence
     import os
-    from typing import Any
-    from tsumemi.src.tsumemi.problem import Problem
+    from typing import Any, Tuple
+    from tsumemi.src.tsumemi.problem import Problem, ProblemId
 
     NaturalSortKey = list[int | str]
     PathLike = str | os.PathLike[str]
+    SortKey = Tuple[Any, ...]
+    # The sort key, then a serial number and the id of the problem
+    SortEntry = Tuple[Any, ...]
+
+
+# Columns a problem list can be sorted by, see `ProblemList.sort_by_columns`
+SORT_COLUMNS = ("file", "time", "status")
+# Statuses sort in alphabetical order of their names
+STATUS_SORT_ORDER = {
+    status: rank
+    for rank, status in enumerate(sorted(ProblemStatus, key=lambda s: s.name))
+}
 
 
 class ProbSelectedEvent(evt.Event):
@@ -33,6 +47,39 @@ class ProbListEvent(evt.Event):
         self.sender = sender
 
 
+class ProbsAddedEvent(evt.Event):
+    """Problems were appended to the list, from index `start_idx` on.
+    Sent instead of a `ProbListEvent` so views can add just those.
+    """
+
+    def __init__(self, sender: ProblemList, start_idx: int) -> None:
+        evt.Event.__init__(self)
+        self.sender = sender
+        self.start_idx = start_idx
+
+
+class ProbsRemovedEvent(evt.Event):
+    """The problems at `idxs` (ascending, as indices before removal)
+    were removed from the list.
+    """
+
+    def __init__(self, sender: ProblemList, idxs: list[int]) -> None:
+        evt.Event.__init__(self)
+        self.sender = sender
+        self.idxs = idxs
+
+
+class ProbsModifiedEvent(evt.Event):
+    """The files of the problems at `idxs` changed, and their results
+    were cleared.
+    """
+
+    def __init__(self, sender: ProblemList, idxs: list[int]) -> None:
+        evt.Event.__init__(self)
+        self.sender = sender
+        self.idxs = idxs
+
+
 class ProbStatusEvent(evt.Event):
     def __init__(self, prob_idx: int, status: ProblemStatus) -> None:
         evt.Event.__init__(self)
@@ -47,10 +94,83 @@ class ProbTimeEvent(evt.Event):
         self.time = time
 
 
+class SortIndex:
+    """The ids of a set of problems in order of a sort key, kept in
+    order as problems are added, removed or changed, so that the sorted
+    order can be read off without sorting again. Ties are kept in the
+    order the problems were added.
+    """
+
+    def __init__(
+        self, key: Callable[[Problem], SortKey], problems: Iterable[Problem] = ()
+    ) -> None:
+        self.key = key
+        self._serials = itertools.count()
+        self._entries: list[SortEntry] = []
+        self._entries_by_id: dict[ProblemId, SortEntry] = {}
+        self.add(problems)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ids(self) -> Iterator[ProblemId]:
+        return (entry[-1] for entry in self._entries)
+
+    def runs(self) -> Iterator[list[ProblemId]]:
+        """Yield the ids in sorted order, in runs of problems with
+        equal sort keys.
+        """
+        for _, run in itertools.groupby(self._entries, key=lambda entry: entry[:-2]):
+            yield [entry[-1] for entry in run]
+
+    def add(self, problems: Iterable[Problem]) -> None:
+        new_entries = []
+        for prob in problems:
+            prob_id = prob.id
+            if prob_id in self._entries_by_id:
+                continue
+            entry = self.key(prob) + (next(self._serials), prob_id)
+            self._entries_by_id[prob_id] = entry
+            new_entries.append(entry)
+        if new_entries:
+            # Sorting merges the new run into the already sorted entries
+            self._entries.extend(new_entries)
+            self._entries.sort()
+
+    def remove(self, prob_ids: Iterable[ProblemId]) -> None:
+        removed = {
+            prob_id for prob_id in prob_ids if prob_id in self._entries_by_id
+        }
+        if not removed:
+            return
+        for prob_id in removed:
+            del self._entries_by_id[prob_id]
+        self._entries = [entry for entry in self._entries if entry[-1] not in removed]
+
+    def update(self, prob: Problem) -> None:
+        """Move the problem to its place for its current sort key."""
+        old_entry = self._entries_by_id.get(prob.id)
+        if old_entry is None:
+            return
+        entry = self.key(prob) + old_entry[-2:]
+        if entry == old_entry:
+            return
+        del self._entries[bisect.bisect_left(self._entries, old_entry)]
+        bisect.insort(self._entries, entry)
+        self._entries_by_id[prob.id] = entry
+
+
 class ProblemList(evt.Emitter):
     """Represent a sortable list of problems with a "pointer" to the
     current active problem. Also stores metadata about problem like
     solve time and status.
+
+    The index of each problem is kept in a map by problem id, so that
+    problems can be looked up without scanning the list. Sorting and
+    shuffling reorder the list by a permutation of its indices.
+
+    Solving statistics should be changed through the list, not on the
+    problems directly, so that its sort indices are kept up to date.
     """
 
     @staticmethod
@@ -61,13 +181,32 @@ class ProblemList(evt.Emitter):
 
     @staticmethod
     def _file_key(prob: Problem) -> NaturalSortKey:
-        return ProblemList.natural_sort_key(str(prob.filepath))
+        key = ProblemList.natural_sort_key(str(prob.filepath))
+        if prob.db_index is not None:
+            key.append(prob.db_index)
+        if prob.offset is not None:
+            key.append(prob.offset)
+        return key
+
+    @staticmethod
+    def _time_key(prob: Problem) -> timer.Time:
+        return timer.Time(-1.0) if prob.time is None else prob.time
+
+    @staticmethod
+    def _status_key(prob: Problem) -> int:
+        return STATUS_SORT_ORDER[prob.status]
 
     def __init__(self, problems: list[Problem] | None = None) -> None:
         evt.Emitter.__init__(self)
         self.problems: list[Problem] = [] if problems is None else problems
         self.curr_prob: Problem | None = None
         self.curr_prob_idx: int | None = None
+        self._idxs_by_id: dict[ProblemId, int] = {}
+        # Natural sort keys are slow to compute and never change
+        self._file_keys: dict[ProblemId, NaturalSortKey] = {}
+        # Created by the first sort by each combination of columns
+        self._sort_indices: dict[tuple[str, ...], SortIndex] = {}
+        self._index_from(0)
 
     def __iter__(self) -> Iterator[Problem]:
         return self.problems.__iter__()
@@ -77,6 +216,9 @@ class ProblemList(evt.Emitter):
 
     def clear(self, suppress: bool = False) -> None:
         self.problems = []
+        self._idxs_by_id = {}
+        self._file_keys = {}
+        self._sort_indices = {}
         self.curr_prob = None
         self.curr_prob_idx = None
         if not suppress:
@@ -85,12 +227,14 @@ class ProblemList(evt.Emitter):
     def clear_statuses(self, suppress: bool = False) -> None:
         for prob in self.problems:
             prob.status = ProblemStatus.NONE
+        self._drop_sort_indices("status")
         if not suppress:
             self._notify_observers(ProbListEvent(self))
 
     def clear_times(self, suppress: bool = False) -> None:
         for prob in self.problems:
             prob.time = None
+        self._drop_sort_indices("time")
         if not suppress:
             self._notify_observers(ProbListEvent(self))
 
@@ -99,17 +243,97 @@ class ProblemList(evt.Emitter):
 
     def add_problem(self, new_problem: Problem, suppress: bool = False) -> None:
         self.problems.append(new_problem)
+        self._index_from(len(self.problems) - 1)
         if not suppress:
             self._notify_observers(ProbListEvent(self))
 
     def add_problems(
         self, new_problems: Iterable[Problem], suppress: bool = False
     ) -> None:
+        start_idx = len(self.problems)
         self.problems.extend(new_problems)
+        self._index_from(start_idx)
         if not suppress:
             self._notify_observers(ProbListEvent(self))
 
+    def append_problems(self, new_problems: Iterable[Problem]) -> None:
+        """Add problems to the end of the list, notifying observers of
+        only the added problems.
+        """
+        start_idx = len(self.problems)
+        self.problems.extend(new_problems)
+        self._index_from(start_idx)
+        if len(self.problems) > start_idx:
+            self._notify_observers(ProbsAddedEvent(self, start_idx))
+
+    def remove_problems(self, idxs: Iterable[int]) -> None:
+        """Remove the problems at the given indices, notifying
+        observers of only those. If the current problem is removed,
+        there is no current problem afterwards.
+        """
+        removed_idxs = sorted(set(idxs))
+        if not removed_idxs:
+            return
+        removed = set(removed_idxs)
+        removed_ids = [self.problems[idx].id for idx in removed_idxs]
+        for index in self._sort_indices.values():
+            index.remove(removed_ids)
+        for prob_id in removed_ids:
+            self._file_keys.pop(prob_id, None)
+        self.problems = [
+            prob for idx, prob in enumerate(self.problems) if idx not in removed
+        ]
+        self._reindex()
+        if self.curr_prob_idx is not None:
+            if self.curr_prob_idx in removed:
+                self.curr_prob = None
+                self.curr_prob_idx = None
+            else:
+                self.curr_prob_idx -= bisect.bisect_left(
+                    removed_idxs, self.curr_prob_idx
+                )
+        self._notify_observers(ProbsRemovedEvent(self, removed_idxs))
+
+    def reset_problems(self, idxs: Iterable[int]) -> None:
+        """Clear the results of the problems at the given indices, e.g.
+        because their files changed, notifying observers of only those.
+        """
+        reset_idxs = sorted(set(idxs))
+        if not reset_idxs:
+            return
+        for idx in reset_idxs:
+            self.problems[idx].status = ProblemStatus.NONE
+            self.problems[idx].time = None
+            self._update_sort_indices(self.problems[idx])
+        self._notify_observers(ProbsModifiedEvent(self, reset_idxs))
+
+    def _index_from(self, start_idx: int) -> None:
+        for idx in range(start_idx, len(self.problems)):
+            self._idxs_by_id[self.problems[idx].id] = idx
+        for index in self._sort_indices.values():
+            index.add(self.problems[start_idx:])
+
+    def _reindex(self) -> None:
+        self._idxs_by_id = {prob.id: idx for idx, prob in enumerate(self.problems)}
+
+    def _update_sort_indices(self, prob: Problem) -> None:
+        for index in self._sort_indices.values():
+            index.update(prob)
+
+    def _drop_sort_indices(self, column: str) -> None:
+        self._sort_indices = {
+            columns: index
+            for columns, index in self._sort_indices.items()
+            if column not in columns
+        }
+
     # === Getters/queries
+    def index_of(self, prob: Problem) -> int | None:
+        """Return the index of the problem in the list, or None if it
+        is not in the list.
+        """
+        return self._idxs_by_id.get(prob.id)
+
     def get_curr_filepath(self) -> PathLike | None:
         if self.curr_prob is None:
             return None
@@ -121,12 +345,14 @@ class ProblemList(evt.Emitter):
         if self.curr_prob is not None:
             assert self.curr_prob_idx is not None  # for mypy
             self.curr_prob.status = status
+            self._update_sort_indices(self.curr_prob)
             self._notify_observers(ProbStatusEvent(self.curr_prob_idx, status))
 
     def set_time(self, time: timer.Time) -> None:
         if self.curr_prob is not None:
             assert self.curr_prob_idx is not None  # for mypy
             self.curr_prob.time = time
+            self._update_sort_indices(self.curr_prob)
             self._notify_observers(ProbTimeEvent(self.curr_prob_idx, time))
 
     # === Navigation methods
@@ -155,42 +381,94 @@ class ProblemList(evt.Emitter):
         )
 
     # === Sorting methods
+    def reorder(self, order: list[int], suppress: bool = False) -> None:
+        """Rearrange the problem list so that the problem at index
+        `order[i]` moves to index `i`, keeping focus on the same
+        problem. `order` must be a permutation of the list's indices.
+        """
+        if len(order) != len(self.problems):
+            raise ValueError("Order must be a permutation of the problem indices")
+        problems = self.problems
+        self.problems = [problems[idx] for idx in order]
+        self._reindex()
+        self._set_active_problem(self.curr_prob)
+        if not suppress:
+            self._notify_observers(ProbListEvent(self))
+
     def sort(self, key: Callable[[Problem], Any], suppress: bool = False) -> None:
         """Sort problem list in place, keeping focus on the same
         problem before and after the sort."""
-        old_prob = self.curr_prob
-        self.problems.sort(key=key)
-        self._set_active_problem(old_prob)
-        if not suppress:
-            self._notify_observers(ProbListEvent(self))
+        problems = self.problems
+        order = sorted(range(len(problems)), key=lambda idx: key(problems[idx]))
+        self.reorder(order, suppress)
+
+    def sort_by_columns(self, columns: Sequence[str], suppress: bool = False) -> None:
+        """Sort problem list in place by each of the columns in turn
+        (see `SORT_COLUMNS`), keeping focus on the same problem. Like
+        `sort`, the sort is stable: ties keep their current order. The
+        sorted order for each combination of columns is kept from the
+        first such sort on, so sorting again only orders the ties.
+        """
+        columns = tuple(columns)
+        index = self._sort_indices.get(columns)
+        if index is None:
+            index = SortIndex(self._make_sort_key(columns), self.problems)
+            self._sort_indices[columns] = index
+        if len(index) != len(self.problems):
+            # The same problem is in the list more than once
+            return self.sort(index.key, suppress)
+        idxs_by_id = self._idxs_by_id
+        order: list[int] = []
+        for run in index.runs():
+            run_idxs = [idxs_by_id[prob_id] for prob_id in run]
+            if len(run_idxs) > 1:
+                run_idxs.sort()
+            order.extend(run_idxs)
+        self.reorder(order, suppress)
 
     def sort_by_file(self) -> None:
-        return self.sort(key=ProblemList._file_key)
+        return self.sort_by_columns(("file",))
 
     def sort_by_time(self) -> None:
-        return self.sort(key=lambda p: timer.Time(-1.0) if p.time is None else p.time)
+        return self.sort_by_columns(("time",))
 
     def sort_by_status(self) -> None:
-        return self.sort(key=lambda p: p.status.name)
+        return self.sort_by_columns(("status",))
+
+    def _cached_file_key(self, prob: Problem) -> NaturalSortKey:
+        prob_id = prob.id
+        key = self._file_keys.get(prob_id)
+        if key is None:
+            key = self._file_keys[prob_id] = ProblemList._file_key(prob)
+        return key
+
+    def _make_sort_key(self, columns: tuple[str, ...]) -> Callable[[Problem], SortKey]:
+        column_keys: dict[str, Callable[[Problem], Any]] = {
+            "file": self._cached_file_key,
+            "time": ProblemList._time_key,
+            "status": ProblemList._status_key,
+        }
+        unknown = [column for column in columns if column not in column_keys]
+        if unknown:
+            raise ValueError(f"Cannot sort by {', '.join(unknown)}")
+        keys = [column_keys[column] for column in columns]
+        return lambda prob: tuple(key(prob) for key in keys)
 
     def randomise(self) -> None:
         """Randomly shuffle problem list in place, keeping focus on
         the same problem before and after the shuffle.
         """
-        idxed_problems = list(enumerate(self.problems))
-        random.shuffle(idxed_problems)
-        idxs, probs = zip(*idxed_problems)
-        self.problems = list(probs)
-        self.curr_prob_idx = idxs.index(self.curr_prob_idx)
-        self._notify_observers(ProbListEvent(self))
+        order = list(range(len(self.problems)))
+        random.shuffle(order)
+        self.reorder(order)
 
     def _set_active_problem(self, prob: Problem | None) -> bool:
         if prob is None:
             self.curr_prob = None
             return True
-        if prob not in self.problems:
+        idx = self.index_of(prob)
+        if idx is None:
             return False
-        idx = self.problems.index(prob)
         self.curr_prob_idx = idx
         self.curr_prob = self.problems[self.curr_prob_idx]
         return True
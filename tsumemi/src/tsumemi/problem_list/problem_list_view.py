@@ -32,6 +32,9 @@ class ProblemsTreeviewFrame(utils.ScrollableTreeviewFrame, evt.IObserver):
                 plist.ProbStatusEvent: self.display_status,
                 plist.ProbTimeEvent: self.display_time,
                 plist.ProbListEvent: self.refresh_view,
+                plist.ProbsAddedEvent: self.add_rows,
+                plist.ProbsRemovedEvent: self.remove_rows,
+                plist.ProbsModifiedEvent: self.update_rows,
             }
         )
 
@@ -138,16 +141,37 @@ class ProblemsTreeviewFrame(utils.ScrollableTreeviewFrame, evt.IObserver):
         problem_list = event.sender
         self.clear_treeview()
         for problem in problem_list:
-            time_str = (
-                "-" if problem.time is None else problem.time.to_hms_str(places=1)
-            )
-            status_str = self.status_strings[problem.status]
-            tag_list = [problem.status.name]
-            self.tvw.insert(
-                "", "end", values=(problem.name, time_str, status_str), tags=tag_list
-            )
+            self._insert_row(problem)
         self.refresh_vsb()
 
+    def add_rows(self, event: plist.ProbsAddedEvent) -> None:
+        # Only append rows for the new problems, e.g. during a folder scan
+        for problem in event.sender.problems[event.start_idx :]:
+            self._insert_row(problem)
+        self.refresh_vsb()
+
+    def remove_rows(self, event: plist.ProbsRemovedEvent) -> None:
+        iids = self.tvw.get_children()
+        self.tvw.delete(*(iids[idx] for idx in event.idxs))
+        self.refresh_vsb()
+
+    def update_rows(self, event: plist.ProbsModifiedEvent) -> None:
+        iids = self.tvw.get_children()
+        for idx in event.idxs:
+            values, tags = self._row_values(event.sender.problems[idx])
+            self.tvw.item(iids[idx], values=values, tags=tags)
+
+    def _insert_row(self, problem: pb.Problem) -> None:
+        values, tags = self._row_values(problem)
+        self.tvw.insert("", "end", values=values, tags=tags)
+
+    def _row_values(
+        self, problem: pb.Problem
+    ) -> tuple[tuple[str, str, str], list[str]]:
+        time_str = "-" if problem.time is None else problem.time.to_hms_str(places=1)
+        status_str = self.status_strings[problem.status]
+        return (problem.name, time_str, status_str), [problem.status.name]
+
     def _idx_to_iid(self, idx: int) -> str:
         return self.tvw.get_children()[idx]
 
@@ -169,8 +193,22 @@ class ProblemListPane(ttk.Frame):
         self.btn_randomise: ttk.Button = ttk.Button(
             self, text="Randomise problems", command=viewmodel.randomise
         )
+        # Shown only while a folder is being scanned
+        self.frm_scan: ttk.Frame = ttk.Frame(self)
+        self.lbl_scan: ttk.Label = ttk.Label(self.frm_scan)
+        self.btn_cancel_scan: ttk.Button = ttk.Button(self.frm_scan, text="Cancel")
+        self.lbl_scan.grid(row=0, column=0)
+        self.btn_cancel_scan.grid(row=0, column=1)
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=0)
+        self.grid_rowconfigure(2, weight=0)
         self.tvwfrm_problems.grid(row=0, column=0, sticky="NSEW")
         self.btn_randomise.grid(row=1, column=0)
+
+    def show_scan_progress(self, num_found: int) -> None:
+        self.lbl_scan.configure(text=f"Scanning folder: {num_found} problems found")
+        self.frm_scan.grid(row=2, column=0)
+
+    def hide_scan_progress(self) -> None:
+        self.frm_scan.grid_remove()
@@ -73,6 +73,8 @@ class SpeedrunController(evt.IObserver):
 
     def start_speedrun(self) -> None:
         self.target.main_problem_list_controller.go_to_problem(idx=0)
+        # The timer starts right away, so the problem must be up already
+        self.target.finish_showing_problem()
         self.target.main_game.set_speedrun_mode()
         self.target.main_viewcon.disable_problem_list_input()
         self.target.main_viewcon.allow_only_pause_timer()
@@ -82,6 +84,7 @@ class SpeedrunController(evt.IObserver):
         )
         self.target.main_timer.reset()
         self.start_timer()
+        self.target.prefetch_next_problems()
         self.go_to_state("question")
 
     def abort_speedrun(self) -> None:
@@ -93,6 +96,7 @@ class SpeedrunController(evt.IObserver):
             self.target.root, self.target.bindings.FREE_SHORTCUTS
         )
         self.target.main_game.set_free_mode()
+        self.target.prefetcher.clear()
         self.enable_move_navigation()
         self.target.main_viewcon.enable_problem_list_input()
         self.go_to_state("off")
@@ -107,6 +111,9 @@ class SpeedrunController(evt.IObserver):
                 message="You have reached the end of the speedrun.",
             )
             self.abort_speedrun()
+        else:
+            self.target.finish_showing_problem()
+            self.target.prefetch_next_problems()
         return next_problem is not None
 
     def show_solution(self) -> None:
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+from typing import TYPE_CHECKING
+
+from tsumemi.src.shogi.arena_gametree import ArenaGameTree
+from tsumemi.src.shogi.basetypes import Side
+from tsumemi.src.shogi.game import Game
+from tsumemi.src.shogi.move import unpack_move
+from tsumemi.src.shogi.parsing import kif
+from tsumemi.src.shogi.position import Position
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import TracebackType
+    from typing import BinaryIO, Dict, List, Optional, Type
+
+    PathLike = str | os.PathLike[str]
+
+
+# File layout, all integers little-endian:
+#   header: magic, format version, number of records, offset of index,
+#       offset of name index
+#   records, back to back
+#   names, back to back as UTF-8
+#   index: (number of records + 1) 64-bit offsets; record i spans
+#       index[i] to index[i + 1]
+#   name index: (number of records + 1) 64-bit offsets, laid out like
+#       the index; lets the names be listed without unpacking records
+TSUDB_EXTENSION = ".tsudb"
+TSUDB_MAGIC = b"TSDB"
+TSUDB_FORMAT_VERSION = 2
+_FILE_HEADER = struct.Struct("<4sHIQQ")
+_INDEX_ENTRY = struct.Struct("<Q")
+
+# Record layout: side to move, move number, number of mainline moves,
+# length of variations blob, length of metadata; then the board (one
+# byte per square), both hands (one byte per piece type), the packed
+# mainline moves as 32-bit ints, the variations blob and the metadata
+# (player names, handicap and header fields) as JSON. The variations blob is an ArenaGameTree, stored only if the
+# game has variations or comments.
+_RECORD_HEADER = struct.Struct("<BHIII")
+_BOARD_LENGTH = 81
+_HAND_LENGTH = 7
+
+
+class TsudbError(Exception):
+    pass
+
+
+class ProblemRecord:
+    """One problem read from a problem database."""
+
+    def __init__(
+        self,
+        start_sfen: str,
+        mainline: array[int],
+        name: str,
+        headers: Dict[str, str],
+        variations: Optional[ArenaGameTree] = None,
+        sente: str = "",
+        gote: str = "",
+        handicap: str = "",
+    ) -> None:
+        self.start_sfen: str = start_sfen
+        self.mainline: array[int] = mainline
+        self.name: str = name
+        self.headers: Dict[str, str] = headers
+        self.variations: Optional[ArenaGameTree] = variations
+        self.sente: str = sente
+        self.gote: str = gote
+        self.handicap: str = handicap
+
+    def to_game(self) -> Game:
+        """Return a new Game of the problem, at the start."""
+        if self.variations is not None:
+            game = self.variations.to_game()
+        else:
+            game = Game()
+            game.movetree.start_pos = self.start_sfen
+            game.position.from_sfen(self.start_sfen)
+            for packed in self.mainline:
+                game.add_move(unpack_move(packed))
+            game.go_to_start()
+        movetree = game.movetree
+        movetree.sente = self.sente
+        movetree.gote = self.gote
+        movetree.handicap = self.handicap
+        movetree.headers = dict(self.headers)
+        return game
+
+
+def _pack_record(game: Game) -> bytes:
+    movetree = game.movetree
+    start_pos = Position()
+    start_pos.from_sfen(movetree.start_pos)
+    board, hand_sente, hand_gote, turn, movenum = start_pos.to_snapshot()
+    nodes = movetree.traverse_mainline()
+    next(nodes)  # exclude the root node
+    mainline = array("I", (node.move.pack() for node in nodes))
+    if sys.byteorder == "big":
+        mainline.byteswap()
+    has_extras = any(
+        node.comment or node.has_variations() for node in movetree.traverse_preorder()
+    )
+    variations = ArenaGameTree.from_game(game).to_bytes() if has_extras else b""
+    metadata = json.dumps(
+        {
+            "sente": movetree.sente,
+            "gote": movetree.gote,
+            "handicap": movetree.handicap,
+            "headers": movetree.headers,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    return b"".join(
+        (
+            _RECORD_HEADER.pack(
+                turn, movenum, len(mainline), len(variations), len(metadata)
+            ),
+            board,
+            hand_sente,
+            hand_gote,
+            mainline.tobytes(),
+            variations,
+            metadata,
+        )
+    )
+
+
+def _unpack_record(data: bytes, name: str) -> ProblemRecord:
+    turn, movenum, num_moves, variations_length, metadata_length = (
+        _RECORD_HEADER.unpack_from(data)
+    )
+    offset = _RECORD_HEADER.size
+    board = data[offset : offset + _BOARD_LENGTH]
+    offset += _BOARD_LENGTH
+    hand_sente = data[offset : offset + _HAND_LENGTH]
+    offset += _HAND_LENGTH
+    hand_gote = data[offset : offset + _HAND_LENGTH]
+    offset += _HAND_LENGTH
+    mainline = array("I")
+    mainline.frombytes(data[offset : offset + 4 * num_moves])
+    if sys.byteorder == "big":
+        mainline.byteswap()
+    offset += 4 * num_moves
+    variations = None
+    if variations_length:
+        try:
+            variations = ArenaGameTree.from_bytes(
+                data[offset : offset + variations_length]
+            )
+        except ValueError as exc:
+            raise TsudbError("Corrupt variations in problem record") from exc
+    offset += variations_length
+    try:
+        metadata = json.loads(data[offset : offset + metadata_length])
+        headers = metadata["headers"]
+        sente, gote, handicap = (
+            metadata["sente"], metadata["gote"], metadata["handicap"]
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        raise TsudbError("Corrupt metadata in problem record") from exc
+    start_pos = Position()
+    start_pos.from_snapshot((board, hand_sente, hand_gote, Side(turn), movenum))
+    return ProblemRecord(
+        start_pos.to_sfen(),
+        mainline,
+        name,
+        headers,
+        variations,
+        sente=sente,
+        gote=gote,
+        handicap=handicap,
+    )
+
+
+class ProblemDatabaseWriter:
+    """Writes games into a new problem database file, one record per
+    game. The index is written when the writer is closed; use it as a
+    context manager.
+    """
+
+    def __init__(self, filepath: PathLike) -> None:
+        self.filepath: PathLike = filepath
+        self._file: BinaryIO = open(filepath, "wb")
+        self._offsets: List[int] = []
+        self._names: List[bytes] = []
+        self._file.write(
+            _FILE_HEADER.pack(TSUDB_MAGIC, TSUDB_FORMAT_VERSION, 0, 0, 0)
+        )
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __enter__(self) -> ProblemDatabaseWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def add_game(self, game: Game, name: str) -> int:
+        """Append the game as a new record and return its index."""
+        self._offsets.append(self._file.tell())
+        self._file.write(_pack_record(game))
+        self._names.append(name.encode("utf-8"))
+        return len(self._offsets) - 1
+
+    def add_kif_file(self, filepath: PathLike) -> Optional[int]:
+        """Read the KIF file and append it as a new record named after
+        the file. Returns the index of the record, or None if the file
+        cannot be decoded.
+        """
+        game = kif.read_kif(filepath)
+        if game is None:
+            return None
+        return self.add_game(game, os.path.basename(os.path.normpath(filepath)))
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        name_offsets = []
+        for name in self._names:
+            name_offsets.append(self._file.tell())
+            self._file.write(name)
+        index_offset = self._file.tell()
+        name_offsets.append(index_offset)
+        for offset in self._offsets + [name_offsets[0]]:
+            self._file.write(_INDEX_ENTRY.pack(offset))
+        name_index_offset = self._file.tell()
+        for offset in name_offsets:
+            self._file.write(_INDEX_ENTRY.pack(offset))
+        self._file.seek(0)
+        self._file.write(
+            _FILE_HEADER.pack(
+                TSUDB_MAGIC,
+                TSUDB_FORMAT_VERSION,
+                len(self._offsets),
+                index_offset,
+                name_index_offset,
+            )
+        )
+        self._file.close()
+
+
+def build_database(db_path: PathLike, filepaths: Iterable[PathLike]) -> int:
+    """Write the KIF files into a new problem database and return the
+    number of records written. Files that cannot be decoded are skipped.
+    """
+    with ProblemDatabaseWriter(db_path) as writer:
+        for filepath in filepaths:
+            writer.add_kif_file(filepath)
+        return len(writer)
+
+
+class ProblemDatabase:
+    """Read-only access to a problem database file. The file is memory
+    mapped, so opening it is cheap however large it is, and any record
+    is read in constant time by its index.
+    """
+
+    def __init__(self, filepath: PathLike) -> None:
+        self.filepath: PathLike = filepath
+        with open(filepath, "rb") as _file:
+            try:
+                self._mmap = mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # empty file
+                raise TsudbError("Not a problem database") from exc
+        try:
+            magic, version, count, index_offset, name_index_offset = (
+                _FILE_HEADER.unpack_from(self._mmap)
+            )
+        except struct.error as exc:
+            self._mmap.close()
+            raise TsudbError("Not a problem database") from exc
+        if magic != TSUDB_MAGIC or version != TSUDB_FORMAT_VERSION:
+            self._mmap.close()
+            raise TsudbError("Not a problem database of a known version")
+        index_length = (count + 1) * _INDEX_ENTRY.size
+        if max(index_offset, name_index_offset) + index_length > len(self._mmap):
+            self._mmap.close()
+            raise TsudbError("Problem database is truncated")
+        self._count: int = count
+        self._index_offset: int = index_offset
+        self._name_index_offset: int = name_index_offset
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> ProblemDatabase:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def _get_offset(self, index_offset: int, idx: int) -> int:
+        offset: int = _INDEX_ENTRY.unpack_from(
+            self._mmap, index_offset + idx * _INDEX_ENTRY.size
+        )[0]
+        return offset
+
+    def _get_span(self, index_offset: int, idx: int) -> bytes:
+        if not 0 <= idx < self._count:
+            raise IndexError(f"Problem database has no record {idx}")
+        start = self._get_offset(index_offset, idx)
+        end = self._get_offset(index_offset, idx + 1)
+        return self._mmap[start:end]
+
+    def get_record(self, idx: int) -> ProblemRecord:
+        return _unpack_record(
+            self._get_span(self._index_offset, idx), self.get_name(idx)
+        )
+
+    def read_game(self, idx: int) -> Game:
+        return self.get_record(idx).to_game()
+
+    def get_name(self, idx: int) -> str:
+        """Return the name of a record. Names are kept apart from the
+        records, so this does not touch the record itself.
+        """
+        try:
+            return self._get_span(self._name_index_offset, idx).decode("utf-8")
+        except UnicodeDecodeError as exc:
+            raise TsudbError("Corrupt name in problem database") from exc
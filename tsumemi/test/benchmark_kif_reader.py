@@ -0,0 +1,59 @@
+"""Time KIF parsing over the sample problems and the test KIFs.
+
+Run from the repository root with
+    python -m tsumemi.test.benchmark_kif_reader [repeats]
+Each file is read `repeats` times and its best time kept. Reports the
+median and mean of those per-file times, for `read_kif` and for the
+reader alone on already decoded text.
+"""
+import glob
+import io
+import statistics
+import sys
+import timeit
+
+import tsumemi.src.shogi.parsing.kif as kif
+
+from tsumemi.src.shogi.parsing.base_readers_visitors import GameBuilderPVis
+from tsumemi.src.shogi.parsing.kif_reader import KifReader
+
+
+def find_kif_files():
+    filepaths = sorted(glob.glob("./sample_problems/**/*.kif", recursive=True))
+    filepaths += sorted(glob.glob("./tsumemi/test/test_kifus/*.kif*"))
+    # testbranch.kif has a handicap the reader does not know
+    return [filepath for filepath in filepaths if "testbranch" not in filepath]
+
+
+def best_time_us(func, repeats):
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1e6
+
+
+def report(name, times):
+    print(
+        f"{name:16} median {statistics.median(times):8.1f} us/file,"
+        f" mean {statistics.mean(times):8.1f} us/file"
+    )
+
+
+def main(repeats=20):
+    filepaths = find_kif_files()
+    read_kif_times = []
+    reader_times = []
+    for filepath in filepaths:
+        with open(filepath, "rb") as f:
+            text = kif.decode_kif(f.read())
+        read_kif_times.append(best_time_us(lambda: kif.read_kif(filepath), repeats))
+        reader_times.append(
+            best_time_us(
+                lambda: KifReader().read(io.StringIO(text), GameBuilderPVis()),
+                repeats,
+            )
+        )
+    print(f"{len(filepaths)} files, best of {repeats} each")
+    report("read_kif", read_kif_times)
+    report("KifReader.read", reader_times)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
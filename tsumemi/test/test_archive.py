@@ -0,0 +1,92 @@
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from concurrent.futures import ThreadPoolExecutor
+
+import tsumemi.src.shogi.parsing.kif as kif
+
+from tsumemi.src.tsumemi import archive
+from tsumemi.src.tsumemi.problem_list.problem_list_controller import (
+    ProblemListController,
+)
+
+
+TEST_KIFS = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)] + [
+    "./tsumemi/test/test_kifus/testlinear.kifu",
+    "./tsumemi/test/test_kifus/branchedgame.kif",
+]
+
+
+class TestKifArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.member_names = [
+            "pack/" + os.path.basename(filepath) for filepath in TEST_KIFS
+        ]
+        self.zip_path = os.path.join(self.tmpdir.name, "pack.zip")
+        with zipfile.ZipFile(self.zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("pack/readme.txt", "not a problem")
+            for filepath, name in zip(TEST_KIFS, self.member_names):
+                zf.write(filepath, name)
+        self.tar_path = os.path.join(self.tmpdir.name, "pack.tar.gz")
+        with tarfile.open(self.tar_path, "w:gz") as tf:
+            for filepath, name in zip(TEST_KIFS, self.member_names):
+                tf.add(filepath, name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_members_match_files(self):
+        for archive_path in (self.zip_path, self.tar_path):
+            with archive.KifArchive(archive_path) as pack:
+                self.assertEqual(len(pack), len(TEST_KIFS))
+                # Read out of order to exercise random access
+                for idx in reversed(range(len(pack))):
+                    with self.subTest(archive=archive_path, idx=idx):
+                        self.assertEqual(
+                            pack.get_member_name(idx), self.member_names[idx]
+                        )
+                        self.assertEqual(
+                            pack.get_name(idx), os.path.basename(TEST_KIFS[idx])
+                        )
+                        expected = kif.read_kif(TEST_KIFS[idx])
+                        self.assertEqual(
+                            pack.read_game(idx).movetree.to_latin(),
+                            expected.movetree.to_latin(),
+                        )
+                with self.assertRaises(IndexError):
+                    pack.read_game(len(pack))
+
+    def test_concurrent_reads(self):
+        with archive.KifArchive(self.zip_path) as pack:
+            expected = [pack.read_bytes(idx) for idx in range(len(pack))]
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                actual = list(executor.map(pack.read_bytes, list(range(len(pack))) * 5))
+        self.assertEqual(actual, expected * 5)
+
+    def test_not_an_archive(self):
+        filepath = os.path.join(self.tmpdir.name, "broken.zip")
+        with open(filepath, "wb") as f:
+            f.write(b"not a zip file")
+        self.assertTrue(archive.is_archive(filepath))
+        with self.assertRaises(archive.ArchiveError):
+            archive.KifArchive(filepath)
+
+    def test_problem_list_from_archive(self):
+        controller = ProblemListController()
+        with archive.KifArchive(self.zip_path) as pack:
+            controller.set_problem_database(pack)
+            self.assertEqual(len(controller.problem_list), len(TEST_KIFS))
+            self.assertEqual(
+                sorted(prob.name for prob in controller.problem_list),
+                sorted(os.path.basename(filepath) for filepath in TEST_KIFS),
+            )
+            for prob in controller.problem_list:
+                self.assertTrue(prob.is_in_database())
+
+
+if __name__ == "__main__":
+    unittest.main()
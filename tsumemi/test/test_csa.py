@@ -0,0 +1,180 @@
+import io
+import os
+import tempfile
+import unittest
+
+import tsumemi.src.shogi.parsing.csa as csa
+import tsumemi.src.shogi.parsing.kif as kif
+
+from tsumemi.src.shogi.basetypes import GameTermination
+from tsumemi.src.shogi.parsing.csa_writer import write_csa, write_csa_games
+
+
+KIF_FILEPATHS = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)] + [
+    "./tsumemi/test/test_kifus/testlinear.kifu",
+    "./tsumemi/test/test_kifus/branchedgame.kif",
+]
+
+EVEN_GAME_CSA = """V2.2
+N+sente player
+N-gote player
+$EVENT:test event
+$FOO:bar
+'a comment
+PI
++
++7776FU
+T12
+-3334FU,T3
++8822UM
+-3122GI
++0045KA
+%TORYO
+"""
+
+TSUME_CSA = """V2.2
+P1 *  *  *  *  *  *  *  *  * 
+P2 *  *  *  * -OU *  *  *  * 
+P3 *  *  *  *  *  *  *  *  * 
+P4 *  *  *  * +GI *  *  *  * 
+P5 *  *  *  *  *  *  *  *  * 
+P6 *  *  *  *  *  *  *  *  * 
+P7 *  *  *  *  *  *  *  *  * 
+P8 *  *  *  *  *  *  *  *  * 
+P9 *  *  *  *  *  *  *  *  * 
+P+00KI00GI
+P-00AL
++
++0053GI
+"""
+
+
+def read_csa_text(text):
+    return csa.read_csa_bytes(text.encode("utf-8"))
+
+
+def mainline_moves(game):
+    return [node.move for node in game.movetree.traverse_mainline()][1:]
+
+
+class TestCsaReader(unittest.TestCase):
+    def test_even_game(self):
+        game = read_csa_text(EVEN_GAME_CSA)
+        movetree = game.movetree
+        self.assertEqual(movetree.sente, "sente player")
+        self.assertEqual(movetree.gote, "gote player")
+        self.assertEqual(movetree.headers["棋戦"], "test event")
+        self.assertEqual(movetree.headers["$FOO"], "bar")
+        self.assertEqual(
+            movetree.start_pos,
+            "lnsgkgsnl/1r5b1/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/LNSGKGSNL b - 1",
+        )
+        moves = mainline_moves(game)
+        self.assertEqual(len(moves), 6)
+        self.assertTrue(moves[2].is_promotion)
+        self.assertTrue(moves[4].is_drop)
+        self.assertEqual(moves[-1].end, GameTermination.RESIGN)
+        game.go_to_end()
+        self.assertEqual(
+            game.get_current_sfen(),
+            "lnsgkg1nl/1r5s1/pppppp1pp/6p2/5B3/2P6/PP1PPPPPP/7R1/LNSGKGSNL w b 7",
+        )
+
+    def test_board_and_hands(self):
+        game = read_csa_text(TSUME_CSA)
+        expected = kif.read_kif("./tsumemi/test/test_kifus/1.kif")
+        self.assertEqual(game.movetree.start_pos, expected.movetree.start_pos)
+        self.assertEqual(mainline_moves(game), mainline_moves(expected)[:1])
+
+    def test_handicap_position(self):
+        game = read_csa_text("PI82HI22KA\n-\n-3334FU\n")
+        self.assertEqual(
+            game.movetree.start_pos,
+            "lnsgkgsnl/9/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/LNSGKGSNL w - 1",
+        )
+
+    def test_illegal_action(self):
+        game = read_csa_text("PI\n+\n+7776FU\n%+ILLEGAL_ACTION\n")
+        self.assertEqual(mainline_moves(game)[-1].end, GameTermination.ILLEGAL_WIN)
+        game = read_csa_text("PI\n+\n+7776FU\n%-ILLEGAL_ACTION\n")
+        self.assertEqual(mainline_moves(game)[-1].end, GameTermination.ILLEGAL_LOSS)
+
+    def test_terminations(self):
+        for text, expected in (
+            ("%HIKIWAKE", GameTermination.HIKIWAKE),
+            ("%MATTA", GameTermination.MATTA),
+            ("%FUZUMI", GameTermination.FUZUMI),
+            ("%ERROR", GameTermination.ABORT),
+            ("%NOT_A_TERMINATION", GameTermination.ABORT),
+        ):
+            with self.subTest(text=text):
+                game = read_csa_text("PI\n+\n+7776FU\n" + text + "\n")
+                self.assertEqual(mainline_moves(game)[-1].end, expected)
+
+    def test_comma_in_header(self):
+        game = read_csa_text(
+            "N+Habu, Yoshiharu\n$EVENT:Meijin, game 1\nPI\n+\n+7776FU,T1\n"
+        )
+        self.assertEqual(game.movetree.sente, "Habu, Yoshiharu")
+        self.assertEqual(game.movetree.headers["棋戦"], "Meijin, game 1")
+        self.assertEqual(len(mainline_moves(game)), 1)
+
+    def test_invalid_records(self):
+        for text in (
+            "PI\n+\n+5554FU\n",
+            "PI\n+\n+0055OU\n",
+            "PI\n+\n+7776XX\n",
+        ):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    read_csa_text(text)
+
+    def test_multiple_games(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "games.csa")
+            with open(filepath, "w", encoding="utf-8") as f:
+                f.write(EVEN_GAME_CSA + "/\n" + TSUME_CSA + "/\n\n")
+            games = list(csa.read_csa_games(filepath))
+        self.assertEqual(len(games), 2)
+        self.assertEqual(len(mainline_moves(games[0])), 6)
+        self.assertEqual(len(mainline_moves(games[1])), 1)
+
+
+class TestCsaWriter(unittest.TestCase):
+    def test_roundtrip_kif_files(self):
+        for filepath in KIF_FILEPATHS:
+            with self.subTest(filepath=filepath):
+                game = kif.read_kif(filepath)
+                handle = io.StringIO()
+                write_csa(game, handle)
+                restored = read_csa_text(handle.getvalue())
+                self.assertEqual(restored.movetree.start_pos, game.movetree.start_pos)
+                self.assertEqual(mainline_moves(restored), mainline_moves(game))
+                self.assertEqual(restored.movetree.sente, game.movetree.sente)
+                self.assertEqual(restored.movetree.gote, game.movetree.gote)
+
+    def test_roundtrip_csa(self):
+        game = read_csa_text(EVEN_GAME_CSA)
+        handle = io.StringIO()
+        write_csa(game, handle)
+        text = handle.getvalue()
+        self.assertIn("PI\n+\n+7776FU\n", text)
+        self.assertIn("$EVENT:test event\n", text)
+        self.assertIn("$FOO:bar\n", text)
+        self.assertTrue(text.endswith("+0045KA\n%TORYO\n"))
+
+    def test_write_games(self):
+        games = [kif.read_kif(filepath) for filepath in KIF_FILEPATHS[:3]]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "games.csa")
+            with open(filepath, "w", encoding="utf-8") as f:
+                self.assertEqual(write_csa_games(games, f), 3)
+            restored = list(csa.read_csa_games(filepath))
+        self.assertEqual(
+            [mainline_moves(game) for game in restored],
+            [mainline_moves(game) for game in games],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import time
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import tsumemi.src.shogi.parsing.kif as kif
+
+from tsumemi.src.tsumemi import ingest
+
+
+TEST_KIFS = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)] + [
+    "./tsumemi/test/test_kifus/testlinear.kifu",
+    "./tsumemi/test/test_kifus/branchedgame.kif",
+]
+
+
+def mainline_sfens(game):
+    game.go_to_start()
+    sfens = [game.get_current_sfen()]
+    while not game.curr_node.is_leaf():
+        game.go_next_move()
+        sfens.append(game.get_current_sfen())
+    return sfens
+
+
+class TestIngest(unittest.TestCase):
+    def test_ingest_file_matches_read_kif(self):
+        for filename in TEST_KIFS:
+            with self.subTest(filename=filename):
+                result = ingest.ingest_file(filename)
+                self.assertTrue(result.is_ok())
+                expected = kif.read_kif(filename)
+                game = result.to_game()
+                self.assertEqual(game.movetree.start_pos, expected.movetree.start_pos)
+                expected_sfens = mainline_sfens(expected)
+                self.assertEqual(mainline_sfens(game), expected_sfens)
+                self.assertEqual(result.num_moves, len(expected_sfens) - 1)
+
+    def test_headers(self):
+        result = ingest.ingest_file("./tsumemi/test/test_kifus/testlinear.kifu")
+        self.assertEqual(result.headers["先手"], "Kanazawa Level 45")
+        self.assertEqual(result.headers["後手"], "Illya")
+        self.assertEqual(result.headers["開始日時"], "2020/11/23")
+        game = kif.read_kif("./tsumemi/test/test_kifus/testlinear.kifu")
+        self.assertEqual(game.movetree.sente, "Kanazawa Level 45")
+        self.assertEqual(game.movetree.gote, "Illya")
+
+    def test_bad_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            undecodable = os.path.join(tmpdir, "undecodable.kif")
+            with open(undecodable, "wb") as f:
+                f.write(b"\x81 \x82\n")
+            missing = os.path.join(tmpdir, "missing.kif")
+            for filename in (undecodable, missing):
+                with self.subTest(filename=filename):
+                    result = ingest.ingest_file(filename)
+                    self.assertFalse(result.is_ok())
+                    self.assertEqual(result.num_moves, 0)
+
+    def test_ingest_files(self):
+        progress = []
+        results = list(ingest.ingest_files(
+            TEST_KIFS,
+            progress=lambda done, total: progress.append((done, total)),
+            max_workers=2,
+            chunksize=3,
+        ))
+        self.assertCountEqual(
+            [result.filepath for result in results], TEST_KIFS
+        )
+        self.assertTrue(all(result.is_ok() for result in results))
+        self.assertEqual(
+            progress, [(i, len(TEST_KIFS)) for i in range(1, len(TEST_KIFS) + 1)]
+        )
+
+    def test_stop_early(self):
+        ingest_chunk = ingest._ingest_chunk
+        chunks_started = []
+
+        def slow_ingest_chunk(chunk):
+            chunks_started.append(chunk)
+            time.sleep(0.05)
+            return ingest_chunk(chunk)
+
+        filepaths = TEST_KIFS * 5
+        # Threads stand in for processes so the chunks can be counted
+        with mock.patch.object(
+            ingest, "ProcessPoolExecutor", ThreadPoolExecutor
+        ), mock.patch.object(ingest, "_ingest_chunk", slow_ingest_chunk):
+            results = ingest.ingest_files(filepaths, max_workers=1, chunksize=1)
+            next(results)
+            results.close()
+            num_started = len(chunks_started)
+            time.sleep(0.2)
+        self.assertLess(num_started, len(filepaths))
+        self.assertLessEqual(len(chunks_started), num_started + 1)
+
+    def test_bad_chunksize(self):
+        for chunksize in (0, -1):
+            with self.subTest(chunksize=chunksize):
+                with self.assertRaises(ValueError):
+                    next(ingest.ingest_files(TEST_KIFS, chunksize=chunksize))
+
+    def test_ingest_no_files(self):
+        self.assertEqual(list(ingest.ingest_files([])), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
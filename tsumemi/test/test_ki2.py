@@ -0,0 +1,113 @@
+import io
+import itertools
+import unittest
+
+import tsumemi.src.shogi.parsing.ki2 as ki2
+import tsumemi.src.shogi.parsing.kif as kif
+
+from tsumemi.src.shogi.basetypes import GameTermination, KomaType, Side
+from tsumemi.src.shogi.parsing.base_readers_visitors import GameBuilderPVis
+from tsumemi.src.shogi.parsing.ki2_reader import (
+    Ki2Reader,
+    parse_ki2_move,
+    read_ki2_termination,
+)
+from tsumemi.src.shogi.position import Position
+from tsumemi.src.shogi.square import Square
+
+
+def read_ki2_text(text):
+    return Ki2Reader().read(io.StringIO(text), GameBuilderPVis())
+
+
+class TestKi2Reader(unittest.TestCase):
+    def test_same_game_as_kif(self):
+        for name in ("branchedgame", "3"):
+            with self.subTest(name=name):
+                game = ki2.read_ki2(f"./tsumemi/test/test_kifus/{name}.ki2")
+                expected = kif.read_kif(f"./tsumemi/test/test_kifus/{name}.kif")
+                self.assertEqual(game.movetree.to_latin(), expected.movetree.to_latin())
+                self.assertEqual(game.movetree.start_pos, expected.movetree.start_pos)
+                self.assertEqual(game.movetree.headers, expected.movetree.headers)
+
+    def test_moves_across_lines(self):
+        game = read_ki2_text(
+            "手合割：平手\n"
+            "▲７六歩    △３四歩    ▲２二角成\n"
+            "△同　銀    ▲４五角\n"
+            "まで5手で中断\n"
+        )
+        self.assertEqual(
+            game.movetree.to_latin(),
+            "1.P76(77) 2.P34(33) 3.B22(88)+ 4.S22(31) 5.B*45 6.ABORT",
+        )
+
+    def test_unreadable_move(self):
+        with self.assertRaises(ValueError):
+            read_ki2_text("▲７六歩    △３四歩    ▲２二角まる\n")
+        with self.assertRaises(ValueError):
+            read_ki2_text("▲５五歩\n")  # no pawn can reach 55
+
+    def test_termination_lines(self):
+        cases = (
+            ("まで84手で後手の勝ち", GameTermination.RESIGN),
+            ("まで3手で中断", GameTermination.ABORT),
+            ("まで29手で詰み", GameTermination.MATE),
+            ("まで60手で千日手", GameTermination.SENNICHITE),
+            ("まで90手で時間切れにより先手の勝ち", GameTermination.FLAG),
+            ("まで10手で先手の反則勝ち", GameTermination.ILLEGAL_WIN),
+        )
+        for line, termination in cases:
+            with self.subTest(line=line):
+                self.assertEqual(read_ki2_termination(line), termination)
+        self.assertIsNone(read_ki2_termination("まで10手"))
+
+
+class TestKi2MoveResolution(unittest.TestCase):
+    def setUp(self):
+        self.position = Position()
+
+    def test_disambiguation_cases(self):
+        # The test cases of the Japanese move writer, read back
+        test_data_file = r"tsumemi/test/test_cases_japanese_notation.txt"
+        with open(test_data_file, encoding="utf8") as fh:
+            for line1, line2, line3, _ in itertools.zip_longest(*[iter(fh)] * 4):
+                start_coord, end_coord, promotion, movestr = line3.split()
+                self.position.from_sfen(line2.rstrip())
+                start_sq = Square.from_coord(int(start_coord))
+                move = self.position.create_move(
+                    start_sq, Square.from_coord(int(end_coord)), promotion == "+"
+                )
+                mark = "▲" if move.side == Side.SENTE else "△"
+                with self.subTest(msg=line1.rstrip(), movestr=movestr):
+                    self.assertEqual(
+                        parse_ki2_move(self.position, mark + movestr), move
+                    )
+
+    def test_drop_needs_no_marker_unless_ambiguous(self):
+        sfen = r"9/7+R1/sS1+p1+P2+R/2p+P1+P3/SS1n+pn3/9/9/9/3N5 b 2S2s 1"
+        self.position.from_sfen(sfen)
+        drop = self.position.create_drop_move(Side.SENTE, KomaType.GI, Square.b84)
+        self.assertEqual(parse_ki2_move(self.position, "▲８四銀打"), drop)
+        drop = self.position.create_drop_move(Side.SENTE, KomaType.GI, Square.b15)
+        self.assertEqual(parse_ki2_move(self.position, "▲１五銀"), drop)
+
+    def test_pinned_piece_is_not_ambiguous(self):
+        # The gold on 68 is pinned by the bishop on 86, so only the gold
+        # on 48 can go to 58 and the move needs no 右
+        self.position.from_sfen("9/9/9/9/9/1b7/9/3G1G3/4K4 b - 1")
+        move = self.position.create_move(Square.b48, Square.b58)
+        self.assertEqual(parse_ki2_move(self.position, "▲５八金"), move)
+
+    def test_ambiguous_move(self):
+        self.position.from_sfen("9/9/9/9/9/9/9/3G1G3/4K4 b - 1")
+        with self.assertRaises(ValueError):
+            parse_ki2_move(self.position, "▲５八金")
+        self.assertEqual(
+            parse_ki2_move(self.position, "▲５八金右"),
+            self.position.create_move(Square.b48, Square.b58),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
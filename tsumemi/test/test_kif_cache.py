@@ -0,0 +1,233 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest import mock
+
+import tsumemi.src.shogi.parsing.kif as kif
+
+from tsumemi.src.tsumemi import kif_cache
+
+
+TEST_KIFS = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)]
+BRANCHED_KIF = "./tsumemi/test/test_kifus/branchedgame.kif"
+
+
+class TestKifCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "cache.sqlite3")
+        self.cache = kif_cache.KifCache(self.db_path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def copy_kif(self, src, name="problem.kif"):
+        dst = os.path.join(self.tmpdir.name, name)
+        shutil.copyfile(src, dst)
+        return dst
+
+    def read_counting_parses(self, cache, filepath):
+        with mock.patch.object(
+            kif, "read_kif_bytes", wraps=kif.read_kif_bytes
+        ) as read_kif_bytes:
+            game = cache.read_kif(filepath)
+        return game, read_kif_bytes.call_count
+
+    def test_hit_skips_parsing(self):
+        filepath = self.copy_kif(BRANCHED_KIF)
+        game, num_parses = self.read_counting_parses(self.cache, filepath)
+        self.assertEqual(num_parses, 1)
+        cached_game, num_parses = self.read_counting_parses(self.cache, filepath)
+        self.assertEqual(num_parses, 0)
+        self.assertEqual(cached_game.movetree.to_latin(), game.movetree.to_latin())
+        self.assertEqual(cached_game.get_current_sfen(), game.get_current_sfen())
+        self.assertEqual(cached_game.movetree.headers, game.movetree.headers)
+
+    def test_persists_across_instances(self):
+        filepath = self.copy_kif(TEST_KIFS[0])
+        self.cache.read_kif(filepath)
+        self.cache.close()
+        self.cache = kif_cache.KifCache(self.db_path)
+        self.assertEqual(len(self.cache), 1)
+        _, num_parses = self.read_counting_parses(self.cache, filepath)
+        self.assertEqual(num_parses, 0)
+
+    def test_modified_file_is_reparsed(self):
+        filepath = self.copy_kif(TEST_KIFS[0])
+        self.cache.read_kif(filepath)
+        shutil.copyfile(TEST_KIFS[1], filepath)
+        game, num_parses = self.read_counting_parses(self.cache, filepath)
+        self.assertEqual(num_parses, 1)
+        expected = kif.read_kif(TEST_KIFS[1])
+        self.assertEqual(game.movetree.to_latin(), expected.movetree.to_latin())
+
+    def test_content_hash_fallback(self):
+        filepath = self.copy_kif(TEST_KIFS[0])
+        self.cache.read_kif(filepath)
+        stat = os.stat(filepath)
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        _, num_parses = self.read_counting_parses(self.cache, filepath)
+        self.assertEqual(num_parses, 0)
+        copied = self.copy_kif(TEST_KIFS[0], "copied.kif")
+        _, num_parses = self.read_counting_parses(self.cache, copied)
+        self.assertEqual(num_parses, 0)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_lru_eviction(self):
+        filepaths = [
+            self.copy_kif(src, f"{i}.kif") for i, src in enumerate(TEST_KIFS[:3])
+        ]
+        for filepath in filepaths:
+            self.cache.read_kif(filepath)
+        self.cache.read_kif(filepaths[0])  # most recently used now
+        self.cache.max_bytes = self.cache.total_bytes - 1
+        self.cache.read_kif(self.copy_kif(TEST_KIFS[3], "3.kif"))
+        self.assertLessEqual(self.cache.total_bytes, self.cache.max_bytes)
+        _, num_parses = self.read_counting_parses(self.cache, filepaths[0])
+        self.assertEqual(num_parses, 0)
+        _, num_parses = self.read_counting_parses(self.cache, filepaths[1])
+        self.assertEqual(num_parses, 1)
+
+    def test_undecodable_file(self):
+        filepath = os.path.join(self.tmpdir.name, "undecodable.kif")
+        with open(filepath, "wb") as f:
+            f.write(b"\x81 \x82\n")
+        self.assertIsNone(self.cache.read_kif(filepath))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_corrupt_cache_file_is_replaced(self):
+        self.cache.close()
+        with open(self.db_path, "wb") as f:
+            f.write(b"not a database" * 100)
+        self.cache = kif_cache.KifCache(self.db_path)
+        self.assertEqual(len(self.cache), 0)
+        self.assertIsNotNone(self.cache.read_kif(self.copy_kif(TEST_KIFS[0])))
+
+
+class TestOpenKifCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_default_path_in_user_cache_dir(self):
+        cache_home = os.path.join(self.tmpdir.name, "cache home")
+        with mock.patch.object(kif_cache.sys, "platform", "linux"), mock.patch.dict(
+            os.environ, {"XDG_CACHE_HOME": cache_home}
+        ):
+            cache = kif_cache.open_kif_cache()
+        try:
+            self.assertEqual(
+                cache.db_path,
+                os.path.join(cache_home, "tsumemi", kif_cache.KIF_CACHE_FILENAME),
+            )
+            self.assertTrue(os.path.isfile(cache.db_path))
+        finally:
+            cache.close()
+
+    def test_creates_parent_directory(self):
+        db_path = os.path.join(self.tmpdir.name, "a", "b", "cache.sqlite3")
+        cache = kif_cache.KifCache(db_path)
+        cache.close()
+        self.assertTrue(os.path.isfile(db_path))
+
+    def test_unopenable_cache(self):
+        not_a_dir = os.path.join(self.tmpdir.name, "file")
+        with open(not_a_dir, "w") as f:
+            f.write("")
+        with self.assertLogs("tsumemi.src.tsumemi.kif_cache", level="ERROR"):
+            cache = kif_cache.open_kif_cache(os.path.join(not_a_dir, "cache.sqlite3"))
+        self.assertIsNone(cache)
+
+
+class TestGameCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.loaded = []
+        self.cache = kif_cache.GameCache(self.load)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def load(self, filepath):
+        self.loaded.append(filepath)
+        return kif.read_kif(filepath)
+
+    def copy_kif(self, src, name="problem.kif"):
+        dst = os.path.join(self.tmpdir.name, name)
+        shutil.copyfile(src, dst)
+        return dst
+
+    def test_hit_skips_loading(self):
+        filepath = self.copy_kif(BRANCHED_KIF)
+        game = self.cache.read_kif(filepath)
+        cached_game = self.cache.read_kif(filepath)
+        self.assertEqual(len(self.loaded), 1)
+        self.assertEqual(cached_game.movetree.to_latin(), game.movetree.to_latin())
+        self.assertEqual(cached_game.movetree.headers, game.movetree.headers)
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 1, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+        self.assertEqual(stats.total_bytes, self.cache.total_bytes)
+        self.assertGreater(stats.total_bytes, 0)
+
+    def test_reads_are_copies(self):
+        filepath = self.copy_kif(TEST_KIFS[0])
+        expected = self.cache.read_kif(filepath).movetree.to_latin()
+        other_move = kif.read_kif(TEST_KIFS[1]).movetree.variations[0].move
+        for _ in range(2):
+            game = self.cache.read_kif(filepath)
+            self.assertEqual(game.movetree.to_latin(), expected)
+            # As free mode would, add a move that is not in the problem
+            game.movetree.add_move(other_move)
+            self.assertNotEqual(game.movetree.to_latin(), expected)
+        self.assertEqual(len(self.loaded), 1)
+
+    def test_modified_file_is_reloaded(self):
+        filepath = self.copy_kif(TEST_KIFS[0])
+        self.cache.read_kif(filepath)
+        shutil.copyfile(TEST_KIFS[1], filepath)
+        game = self.cache.read_kif(filepath)
+        self.assertEqual(len(self.loaded), 2)
+        expected = kif.read_kif(TEST_KIFS[1])
+        self.assertEqual(game.movetree.to_latin(), expected.movetree.to_latin())
+        # The outdated entry is dropped, not kept until evicted
+        self.assertEqual(len(self.cache), 1)
+
+    def test_lru_eviction(self):
+        filepaths = [
+            self.copy_kif(src, f"{i}.kif") for i, src in enumerate(TEST_KIFS[:3])
+        ]
+        for filepath in filepaths:
+            self.cache.read_kif(filepath)
+        self.cache.read_kif(filepaths[0])  # most recently used now
+        self.cache.max_bytes = self.cache.total_bytes - 1
+        self.cache.read_kif(self.copy_kif(TEST_KIFS[3], "3.kif"))
+        self.assertLessEqual(self.cache.total_bytes, self.cache.max_bytes)
+        self.loaded.clear()
+        self.cache.read_kif(filepaths[0])
+        self.assertEqual(self.loaded, [])
+        self.cache.read_kif(filepaths[1])
+        self.assertEqual(len(self.loaded), 1)
+
+    def test_entry_over_budget_is_not_kept(self):
+        self.cache.max_bytes = 1
+        filepath = self.copy_kif(TEST_KIFS[0])
+        self.assertIsNotNone(self.cache.read_kif(filepath))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.total_bytes, 0)
+
+    def test_undecodable_file(self):
+        filepath = os.path.join(self.tmpdir.name, "undecodable.kif")
+        with open(filepath, "wb") as f:
+            f.write(b"\x81 \x82\n")
+        self.assertIsNone(self.cache.read_kif(filepath))
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
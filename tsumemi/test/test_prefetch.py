@@ -0,0 +1,168 @@
+import threading
+import unittest
+
+import tsumemi.src.shogi.parsing.kif as kif
+
+from tsumemi.src.tsumemi.prefetch import (
+    LoadedProblem,
+    ProblemLoader,
+    ProblemPrefetcher,
+)
+from tsumemi.src.tsumemi.problem import Problem
+
+
+TEST_KIFS = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)]
+
+
+class TestProblemPrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.load_threads = []
+        self.prefetcher = ProblemPrefetcher(self.load)
+        self.problems = [Problem(filepath) for filepath in TEST_KIFS]
+
+    def tearDown(self):
+        self.prefetcher.close()
+
+    def load(self, prob):
+        self.load_threads.append(threading.get_ident())
+        if prob.filepath.endswith("missing.kif"):
+            raise FileNotFoundError(prob.filepath)
+        game = kif.read_kif(prob.filepath)
+        return LoadedProblem(game, game.movetree.to_latin())
+
+    def test_take_prefetched(self):
+        self.prefetcher.prefetch(self.problems[:3])
+        self.assertEqual(len(self.prefetcher), 3)
+        self.assertTrue(self.prefetcher.wait(timeout=10))
+        for prob in self.problems[:3]:
+            loaded = self.prefetcher.take(prob)
+            self.assertEqual(
+                loaded.solution, kif.read_kif(prob.filepath).movetree.to_latin()
+            )
+        self.assertEqual(len(self.prefetcher), 0)
+        self.assertNotIn(threading.get_ident(), self.load_threads)
+
+    def test_take_not_prefetched(self):
+        self.prefetcher.prefetch(self.problems[:2])
+        self.assertTrue(self.prefetcher.wait(timeout=10))
+        self.assertIsNone(self.prefetcher.take(self.problems[5]))
+        # Taken problems are not kept
+        self.assertIsNotNone(self.prefetcher.take(self.problems[0]))
+        self.assertIsNone(self.prefetcher.take(self.problems[0]))
+
+    def test_window_moves(self):
+        self.prefetcher.prefetch(self.problems[0:3])
+        self.prefetcher.prefetch(self.problems[1:4])
+        self.assertEqual(len(self.prefetcher), 3)
+        self.assertTrue(self.prefetcher.wait(timeout=10))
+        self.assertIsNone(self.prefetcher.take(self.problems[0]))
+        for prob in self.problems[1:4]:
+            self.assertIsNotNone(self.prefetcher.take(prob))
+
+    def test_failed_load(self):
+        missing = Problem("./tsumemi/test/test_kifus/missing.kif")
+        self.prefetcher.prefetch([missing])
+        self.assertTrue(self.prefetcher.wait(timeout=10))
+        with self.assertLogs("tsumemi.src.tsumemi.prefetch", level="ERROR"):
+            self.assertIsNone(self.prefetcher.take(missing))
+
+    def test_load_not_started(self):
+        blocker = threading.Event()
+        self.prefetcher.load = lambda prob: blocker.wait(10)
+        self.prefetcher.prefetch(self.problems[:2])
+        # The second load waits behind the first, so it is left to the
+        # caller rather than waited for
+        self.assertIsNone(self.prefetcher.take(self.problems[1]))
+        blocker.set()
+        self.assertTrue(self.prefetcher.take(self.problems[0]))
+
+    def test_clear(self):
+        self.prefetcher.prefetch(self.problems[:3])
+        self.prefetcher.clear()
+        self.assertEqual(len(self.prefetcher), 0)
+        self.assertIsNone(self.prefetcher.take(self.problems[0]))
+
+
+class TestProblemLoader(unittest.TestCase):
+    def setUp(self):
+        self.loaded = []
+        self.loader = ProblemLoader(self.load)
+        self.problems = [Problem(filepath) for filepath in TEST_KIFS]
+
+    def tearDown(self):
+        self.loader.close()
+
+    def load(self, prob):
+        self.loaded.append(prob)
+        if prob.filepath.endswith("missing.kif"):
+            raise FileNotFoundError(prob.filepath)
+        game = kif.read_kif(prob.filepath)
+        return LoadedProblem(game, game.movetree.to_latin())
+
+    def test_take_requested(self):
+        self.assertIsNone(self.loader.take())
+        self.loader.request(self.problems[0])
+        self.assertTrue(self.loader.is_pending())
+        prob, loaded = self.loader.take(timeout=10)
+        self.assertIs(prob, self.problems[0])
+        self.assertEqual(
+            loaded.solution, kif.read_kif(prob.filepath).movetree.to_latin()
+        )
+        self.assertFalse(self.loader.is_pending())
+        self.assertIsNone(self.loader.take())
+
+    def test_only_latest_request_is_taken(self):
+        blocker = threading.Event()
+        load = self.loader.load
+        self.loader.load = lambda prob: blocker.wait(10) and load(prob)
+        generations = [self.loader.request(prob) for prob in self.problems]
+        self.assertEqual(generations, sorted(set(generations)))
+        blocker.set()
+        prob, loaded = self.loader.take(timeout=10)
+        self.assertIs(prob, self.problems[-1])
+        self.assertIsNotNone(loaded)
+        # Superseded loads never got past the one already running
+        self.assertLessEqual(len(self.loaded), 2)
+        self.assertIs(self.loaded[-1], self.problems[-1])
+        self.assertIsNone(self.loader.take(timeout=10))
+
+    def test_request_again(self):
+        started = threading.Event()
+        blocker = threading.Event()
+        load = self.loader.load
+
+        def blocked_load(prob):
+            started.set()
+            blocker.wait(10)
+            return load(prob)
+
+        self.loader.load = blocked_load
+        self.assertIsNone(self.loader.pending_problem)
+        self.loader.request(self.problems[0])
+        self.assertIs(self.loader.pending_problem, self.problems[0])
+        self.assertTrue(started.wait(10))
+        # As when the notation changes while the problem is loading
+        self.loader.request(self.loader.pending_problem)
+        blocker.set()
+        prob, loaded = self.loader.take(timeout=10)
+        self.assertIs(prob, self.problems[0])
+        self.assertIsNotNone(loaded)
+        self.assertEqual(self.loaded, [self.problems[0], self.problems[0]])
+        self.assertIsNone(self.loader.pending_problem)
+
+    def test_cancel(self):
+        generation = self.loader.request(self.problems[0])
+        self.loader.cancel()
+        self.assertNotEqual(self.loader.generation, generation)
+        self.assertFalse(self.loader.is_pending())
+        self.assertIsNone(self.loader.take(timeout=10))
+
+    def test_failed_load(self):
+        missing = Problem("./tsumemi/test/test_kifus/missing.kif")
+        self.loader.request(missing)
+        with self.assertLogs("tsumemi.src.tsumemi.prefetch", level="ERROR"):
+            self.assertEqual(self.loader.take(timeout=10), (missing, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
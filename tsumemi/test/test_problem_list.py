@@ -1,9 +1,35 @@
 import unittest
 
+from unittest import mock
+
 import tsumemi.src.tsumemi.problem as pb
+import tsumemi.src.tsumemi.timer as timer
 import tsumemi.src.tsumemi.problem_list.problem_list_model as plist
 
 
+class TestProblem(unittest.TestCase):
+    def test_hashable_by_id(self):
+        probs = {
+            pb.Problem("1.kif"): 0,
+            pb.Problem("db.tsudb", db_index=1): 1,
+            pb.Problem("collection.kif", offset=100): 2,
+        }
+        self.assertEqual(probs[pb.Problem("1.kif")], 0)
+        self.assertEqual(probs[pb.Problem("db.tsudb", db_index=1)], 1)
+        self.assertEqual(probs[pb.Problem("collection.kif", offset=100)], 2)
+        self.assertNotIn(pb.Problem("db.tsudb", db_index=2), probs)
+        self.assertNotIn(pb.Problem("collection.kif"), probs)
+
+    def test_results_do_not_affect_identity(self):
+        prob = pb.Problem("1.kif")
+        prob_id = prob.id
+        prob.status = pb.ProblemStatus.CORRECT
+        prob.time = 1.0
+        self.assertEqual(prob.id, prob_id)
+        self.assertEqual(prob, pb.Problem("1.kif"))
+        self.assertEqual(hash(prob), hash(pb.Problem("1.kif")))
+
+
 class TestProblemList(unittest.TestCase):
     """Tests for the internals of the ProblemList class."""
 
@@ -137,6 +163,52 @@ class TestProblemList(unittest.TestCase):
         self.problem_list.add_problems([pb.Problem("new.kif")])
         self.verify_list_event()
 
+    def test_append_problems(self):
+        new_probs = [pb.Problem("new1.kif"), pb.Problem("new2.kif")]
+        self.problem_list.append_problems(new_probs)
+        self.assertEqual(self.problem_list.problems[-2:], new_probs)
+        self.assertTrue(isinstance(self.event, plist.ProbsAddedEvent))
+        self.assertEqual(self.event.start_idx, 8)
+        self.event = None
+        self.problem_list.append_problems([])
+        self.assertIsNone(self.event)
+
+    def test_remove_problems(self):
+        self.problem_list.remove_problems([6, 0, 2])
+        self.assertEqual(
+            [prob.filepath for prob in self.problem_list],
+            ["2.kif", "4.kif", "5.kif", "6.kif", "8.kif"],
+        )
+        self.assertTrue(isinstance(self.event, plist.ProbsRemovedEvent))
+        self.assertEqual(self.event.idxs, [0, 2, 6])
+        self.verify_active_prob_by_prob(pb.Problem("6.kif"))
+        self.problem_list.remove_problems([3])
+        self.assertIsNone(self.problem_list.curr_prob)
+        self.assertIsNone(self.problem_list.curr_prob_idx)
+
+    def test_index_of(self):
+        for idx, prob in enumerate(self.problem_list.problems):
+            self.assertEqual(self.problem_list.index_of(pb.Problem(prob.filepath)), idx)
+        self.assertIsNone(self.problem_list.index_of(pb.Problem("new.kif")))
+        self.problem_list.append_problems([pb.Problem("new.kif")])
+        self.assertEqual(self.problem_list.index_of(pb.Problem("new.kif")), 8)
+        self.problem_list.remove_problems([0])
+        self.assertIsNone(self.problem_list.index_of(pb.Problem("1.kif")))
+        self.assertEqual(self.problem_list.index_of(pb.Problem("new.kif")), 7)
+        self.problem_list.clear()
+        self.assertIsNone(self.problem_list.index_of(pb.Problem("2.kif")))
+
+    def test_reset_problems(self):
+        self.problem_list.reset_problems([1, 4])
+        self.assertTrue(isinstance(self.event, plist.ProbsModifiedEvent))
+        self.assertEqual(self.event.idxs, [1, 4])
+        for idx in (1, 4):
+            self.assertIsNone(self.problem_list.problems[idx].time)
+            self.assertEqual(
+                self.problem_list.problems[idx].status, pb.ProblemStatus.NONE
+            )
+        self.assertEqual(self.problem_list.problems[0].time, 11.1)
+
     def test_get_curr_filepath(self):
         self.assertEqual(self.problem_list.get_curr_filepath(), "6.kif")
 
@@ -235,6 +307,100 @@ class TestProblemList(unittest.TestCase):
         )
         self.verify_active_prob_by_prob(prob)
 
+    def test_reorder(self):
+        order = [7, 6, 5, 4, 3, 2, 1, 0]
+        self.problem_list.reorder(order)
+        self.assertEqual(
+            [p.filepath for p in self.problem_list.problems],
+            list(reversed(self.names_by_file)),
+        )
+        self.verify_active_prob_by_prob(pb.Problem("6.kif"))
+        self.verify_list_event()
+        for idx, prob in enumerate(self.problem_list.problems):
+            self.assertEqual(self.problem_list.index_of(prob), idx)
+        with self.assertRaises(ValueError):
+            self.problem_list.reorder([0, 1])
+
+    def test_randomise(self):
+        prob = self.problem_list.curr_prob
+        self.problem_list.randomise()
+        self.assertEqual(
+            sorted(p.filepath for p in self.problem_list.problems),
+            self.names_by_file,
+        )
+        self.verify_active_prob_by_prob(prob)
+        self.verify_list_event()
+
+    def test_sort_by_columns(self):
+        self.problem_list.go_to_idx(3)
+        self.problem_list.set_time(10.2)  # ties with 8.kif
+        prob = self.problem_list.curr_prob
+        self.problem_list.sort_by_columns(["status", "time", "file"])
+        self.assertEqual(
+            [p.filepath for p in self.problem_list.problems],
+            ["6.kif", "1.kif", "5.kif", "4.kif", "2.kif", "7.kif", "8.kif", "3.kif"],
+        )
+        self.verify_active_prob_by_prob(prob)
+        self.verify_list_event()
+        with self.assertRaises(ValueError):
+            self.problem_list.sort_by_columns(["difficulty"])
+
+    def test_sort_kept_up_to_date(self):
+        # Unlike floats, Times can be compared with a missing time
+        for prob in self.problem_list:
+            prob.time = timer.Time(prob.time)
+        self.problem_list.sort_by_status()
+        self.problem_list.sort_by_time()
+        self.problem_list.go_to_idx(self.problem_list.index_of(pb.Problem("5.kif")))
+        self.problem_list.set_status(pb.ProblemStatus.WRONG)
+        self.problem_list.set_time(timer.Time(1.0))
+        self.problem_list.remove_problems(
+            [self.problem_list.index_of(pb.Problem("8.kif"))]
+        )
+        self.problem_list.append_problems([pb.Problem("0.kif")])
+        self.problem_list.reset_problems(
+            [self.problem_list.index_of(pb.Problem("1.kif"))]
+        )
+        self.problem_list.sort_by_status()
+        expected = [
+            "6.kif", "1.kif", "0.kif", "4.kif", "2.kif", "7.kif", "3.kif", "5.kif"
+        ]
+        self.assertEqual(
+            [p.filepath for p in self.problem_list.problems], expected
+        )
+        self.problem_list.clear_times()
+        self.problem_list.set_time(timer.Time(2.0))
+        self.problem_list.sort_by_time()
+        # All but 5.kif tie, so they keep their order
+        self.assertEqual(
+            [p.filepath for p in self.problem_list.problems], expected
+        )
+
+    def test_sort_is_stable(self):
+        for _ in range(5):
+            self.problem_list.randomise()
+            problems = list(self.problem_list.problems)
+            self.problem_list.sort_by_status()
+            self.assertEqual(
+                self.problem_list.problems,
+                sorted(problems, key=lambda prob: prob.status.name),
+            )
+
+    def test_file_keys_are_cached(self):
+        with mock.patch.object(
+            plist.ProblemList,
+            "natural_sort_key",
+            wraps=plist.ProblemList.natural_sort_key,
+        ) as natural_sort_key:
+            self.problem_list.sort_by_file()
+            self.problem_list.sort_by_status()
+            self.problem_list.randomise()
+            self.problem_list.sort_by_file()
+        self.assertEqual(natural_sort_key.call_count, len(self.problem_list))
+        self.assertEqual(
+            [p.filepath for p in self.problem_list.problems], self.names_by_file
+        )
+
     def test_notify_on_sort(self):
         self.problem_list.sort_by_file()
         self.verify_list_event()
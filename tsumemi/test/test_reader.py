@@ -1,7 +1,20 @@
+import io
+import os
+import tempfile
 import unittest
 
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
 import tsumemi.src.shogi.parsing.kif as kif
 
+from tsumemi.src.tsumemi import files, tsudb
+from tsumemi.src.tsumemi.problem import ProblemStatus
+from tsumemi.src.tsumemi.problem_list.problem_list_model import ProblemList
+from tsumemi.src.tsumemi.problem_list.problem_list_controller import (
+    ProblemListController,
+)
+from tsumemi.src.shogi.move import TerminationMove
 from tsumemi.src.shogi.parsing.kif_reader import KifReader, SFEN_FROM_HANDICAP
 from tsumemi.src.shogi.parsing.base_readers_visitors import GameBuilderPVis
 
@@ -58,4 +71,459 @@ class TestReadKifu(unittest.TestCase):
         visitor = GameBuilderPVis()
         read_file(r"./tsumemi/test/test_kifus/branchedgame.kif", reader, visitor)
         # print(reader.game.position)
-        # print(reader.game.movetree.to_latin())
\ No newline at end of file
+        # print(reader.game.movetree.to_latin())
+
+
+def kif_move_lines(first_movenum, movestrs):
+    return [
+        f"{movenum:>4} {movestr}"
+        for movenum, movestr in enumerate(movestrs, start=first_movenum)
+    ]
+
+
+def shuffling_kings(first_movenum, last_movenum):
+    # Sente's king goes 59-58-59, gote's 51-52-51
+    return [
+        ("５八玉(59)", "５二玉(51)", "５九玉(58)", "５一玉(52)")[(movenum - 3) % 4]
+        for movenum in range(first_movenum, last_movenum + 1)
+    ]
+
+
+class TestKifVariations(unittest.TestCase):
+    # A 30 move mainline, then variations close to the end of the line
+    # being read and far from it
+    text = "\n".join(
+        ["手合割：平手", "手数----指手---------消費時間--"]
+        + kif_move_lines(1, ["７六歩(77)", "３四歩(33)"] + shuffling_kings(3, 30))
+        + ["", "変化：29手"]
+        + kif_move_lines(29, ["６八玉(59)"])
+        + ["", "変化：21手"]
+        + kif_move_lines(21, ["２二角成(88)", "同　銀(31)", "４五角打"])
+        + ["", "変化：23手"]
+        + kif_move_lines(23, ["４八玉(58)"])
+        + ["", "変化：3手"]
+        + kif_move_lines(3, ["２二角成(88)", "同　銀(31)"])
+    )
+
+    def read_text(self, snapshot_interval):
+        reader = KifReader()
+        reader.snapshot_interval = snapshot_interval
+        return reader.read(io.StringIO(self.text), GameBuilderPVis())
+
+    def test_branches(self):
+        game = self.read_text(KifReader.snapshot_interval)
+        self.assertEqual(
+            [len(node.variations) for node in game.movetree.traverse_preorder()
+             if node.has_variations()],
+            [2, 2, 2, 2],
+        )
+        # Each move's captured koma must match the position it was made in
+        for node in game.movetree.traverse_preorder():
+            if node.parent.is_null():
+                continue
+            game.go_to_id(node.parent.id)
+            self.assertEqual(
+                node.move.captured, game.position.get_koma(node.move.end_sq)
+            )
+
+    def test_same_tree_for_any_snapshot_interval(self):
+        expected = self.read_text(1000).movetree.to_latin()
+        for interval in (1, 2, 8):
+            with self.subTest(interval=interval):
+                self.assertEqual(self.read_text(interval).movetree.to_latin(), expected)
+
+    def test_variation_beyond_line(self):
+        reader = KifReader()
+        handle = io.StringIO(self.text + "\n\n変化：40手\n  40 ５八玉(59)\n")
+        with self.assertRaises(ValueError):
+            reader.read(handle, GameBuilderPVis())
+
+
+class TestKifEncoding(unittest.TestCase):
+    def setUp(self):
+        with open(r"./tsumemi/test/test_kifus/1.kif", "rb") as _file:
+            self.cp932_data = _file.read()
+        self.text = self.cp932_data.decode("cp932")
+        self.expected_sfen = self._read_end_sfen(r"./tsumemi/test/test_kifus/1.kif")
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _read_end_sfen(self, filepath):
+        game = kif.read_kif(filepath)
+        game.go_to_end()
+        return game.position.to_sfen()
+
+    def _write(self, data):
+        filepath = os.path.join(self.tmpdir.name, "test.kif")
+        with open(filepath, "wb") as _file:
+            _file.write(data)
+        return filepath
+
+    def test_detect_bom(self):
+        data = b"\xef\xbb\xbf" + self.text.encode("utf-8")
+        self.assertEqual(kif.detect_kif_encoding(data), "utf-8-sig")
+        self.assertEqual(kif.decode_kif(data), self.text)
+
+    def test_detect_header(self):
+        data = "#KIF version=2.0 encoding=UTF-8\n".encode("ascii")
+        self.assertEqual(kif.detect_kif_encoding(data), "utf-8")
+
+    def test_no_declared_encoding(self):
+        self.assertIsNone(kif.detect_kif_encoding(self.cp932_data))
+
+    def test_decode_cp932(self):
+        self.assertEqual(kif.decode_kif(self.cp932_data), self.text)
+
+    def test_read_utf8(self):
+        filepath = self._write(self.text.encode("utf-8"))
+        self.assertEqual(self._read_end_sfen(filepath), self.expected_sfen)
+
+    def test_read_utf8_bom(self):
+        filepath = self._write(b"\xef\xbb\xbf" + self.text.encode("utf-8"))
+        self.assertEqual(self._read_end_sfen(filepath), self.expected_sfen)
+
+    def test_read_undecodable(self):
+        filepath = self._write(b"\x81 \x82\n")
+        self.assertIsNone(kif.read_kif(filepath))
+
+
+class TestReentrantReading(unittest.TestCase):
+    filepaths = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)]
+
+    @staticmethod
+    def _end_sfen(filepath):
+        game = kif.read_kif(filepath)
+        game.go_to_end()
+        return game.position.to_sfen()
+
+    def test_returned_game_unaffected_by_next_read(self):
+        game = kif.read_kif(self.filepaths[0])
+        game.go_to_end()
+        sfen = game.position.to_sfen()
+        other_game = kif.read_kif(self.filepaths[1])
+        self.assertIsNot(game, other_game)
+        self.assertEqual(game.position.to_sfen(), sfen)
+
+    def test_concurrent_reads(self):
+        expected = [self._end_sfen(filepath) for filepath in self.filepaths]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            actual = list(executor.map(self._end_sfen, self.filepaths * 20))
+        self.assertEqual(actual, expected * 20)
+
+
+class TestScanKif(unittest.TestCase):
+    def test_scan_matches_read(self):
+        filepaths = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)] + [
+            "./tsumemi/test/test_kifus/testlinear.kifu",
+            "./tsumemi/test/test_kifus/branchedgame.kif",
+        ]
+        for filepath in filepaths:
+            with self.subTest(filepath=filepath):
+                summary = kif.scan_kif(filepath)
+                game = kif.read_kif(filepath)
+                nodes = list(game.movetree.traverse_mainline())[1:]
+                num_moves = sum(
+                    1 for node in nodes if not isinstance(node.move, TerminationMove)
+                )
+                self.assertIsNone(summary.error)
+                self.assertEqual(summary.num_moves, num_moves)
+                for key, value in game.movetree.headers.items():
+                    self.assertEqual(summary.headers[key], value)
+
+    def test_headers(self):
+        summary = kif.scan_kif("./tsumemi/test/test_kifus/branchedgame.kif")
+        self.assertEqual(summary.handicap, "平手")
+        self.assertEqual(summary.headers["先手"], "hatuyukiuk")
+        self.assertEqual(summary.headers["場所"], "81Dojo")
+        self.assertEqual(summary.author, "")
+
+    def test_without_counting_moves(self):
+        summary = kif.scan_kif("./tsumemi/test/test_kifus/testlinear.kifu", count_moves=False)
+        self.assertIsNone(summary.num_moves)
+        self.assertEqual(summary.headers["後手"], "Illya")
+
+    def test_no_hands_in_headers(self):
+        headers, num_moves = kif.scan_kif_text(
+            "後手の持駒：なし\n先手の持駒：金\n作者：someone\n表題：title\n"
+            "手数----指手---------消費時間--\n"
+            "   1 ５三銀打\n   2 投了\n"
+        )
+        self.assertEqual(headers, {"作者": "someone", "表題": "title"})
+        self.assertEqual(num_moves, 1)
+
+    def test_missing_file(self):
+        summary = kif.scan_kif("./tsumemi/test/test_kifus/missing.kif")
+        self.assertIsNotNone(summary.error)
+        self.assertIsNone(summary.num_moves)
+
+    def test_scan_directory(self):
+        directory = "./tsumemi/test/test_kifus"
+        summaries = list(files.scan_kif_files(directory, recursive=False))
+        self.assertCountEqual(
+            [summary.filepath for summary in summaries],
+            list(files.get_kif_files(directory, recursive=False)),
+        )
+
+
+class TestDirectoryScan(unittest.TestCase):
+    directory = "./tsumemi/test/test_kifus"
+
+    def test_scan_finds_all_files(self):
+        scan = files.DirectoryScan(self.directory, recursive=True)
+        scan.start()
+        self.assertTrue(scan.wait(timeout=10))
+        self.assertCountEqual(
+            scan.take_found(), list(files.get_kif_files(self.directory, True))
+        )
+        self.assertEqual(scan.take_found(), [])
+        self.assertIsNone(scan.error)
+
+    def test_missing_directory(self):
+        scan = files.DirectoryScan("./tsumemi/test/missing", recursive=False)
+        scan.start()
+        self.assertTrue(scan.wait(timeout=10))
+        self.assertIsInstance(scan.error, OSError)
+
+    def test_problem_list_from_scan(self):
+        controller = ProblemListController()
+        controller.scan_problem_files(self.directory, recursive=False)
+        self.assertTrue(controller.scan.wait(timeout=10))
+        self.assertTrue(controller.poll_scan())
+        self.assertIsNone(controller.scan)
+        expected = sorted(
+            files.get_kif_files(self.directory, False),
+            key=lambda filepath: ProblemList.natural_sort_key(str(filepath)),
+        )
+        self.assertEqual(
+            [prob.filepath for prob in controller.problem_list], expected
+        )
+        self.assertIsNotNone(controller.problem_list.curr_prob)
+
+    def test_cancel_scan(self):
+        controller = ProblemListController()
+        controller.scan_problem_files(self.directory, recursive=True)
+        controller.cancel_scan()
+        self.assertIsNone(controller.scan)
+        self.assertTrue(controller.poll_scan())
+        self.assertIsNone(controller.watcher)
+
+    def test_cancel_after_scan_finished(self):
+        controller = ProblemListController()
+        controller.scan_problem_files(self.directory, recursive=True)
+        self.assertTrue(controller.scan.wait(timeout=10))
+        controller.cancel_scan()
+        self.assertIsNone(controller.scan)
+        self.assertEqual(
+            len(controller.problem_list),
+            len(list(files.get_kif_files(self.directory, True))),
+        )
+        # The folder is not watched, as that would add back left out files
+        self.assertIsNone(controller.watcher)
+
+
+class TestFolderWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+        os.mkdir(self.path("sub"))
+        for name in ("1.kif", "2.kif", "notes.txt", os.path.join("sub", "3.kif")):
+            self.write(name, "手合割：平手\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write(self, name, text):
+        with open(self.path(name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_first_poll_compares_with_known_files(self):
+        watcher = files.FolderWatcher(
+            self.directory, True, known_files=[self.path("1.kif"), self.path("gone.kif")]
+        )
+        changes = watcher.poll()
+        self.assertCountEqual(
+            changes.added, [self.path("2.kif"), self.path(os.path.join("sub", "3.kif"))]
+        )
+        self.assertEqual(changes.removed, [self.path("gone.kif")])
+        self.assertFalse(watcher.poll())
+
+    def test_changes(self):
+        watcher = files.FolderWatcher(self.directory, True)
+        watcher.poll()
+        self.write("4.kif", "手合割：平手\n")
+        self.write("1.kif", "手合割：平手\n手数----指手---------消費時間--\n")
+        os.remove(self.path("2.kif"))
+        os.remove(self.path(os.path.join("sub", "3.kif")))
+        os.rmdir(self.path("sub"))
+        changes = watcher.poll()
+        self.assertEqual(changes.added, [self.path("4.kif")])
+        self.assertCountEqual(
+            changes.removed, [self.path("2.kif"), self.path(os.path.join("sub", "3.kif"))]
+        )
+        self.assertEqual(changes.modified, [self.path("1.kif")])
+        self.assertFalse(watcher.poll())
+
+    def test_root_temporarily_missing(self):
+        known_files = [self.path("1.kif"), self.path("2.kif")]
+        watcher = files.FolderWatcher(self.directory, False, known_files=known_files)
+        moved = self.directory + "-moved"
+        os.rename(self.directory, moved)
+        try:
+            self.assertFalse(watcher.poll())
+        finally:
+            os.rename(moved, self.directory)
+        self.assertFalse(watcher.poll())
+        os.rename(self.directory, moved)
+        try:
+            self.assertFalse(watcher.poll())
+        finally:
+            os.rename(moved, self.directory)
+        self.write("4.kif", "手合割：平手\n")
+        changes = watcher.poll()
+        self.assertEqual(changes.added, [self.path("4.kif")])
+        self.assertEqual(changes.removed, [])
+
+    def test_subdirectory_temporarily_unreadable(self):
+        scandir = os.scandir
+        subdir = self.path("sub")
+
+        def failing_scandir(path):
+            if path == subdir:
+                raise PermissionError(path)
+            return scandir(path)
+
+        known_files = [
+            self.path("1.kif"),
+            self.path(os.path.join("sub", "3.kif")),
+            self.path(os.path.join("sub", "gone.kif")),
+        ]
+        watcher = files.FolderWatcher(self.directory, True, known_files=known_files)
+        with mock.patch.object(files.os, "scandir", failing_scandir):
+            changes = watcher.poll()
+            self.assertEqual(changes.added, [self.path("2.kif")])
+            self.assertEqual(changes.removed, [])
+            self.assertFalse(watcher.poll())
+        changes = watcher.poll()
+        self.assertEqual(changes.added, [])
+        self.assertEqual(changes.removed, [self.path(os.path.join("sub", "gone.kif"))])
+
+    def test_not_recursive(self):
+        watcher = files.FolderWatcher(self.directory, False)
+        self.assertCountEqual(
+            watcher.poll().added, [self.path("1.kif"), self.path("2.kif")]
+        )
+        self.write(os.path.join("sub", "4.kif"), "手合割：平手\n")
+        self.assertFalse(watcher.poll())
+
+    def test_problem_list_keeps_results(self):
+        controller = ProblemListController()
+        controller.set_problem_files(files.get_kif_files(self.directory, True))
+        controller.set_status(ProblemStatus.CORRECT)  # 1.kif
+        controller.go_next_problem()
+        controller.set_status(ProblemStatus.WRONG)  # 2.kif
+        watcher = files.FolderWatcher(
+            self.directory, True, known_files=[p.filepath for p in controller.problem_list]
+        )
+        self.assertFalse(watcher.poll())
+        self.write("0.kif", "手合割：平手\n")
+        self.write("2.kif", "手合割：平手\n手数----指手---------消費時間--\n")
+        os.remove(self.path(os.path.join("sub", "3.kif")))
+        controller.apply_folder_changes(watcher.poll())
+        self.assertEqual(
+            [(prob.filepath, prob.status) for prob in controller.problem_list],
+            [
+                (self.path("1.kif"), ProblemStatus.CORRECT),
+                (self.path("2.kif"), ProblemStatus.NONE),
+                (self.path("0.kif"), ProblemStatus.NONE),
+            ],
+        )
+
+
+class TestKifCollection(unittest.TestCase):
+    cp932_filepaths = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)]
+    utf8_filepaths = [
+        "./tsumemi/test/test_kifus/branchedgame.kif",
+        "./tsumemi/test/test_kifus/testlinear.kifu",
+    ]
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write_collection(self, filepaths):
+        collection_path = os.path.join(self.tmpdir.name, "collection.kif")
+        with open(collection_path, "wb") as collection:
+            for filepath in filepaths:
+                with open(filepath, "rb") as _file:
+                    collection.write(_file.read().rstrip(b"\r\n") + b"\r\n")
+        return collection_path
+
+    def _assert_same_games(self, games, filepaths):
+        self.assertEqual(len(games), len(filepaths))
+        for game, filepath in zip(games, filepaths):
+            expected = kif.read_kif(filepath)
+            self.assertEqual(game.movetree.to_latin(), expected.movetree.to_latin())
+            self.assertEqual(game.movetree.start_pos, expected.movetree.start_pos)
+
+    def test_read_collection(self):
+        for filepaths in (self.cp932_filepaths, self.utf8_filepaths):
+            with self.subTest(filepaths=filepaths):
+                collection_path = self._write_collection(filepaths)
+                games = list(kif.read_kif_collection(collection_path))
+                self._assert_same_games(games, filepaths)
+
+    def test_read_at_offsets(self):
+        for filepaths in (self.cp932_filepaths, self.utf8_filepaths):
+            with self.subTest(filepaths=filepaths):
+                collection_path = self._write_collection(filepaths)
+                offsets = kif.index_kif_collection(collection_path)
+                self.assertEqual(offsets[0], 0)
+                games = [
+                    kif.read_kif_at(collection_path, offset)
+                    for offset in reversed(offsets)
+                ]
+                self._assert_same_games(games[::-1], filepaths)
+
+    def test_single_game_file(self):
+        filepath = self.utf8_filepaths[0]
+        self.assertEqual(kif.index_kif_collection(filepath), [0])
+        self._assert_same_games(list(kif.read_kif_collection(filepath)), [filepath])
+
+    def test_problem_list_from_collection(self):
+        collection_path = self._write_collection(self.cp932_filepaths)
+        offsets = kif.index_kif_collection(collection_path)
+        controller = ProblemListController()
+        first = controller.set_problem_collection(collection_path, offsets)
+        self.assertEqual(first.offset, 0)
+        self.assertEqual(
+            [prob.offset for prob in controller.problem_list], offsets
+        )
+        self.assertEqual(
+            [prob.name for prob in controller.problem_list][:2],
+            ["collection.kif #1", "collection.kif #2"],
+        )
+
+    def test_save_collection_as_database(self):
+        collection_path = self._write_collection(self.cp932_filepaths)
+        controller = ProblemListController()
+        controller.set_problem_collection(
+            collection_path, kif.index_kif_collection(collection_path)
+        )
+        db_path = os.path.join(self.tmpdir.name, "collection.tsudb")
+        num_written = controller.save_as_database(db_path)
+        self.assertEqual(num_written, len(self.cp932_filepaths))
+        with tsudb.ProblemDatabase(db_path) as db:
+            self._assert_same_games(
+                [db.read_game(idx) for idx in range(len(db))], self.cp932_filepaths
+            )
+            self.assertEqual(
+                [db.get_name(idx) for idx in range(len(db))],
+                [prob.name for prob in controller.problem_list],
+            )
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+import tsumemi.src.shogi.parsing.kif as kif
+
+from tsumemi.src.tsumemi import tsudb
+from tsumemi.src.tsumemi.problem_list.problem_list_controller import (
+    ProblemListController,
+)
+
+
+TEST_KIFS = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)] + [
+    "./tsumemi/test/test_kifus/testlinear.kifu",
+    "./tsumemi/test/test_kifus/branchedgame.kif",
+]
+
+
+class TestProblemDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "problems.tsudb")
+        self.num_written = tsudb.build_database(self.db_path, TEST_KIFS)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip(self):
+        self.assertEqual(self.num_written, len(TEST_KIFS))
+        with tsudb.ProblemDatabase(self.db_path) as db:
+            self.assertEqual(len(db), len(TEST_KIFS))
+            # Read out of order to exercise random access
+            for idx in reversed(range(len(db))):
+                filename = TEST_KIFS[idx]
+                with self.subTest(filename=filename):
+                    expected = kif.read_kif(filename)
+                    game = db.read_game(idx)
+                    self.assertEqual(
+                        game.movetree.to_latin(), expected.movetree.to_latin()
+                    )
+                    self.assertEqual(game.get_current_sfen(), expected.get_current_sfen())
+                    self.assertEqual(game.movetree.headers, expected.movetree.headers)
+                    self.assertEqual(db.get_name(idx), os.path.basename(filename))
+
+    def test_variations_and_comments_kept(self):
+        expected = kif.read_kif(TEST_KIFS[-1])
+        with tsudb.ProblemDatabase(self.db_path) as db:
+            record = db.get_record(len(TEST_KIFS) - 1)
+            self.assertIsNotNone(record.variations)
+            game = record.to_game()
+        expected_comments = [node.comment for node in expected.movetree.traverse_preorder()]
+        comments = [node.comment for node in game.movetree.traverse_preorder()]
+        self.assertEqual(comments, expected_comments)
+
+    def test_mainline_only_record(self):
+        with tsudb.ProblemDatabase(self.db_path) as db:
+            record = db.get_record(0)
+        self.assertIsNone(record.variations)
+        self.assertEqual(record.start_sfen, kif.read_kif(TEST_KIFS[0]).movetree.start_pos)
+
+    def test_mainline_only_record_headers(self):
+        filename = "./tsumemi/test/test_kifus/testlinear.kifu"
+        expected = kif.read_kif(filename).movetree
+        with tsudb.ProblemDatabase(self.db_path) as db:
+            record = db.get_record(TEST_KIFS.index(filename))
+        self.assertIsNone(record.variations)
+        movetree = record.to_game().movetree
+        self.assertEqual(movetree.sente, expected.sente)
+        self.assertEqual(movetree.gote, expected.gote)
+        self.assertEqual(movetree.handicap, expected.handicap)
+        self.assertEqual(movetree.headers, expected.headers)
+        self.assertTrue(movetree.sente)
+
+    def test_index_out_of_range(self):
+        with tsudb.ProblemDatabase(self.db_path) as db:
+            with self.assertRaises(IndexError):
+                db.get_record(len(TEST_KIFS))
+
+    def test_not_a_database(self):
+        for contents in (b"", b"TSDB", b"XXXX" * 10):
+            with self.subTest(contents=contents):
+                filepath = os.path.join(self.tmpdir.name, "bad.tsudb")
+                with open(filepath, "wb") as f:
+                    f.write(contents)
+                with self.assertRaises(tsudb.TsudbError):
+                    tsudb.ProblemDatabase(filepath)
+
+    def test_problem_list_from_database(self):
+        controller = ProblemListController()
+        with tsudb.ProblemDatabase(self.db_path) as db:
+            first = controller.set_problem_database(db)
+            self.assertEqual(len(controller.problem_list), len(TEST_KIFS))
+            self.assertTrue(first.is_in_database())
+            self.assertEqual(first.db_index, 0)
+            self.assertEqual(
+                [prob.name for prob in controller.problem_list],
+                [os.path.basename(filename) for filename in TEST_KIFS],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import unittest
+
+import tsumemi.src.shogi.parsing.kif as kif
+import tsumemi.src.shogi.parsing.usi as usi
+
+from tsumemi.src.shogi.move import TerminationMove
+from tsumemi.src.tsumemi import ingest
+from tsumemi.src.tsumemi.problem_list.problem_list_controller import (
+    ProblemListController,
+)
+
+
+TEST_KIFS = [f"./tsumemi/test/test_kifus/{i}.kif" for i in range(1, 11)] + [
+    "./tsumemi/test/test_kifus/testlinear.kifu",
+    "./tsumemi/test/test_kifus/branchedgame.kif",
+]
+
+
+def mainline_moves(game):
+    nodes = game.movetree.traverse_mainline()
+    next(nodes)  # exclude the root node
+    return [
+        node.move for node in nodes if not isinstance(node.move, TerminationMove)
+    ]
+
+
+class TestUsiMoves(unittest.TestCase):
+    def test_move_roundtrip(self):
+        game = usi.read_usi_line("startpos moves 7g7f 3c3d 8h2b+ 3a2b B*4e")
+        self.assertEqual(
+            [usi.write_usi_move(move) for move in mainline_moves(game)],
+            ["7g7f", "3c3d", "8h2b+", "3a2b", "B*4e"],
+        )
+
+    def test_position_prefix(self):
+        line = (
+            "position sfen lnsgkgsnl/1r5b1/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/"
+            "LNSGKGSNL b - 1 moves 2g2f"
+        )
+        game = usi.read_usi_line(line)
+        self.assertEqual(len(mainline_moves(game)), 1)
+        startpos = usi.read_usi_line("startpos")
+        self.assertEqual(game.movetree.start_pos, startpos.movetree.start_pos)
+
+    def test_invalid_lines(self):
+        for line in (
+            "",
+            "moves 7g7f",
+            "sfen 9/9/9 b",
+            "startpos 7g7f",
+            "startpos moves 7g7z",
+            "startpos moves 5e5d",
+            "startpos moves K*5e",
+        ):
+            with self.subTest(line=line):
+                with self.assertRaises(ValueError):
+                    usi.read_usi_line(line)
+
+
+class TestUsiKifRoundtrip(unittest.TestCase):
+    def test_kif_to_usi_line(self):
+        for filename in TEST_KIFS:
+            with self.subTest(filename=filename):
+                game = kif.read_kif(filename)
+                line = usi.write_usi_line(game)
+                self.assertNotIn("\n", line)
+                reread = usi.read_usi_line(line)
+                self.assertEqual(reread.movetree.start_pos, game.movetree.start_pos)
+                self.assertEqual(mainline_moves(reread), mainline_moves(game))
+
+
+class TestUsiProblemFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "problems.sfen")
+        self.lines = [usi.write_usi_line(kif.read_kif(f)) for f in TEST_KIFS]
+        with open(self.filepath, "w", encoding="utf-8") as f:
+            f.write("# exported problems\n\n")
+            for line in self.lines:
+                f.write(line + "\n\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_index_skips_blank_and_comment_lines(self):
+        with usi.UsiProblemFile(self.filepath) as problems:
+            self.assertEqual(len(problems), len(self.lines))
+            for idx in (5, 0, len(self.lines) - 1):
+                self.assertEqual(problems.get_line(idx), self.lines[idx])
+            with self.assertRaises(IndexError):
+                problems.get_line(len(self.lines))
+
+    def test_read_game_matches_bulk_read(self):
+        games = list(usi.read_usi_file(self.filepath))
+        with usi.UsiProblemFile(self.filepath) as problems:
+            for idx, game in enumerate(games):
+                self.assertEqual(
+                    mainline_moves(problems.read_game(idx)), mainline_moves(game)
+                )
+
+    def test_empty_file(self):
+        filepath = os.path.join(self.tmpdir.name, "empty.sfen")
+        open(filepath, "w").close()
+        with usi.UsiProblemFile(filepath) as problems:
+            self.assertEqual(len(problems), 0)
+
+    def test_problem_list_from_file(self):
+        controller = ProblemListController()
+        with usi.UsiProblemFile(self.filepath) as problems:
+            first = controller.set_problem_database(problems)
+            self.assertEqual(len(controller.problem_list), len(self.lines))
+            self.assertTrue(first.is_in_database())
+            self.assertEqual(first.name, "problems.sfen #1")
+
+    def test_export_usi(self):
+        out_path = os.path.join(self.tmpdir.name, "exported.usi")
+        filepaths = TEST_KIFS + ["./tsumemi/test/test_kifus/testbranch.kif"]
+        num_lines = ingest.export_usi(filepaths, out_path, max_workers=2)
+        self.assertEqual(num_lines, len(self.lines))
+        with open(out_path, encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines(), self.lines)
+
+    def test_export_usi_in_background(self):
+        out_path = os.path.join(self.tmpdir.name, "exported.usi")
+        filepaths = TEST_KIFS + ["./tsumemi/test/test_kifus/testbranch.kif"]
+        export = ingest.UsiExport(filepaths, out_path, max_workers=2)
+        self.assertEqual(export.get_progress(), (0, len(filepaths)))
+        export.start()
+        self.assertTrue(export.wait(timeout=30))
+        self.assertIsNone(export.error)
+        self.assertEqual(export.num_lines, len(self.lines))
+        self.assertEqual(export.get_progress(), (len(filepaths), len(filepaths)))
+        with open(out_path, encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines(), self.lines)
+
+    def test_cancel_export(self):
+        out_path = os.path.join(self.tmpdir.name, "exported.usi")
+        export = ingest.UsiExport(TEST_KIFS, out_path, max_workers=1)
+        export.cancel()
+        export.start()
+        self.assertTrue(export.wait(timeout=30))
+        self.assertTrue(export.is_cancelled())
+        self.assertIsNone(export.num_lines)
+        self.assertFalse(os.path.exists(out_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
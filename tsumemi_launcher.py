@@ -1,3 +1,6 @@
 if __name__ == "__main__":
+    import multiprocessing
     import tsumemi
-    tsumemi.run()
\ No newline at end of file
+    # Frozen builds start worker processes by running this executable
+    multiprocessing.freeze_support()
+    tsumemi.run()